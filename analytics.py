@@ -0,0 +1,129 @@
+"""
+College Analytics Computations
+==============================
+- The pandas work behind the analyst report tabs, kept free of Streamlit so
+  the page, benchmarks and offline jobs share one implementation.
+"""
+
+from tracing import traced
+
+
+def student_join_columns(grades):
+    """Student columns joined onto grades (grades.csv carries no year of its own)."""
+    return ['walletKey', 'department'] + ([] if 'year' in grades.columns else ['year'])
+
+
+@traced()
+def college_slice(students, grades, college_name):
+    """Students and grades rows of one college."""
+    return (students[students['collegeName'] == college_name],
+            grades[grades['collegeName'] == college_name])
+
+
+@traced()
+def subject_averages(grades):
+    """Average mark per subject, best first."""
+    return grades.groupby('subject', observed=True).marks.mean().sort_values(ascending=False)
+
+
+@traced()
+def department_counts(students):
+    """Students per department (departments with no students dropped)."""
+    counts = students['department'].value_counts()
+    return counts[counts > 0]
+
+
+@traced()
+def merge_grades_students(grades, students, how='left'):
+    """Grades with the student's department and year attached."""
+    return grades.merge(students[student_join_columns(grades)], on='walletKey', how=how)
+
+
+@traced()
+def year_progression(merged):
+    """Average mark per (year, department)."""
+    return merged.groupby(['year', 'department'], observed=True).marks.mean().reset_index()
+
+
+@traced()
+def college_stats(students, grades, faculty, college_name):
+    """Headline numbers of one college's report (expects already filtered students/grades)."""
+    return {
+        "total_students": len(students),
+        "total_faculty": int((faculty['collegeName'] == college_name).sum()),
+        "departments": students['department'].nunique(),
+        "subjects": grades['subject'].nunique(),
+        "average_mark": round(grades['marks'].mean(), 2),
+        "median_mark": round(grades['marks'].median(), 2),
+        "max_mark": int(grades['marks'].max()),
+        "min_mark": int(grades['marks'].min())
+    }
+
+
+@traced()
+def subject_summary(grades):
+    """Per-subject average marks rounded for the report prompt."""
+    return grades.groupby('subject', observed=True)['marks'].mean().round(2)
+
+
+@traced()
+def college_report(students, grades, faculty, college_name):
+    """Everything the report tabs show for one college, or None when it has no students or grades.
+
+    streaming.college_report() returns the same keys without loading whole tables.
+    """
+    students, grades = college_slice(students, grades, college_name)
+    if students.empty or grades.empty:
+        return None
+    inner = merge_grades_students(grades, students, how='inner')
+    return {
+        'students': students,
+        'sampled': False,
+        'subject_averages': subject_averages(grades),
+        'department_counts': department_counts(students),
+        'scatter': merge_grades_students(grades, students, how='left'),
+        'animated': inner,
+        'years': inner['year'].nunique(),
+        'year_progression': year_progression(inner),
+        'stats': college_stats(students, grades, faculty, college_name),
+        'subject_summary': subject_summary(grades),
+    }
+
+
+def college_charts(report, college_name):
+    """Plotly builders (px -> figure) for the report tabs, keyed by chart name.
+
+    Shared by the live page and report_scheduler.py so pre-rendered figures match.
+    """
+    avg_subject, dep_counts = report['subject_averages'], report['department_counts']
+    charts = {
+        'subject_bar': lambda px: px.bar(avg_subject, labels={"index": "Subject", "marks": "Average Mark"},
+                                         title="Average Marks per Subject"),
+        'department_pie': lambda px: px.pie(names=dep_counts.index, values=dep_counts.values,
+                                            title="Department Breakdown", hole=0.3),
+        'grades_3d': lambda px: px.scatter_3d(report['scatter'], x='subject', y='year', z='marks',
+                                              color='department', symbol='department',
+                                              hover_data=['wallet'], title="3D View of Grades"),
+    }
+    if report['years'] >= 2:
+        charts['year_progression'] = lambda px: px.line(
+            report['year_progression'], x="year", y="marks", color="department", markers=True,
+            animation_frame='department', title="Average Marks Progression Over Years by Department")
+        charts['grades_3d_animated'] = lambda px: px.scatter_3d(
+            report['animated'], x='subject', y='year', z='marks', color='department', symbol='department',
+            animation_frame='department', title="Animated 3D Scatter of Subject-Year-Marks")
+    return charts
+
+
+def report_prompt(college_name, report):
+    """Chat messages asking the LLM for the college's narrative report."""
+    stats_md = "\n".join([f"- **{k.replace('_', ' ').capitalize()}:** {v}" for k, v in report['stats'].items()])
+    prompt = (f"Generate a detailed analytical report for the following college: {college_name}.\n"
+              f"Statistics:\n{stats_md}\n\n"
+              f"Subject-wise average grades:\n{report['subject_summary'].to_string()}\n\n"
+              f"Department sizes:\n{report['department_counts'].to_string()}\n\n"
+              f"Identify patterns, strengths, weaknesses, and advice for administration and faculty.")
+    return [
+        {"role": "system", "content": "You are a university data analyst AI assistant."},
+        {"role": "user", "content": prompt}
+    ]
@@ -0,0 +1,144 @@
+"""
+Batch Transaction Helpers
+=========================
+- Split bulk records into chunks that stay under the block gas limit.
+- Sign and send one batch transaction per chunk with locally tracked nonces.
+- Every call is gas-estimated before it is signed. A call the node says
+  would revert raises CallReverted with the revert reason, so it is never
+  sent; a fallback gas limit is only used by nodes without eth_estimateGas.
+- Shared by the bulk modes of the college and hospital admin portals,
+  payroll.py and merkle.py.
+"""
+
+from tracing import traced
+
+# Rough per-record gas costs of the batch entry points (string-heavy structs)
+STUDENT_GAS = 180000
+MARKS_GAS = 90000
+STAFF_GAS = 160000
+REPORT_GAS = 200000
+PAY_GAS = 45000            # value transfer (+25000 if the payee account is new) plus the active-staff check
+
+BASE_TX_GAS = 60000        # intrinsic cost + loop/modifier overhead per batch
+BLOCK_GAS_FRACTION = 0.5   # never ask for more than half a block
+MAX_CHUNK_SIZE = 200
+GAS_HEADROOM = 1.2         # gas limit = estimate * headroom
+
+
+class CallReverted(Exception):
+    """Raised instead of sending a transaction whose gas estimate reverts."""
+
+
+def raw_transaction(signed_tx):
+    """Signed payload bytes (web3 v7+ renamed `rawTransaction` to `raw_transaction`)."""
+    return getattr(signed_tx, "raw_transaction", None) or signed_tx.rawTransaction
+
+
+def chunked(records, size):
+    """Yield consecutive lists of at most `size` records."""
+    chunk = []
+    for rec in records:
+        chunk.append(rec)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def plan_chunk_size(w3, per_record_gas, base_gas=BASE_TX_GAS, fraction=BLOCK_GAS_FRACTION,
+                    max_size=MAX_CHUNK_SIZE):
+    """Largest chunk whose estimated gas fits in `fraction` of the latest block gas limit."""
+    block_gas_limit = w3.eth.get_block("latest")["gasLimit"]
+    budget = int(block_gas_limit * fraction) - base_gas
+    return max(1, min(max_size, budget // per_record_gas)), int(block_gas_limit * fraction)
+
+
+# === SINGLE CALLS ===
+def _rpc_error(error):
+    """(code, message) of a JSON-RPC error raised by web3 (v7+ Web3RPCError or the older ValueError(dict))."""
+    body = getattr(error, "rpc_response", None) or (error.args[0] if error.args else None)
+    body = body.get("error", body) if isinstance(body, dict) else None
+    if isinstance(body, dict):
+        return body.get("code"), str(body.get("message", ""))
+    return None, str(error)
+
+
+def estimate_gas(call, params, fallback):
+    """Gas limit for `call` sent with `params`: the node's estimate plus GAS_HEADROOM.
+
+    A revert raises CallReverted with its reason; `fallback` is returned only
+    when the node does not implement eth_estimateGas. Any other error (node
+    down, bad arguments) propagates, so nothing is signed.
+    """
+    from web3.exceptions import ContractLogicError
+    try:
+        return int(call.estimate_gas(params) * GAS_HEADROOM)
+    except ContractLogicError as e:
+        raise CallReverted(f"{call.fn_name} would revert: {getattr(e, 'message', None) or e}") from None
+    except Exception as e:
+        code, message = _rpc_error(e)
+        if code == -32601 or "method not found" in message.lower():
+            return fallback
+        if "revert" in message.lower():   # nodes that report reverts as plain RPC errors
+            raise CallReverted(f"{call.fn_name} would revert: {message}") from None
+        raise
+
+
+def send_call(w3, priv_key, call, fallback_gas=None, nonce=None, value=0, gas=None, gas_price_gwei=2):
+    """Estimate (unless `gas` is given), build, sign and send one contract call; returns (tx hash, gas).
+
+    Raises CallReverted before signing if the call would revert.
+    """
+    account = w3.eth.account.from_key(priv_key)
+    params = {"from": account.address, "value": value}
+    if gas is None:
+        gas = estimate_gas(call, params, fallback_gas)
+    if nonce is None:
+        nonce = w3.eth.get_transaction_count(account.address, 'pending')
+    tx = call.build_transaction({**params, "nonce": nonce, "gas": gas,
+                                 "gasPrice": w3.to_wei(gas_price_gwei, "gwei")})
+    signed_tx = w3.eth.account.sign_transaction(tx, priv_key)
+    return w3.to_hex(w3.eth.send_raw_transaction(raw_transaction(signed_tx))), gas
+
+
+# === BATCHES ===
+@traced()
+def send_batches(w3, priv_key, make_call, records, per_record_gas, gas_price_gwei=2):
+    """
+    Send `make_call(chunk)` once per chunk of `records`.
+
+    Every chunk is gas-estimated before anything is signed; a chunk that would
+    exceed the gas budget is split in half until it fits, and a chunk that
+    would revert is bisected down to its first failing record, which raises
+    CallReverted naming that record (no transaction is sent then). Returns one
+    result dict per transaction sent (size, tx hash, gas limit used).
+    """
+    account = w3.eth.account.from_key(priv_key)
+    chunk_size, gas_budget = plan_chunk_size(w3, per_record_gas)
+
+    planned = []
+    pending = [(start, chunk) for start, chunk in
+               zip(range(0, len(records), chunk_size), chunked(records, chunk_size))]
+    while pending:
+        start, chunk = pending.pop(0)
+        call = make_call(chunk)
+        try:
+            gas = estimate_gas(call, {"from": account.address}, BASE_TX_GAS + per_record_gas * len(chunk))
+        except CallReverted as e:
+            if len(chunk) == 1:
+                raise CallReverted(f"Record {start + 1}: {e}") from None
+            gas = None
+        if gas is None or (gas > gas_budget and len(chunk) > 1):
+            half = len(chunk) // 2
+            pending[0:0] = [(start, chunk[:half]), (start + half, chunk[half:])]
+            continue
+        planned.append((chunk, call, gas))
+
+    nonce = w3.eth.get_transaction_count(account.address)
+    results = []
+    for chunk, call, gas in planned:
+        tx_hash, gas = send_call(w3, priv_key, call, nonce=nonce, gas=gas, gas_price_gwei=gas_price_gwei)
+        nonce += 1
+        results.append({"records": len(chunk), "txHash": tx_hash, "gas": gas})
+    return results
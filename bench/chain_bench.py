@@ -0,0 +1,379 @@
+"""
+Chain Benchmarks
+================
+- Deploys the portal contracts (remix/stu.sol, remix/college_admin.sol,
+  remix/HealthPoints.sol) to a local EVM and measures what the Web3 paths
+  of the portals depend on: read latency, single vs batch transaction
+  throughput and event indexing speed.
+- Backends: in-process py-evm via eth-tester (default, no node needed),
+  a spawned `npx hardhat node`, or any RPC URL.
+- Contract ABI/bytecode come from Hardhat artifacts (`npx hardhat compile`)
+  when artifacts/ exists, else from py-solc-x with hardhat.config.js's
+  compiler settings (solc 0.8.28, optimizer 200 runs).
+- `--check` compares against bench/chain_baseline.json and fails when there is
+  no baseline for the backend, rather than passing without comparing.
+
+    python bench/chain_bench.py --records 200
+    python bench/chain_bench.py --records 200 --save-baseline
+    python bench/chain_bench.py --backend hardhat --records 1000 --chunk 100
+    python bench/chain_bench.py --rpc http://127.0.0.1:8545 --key 0x...
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, REPO_DIR)
+
+from web3 import Web3  # noqa: E402
+from batching import send_batches, raw_transaction, STUDENT_GAS, MARKS_GAS, STAFF_GAS, REPORT_GAS  # noqa: E402
+from portal_bench import compare  # noqa: E402
+
+ARTIFACTS_DIR = os.path.join(REPO_DIR, 'artifacts')
+DEFAULT_BASELINE = os.path.join(BENCH_DIR, 'chain_baseline.json')
+DEFAULT_OUT = os.path.join(BENCH_DIR, 'chain_latest.json')
+SOLC_VERSION = "0.8.28"   # keep in step with hardhat.config.js
+OPTIMIZER_RUNS = 200
+
+CONTRACTS = {
+    'stu': ('remix/stu.sol', 'CollegeAdmin'),
+    'college_admin': ('remix/college_admin.sol', 'CollegeAdmin'),
+    'health': ('remix/HealthPoints.sol', 'HealthPortal'),
+}
+
+# Hardhat's first default account (public, well-known test key)
+HARDHAT_KEY = "0xac0974bec39a17e36ba4a6b4d238ff944bacb478cbed5efcae784d7bf4f2ff80"
+HARDHAT_PORT = 8546
+
+COLLEGE = "Bench College"
+HOSPITAL = "Bench Hospital"
+CID = "bafkreigh2akiscaildcqabsyg3dfr6chu3fgpregiymsck7e7aqa4s52zy"
+READ_SAMPLES = 200
+LOG_WINDOW = 500  # blocks per eth_getLogs request, as an indexer would page
+
+
+# === BACKENDS ===
+def tester_backend():
+    """In-process py-evm chain with a 30M block gas limit; returns (w3, private key, stop)."""
+    from web3 import EthereumTesterProvider
+    from eth_tester import EthereumTester, PyEVMBackend
+
+    params = PyEVMBackend.generate_genesis_params(overrides={'gas_limit': 30_000_000})
+    backend = PyEVMBackend(genesis_parameters=params)
+    w3 = Web3(EthereumTesterProvider(EthereumTester(backend)))
+    return w3, backend.account_keys[0].to_hex(), lambda: None
+
+
+def hardhat_backend(port=HARDHAT_PORT, timeout=60):
+    """Spawn `npx hardhat node` and connect to it; stop() terminates the node."""
+    proc = subprocess.Popen(["npx", "hardhat", "node", "--port", str(port)], cwd=REPO_DIR,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    w3 = Web3(Web3.HTTPProvider(f"http://127.0.0.1:{port}"))
+    deadline = time.time() + timeout
+    while not w3.is_connected():
+        if proc.poll() is not None or time.time() > deadline:
+            proc.kill()
+            raise RuntimeError("Hardhat node did not start (is `npm install` done?)")
+        time.sleep(0.5)
+    return w3, HARDHAT_KEY, proc.terminate
+
+
+def rpc_backend(url, key):
+    w3 = Web3(Web3.HTTPProvider(url))
+    if not w3.is_connected():
+        raise RuntimeError(f"Cannot connect to {url}")
+    return w3, key, lambda: None
+
+
+# === CONTRACTS ===
+def compile_source(source, name):
+    """ABI and bytecode of one contract compiled with py-solc-x (installs solc on first use)."""
+    try:
+        import solcx
+    except ImportError:
+        raise RuntimeError("No Hardhat artifacts and py-solc-x is not installed; "
+                           "run `npx hardhat compile` or `pip install py-solc-x`") from None
+    if SOLC_VERSION not in {str(v) for v in solcx.get_installed_solc_versions()}:
+        solcx.install_solc(SOLC_VERSION)
+    with open(os.path.join(REPO_DIR, source), encoding='utf-8') as f:
+        content = f.read()
+    output = solcx.compile_standard({
+        'language': 'Solidity',
+        'sources': {source: {'content': content}},
+        'settings': {
+            'optimizer': {'enabled': True, 'runs': OPTIMIZER_RUNS},
+            'outputSelection': {source: {name: ['abi', 'evm.bytecode.object']}},
+        },
+    }, solc_version=SOLC_VERSION)
+    contract = output['contracts'][source][name]
+    return contract['abi'], '0x' + contract['evm']['bytecode']['object']
+
+
+def load_artifact(source, name, artifacts_dir=ARTIFACTS_DIR):
+    """ABI and bytecode from a Hardhat artifact (artifacts/<source>/<name>.json), else compiled here."""
+    path = os.path.join(artifacts_dir, source, name + '.json')
+    if not os.path.exists(path):
+        return compile_source(source, name)
+    with open(path) as f:
+        artifact = json.load(f)
+    return artifact['abi'], artifact['bytecode']
+
+
+def send(w3, key, call, gas=None):
+    """Sign and send one call the way the portals' build_sign_send_tx does; returns the tx hash."""
+    account = w3.eth.account.from_key(key)
+    tx = call.build_transaction({
+        "from": account.address,
+        "nonce": w3.eth.get_transaction_count(account.address, 'pending'),
+        "gas": gas or int(call.estimate_gas({"from": account.address}) * 1.2),
+        "gasPrice": w3.to_wei(2, "gwei"),
+    })
+    return w3.eth.send_raw_transaction(raw_transaction(w3.eth.account.sign_transaction(tx, key)))
+
+
+def wait_all(w3, tx_hashes):
+    receipts = [w3.eth.wait_for_transaction_receipt(h) for h in tx_hashes]
+    failed = [r for r in receipts if r['status'] != 1]
+    if failed:
+        raise RuntimeError(f"{len(failed)} transaction(s) reverted")
+    return receipts
+
+
+def deploy(w3, key, source, name, artifacts_dir=ARTIFACTS_DIR):
+    abi, bytecode = load_artifact(source, name, artifacts_dir)
+    factory = w3.eth.contract(abi=abi, bytecode=bytecode)
+    receipt = wait_all(w3, [send(w3, key, factory.constructor())])[0]
+    return w3.eth.contract(address=receipt['contractAddress'], abi=abi)
+
+
+# === DATA ===
+def wallet(i):
+    return Web3.to_checksum_address(f"0x{0x10000 + i:040x}")
+
+
+def student_input(i):
+    return (f"Student {i}", f"R{i}", 1 + i % 4, "CSE", "A", f"s{i}@tkm.edu")
+
+
+def summary_hash(i):
+    return Web3.keccak(text=f"summary {i}")
+
+
+# === MEASUREMENTS ===
+def throughput(name, w3, records, send_all):
+    """Send every record, wait for all receipts; records/s and gas per record."""
+    start = time.perf_counter()
+    receipts = wait_all(w3, send_all())
+    seconds = time.perf_counter() - start
+    gas = sum(r['gasUsed'] for r in receipts)
+    return {'name': f"tx/{name}", 'rows': records, 'median_s': seconds, 'txs': len(receipts),
+            'recordsPerSec': round(records / seconds, 1), 'gasPerRecord': gas // records}
+
+
+def single(w3, key, calls):
+    return lambda: [send(w3, key, call) for call in calls]
+
+
+def batched(w3, key, make_call, records, per_record_gas):
+    def send_all():
+        results = send_batches(w3, key, make_call, records, per_record_gas)
+        return [r['txHash'] for r in results]
+    return send_all
+
+
+def queued(w3, key, calls, gas):
+    """Enqueue every call in tx_queue.py (as the admin pages do), then drain the queue; returns the tx hashes."""
+    import tx_queue
+    path = os.path.join(tempfile.mkdtemp(prefix="txq-bench-"), "tx_queue.json")
+
+    def send_all():
+        entries = [tx_queue.enqueue(w3, key, call, gas, path=path) for call in calls]
+        tx_queue.drain(w3, path)
+        return [e['txHash'] for e in entries]
+    return send_all
+
+
+def pay_run(w3, key, contract, ids):
+    """One payroll run over staff `ids` (1 gwei each) through payroll.execute; returns its tx hashes."""
+    import pandas as pd
+    import payroll
+    payroll.PAYROLL_DIR = tempfile.mkdtemp(prefix="payroll-bench-")
+    lines = pd.DataFrame({'staffAddress': [wallet(i) for i in ids], 'staffName': "", 'staffRole': "",
+                          'salaryWei': [10 ** 9] * len(ids)})
+
+    def send_all():
+        run = payroll.plan(HOSPITAL, f"bench-{time.time_ns()}", lines, payroll.chain_batch_size(w3), 'chain')
+        payroll.execute(run, w3, contract, key)
+        return [b['txHash'] for b in run['batches']]
+    return send_all
+
+
+def anchor_run(w3, key, contract, ids):
+    """Buffer one report per id and anchor them through merkle.anchor; returns its tx hashes."""
+    import merkle
+    merkle.ANCHOR_DIR = tempfile.mkdtemp(prefix="anchor-bench-")
+
+    def send_all():
+        merkle.buffer_reports(HOSPITAL, [{'studentAddress': wallet(i), 'cid': CID, 'points': 10,
+                                          'summaryHash': summary_hash(i), 'timestamp': i} for i in ids])
+        return [b['txHash'] for b in merkle.anchor(HOSPITAL, w3, contract, key) if b['status'] == merkle.ANCHORED]
+    return send_all
+
+
+def latency(name, records, fn, samples=READ_SAMPLES):
+    """p50/p95 of `samples` eth_call round trips; fn(i) performs call i."""
+    times = []
+    for i in range(samples):
+        start = time.perf_counter()
+        fn(i)
+        times.append(time.perf_counter() - start)
+    times.sort()
+    return {'name': f"read/{name}", 'rows': records, 'median_s': statistics.median(times),
+            'p95_s': times[int(len(times) * 0.95) - 1], 'samples': samples}
+
+
+def index_events(name, w3, records, event, window=LOG_WINDOW):
+    """Page eth_getLogs over the whole chain and decode every log."""
+    start = time.perf_counter()
+    latest = w3.eth.block_number
+    decoded = 0
+    for from_block in range(0, latest + 1, window):
+        logs = event.get_logs(from_block=from_block, to_block=min(latest, from_block + window - 1))
+        decoded += len(logs)
+    seconds = time.perf_counter() - start
+    return {'name': f"events/{name}", 'rows': records, 'median_s': seconds, 'events': decoded,
+            'eventsPerSec': round(decoded / seconds, 1) if seconds else None}
+
+
+def bench_college(w3, key, label, source, records, artifacts_dir):
+    contract = deploy(w3, key, source, 'CollegeAdmin', artifacts_dir)
+    wait_all(w3, [send(w3, key, contract.functions.registerCollege(COLLEGE))])
+    fns = contract.functions
+    ids = range(records)
+    batch_ids = range(records, 2 * records)
+    results = [
+        throughput(f"{label}.addStudent", w3, records, single(
+            w3, key, [fns.addStudent(COLLEGE, wallet(i), student_input(i)) for i in ids])),
+        throughput(f"{label}.addStudents", w3, records, batched(
+            w3, key, lambda c: fns.addStudents(COLLEGE, [wallet(i) for i in c], [student_input(i) for i in c]),
+            list(batch_ids), STUDENT_GAS)),
+        throughput(f"{label}.addMarks", w3, records, single(
+            w3, key, [fns.addMarks(COLLEGE, wallet(i), "Maths", i % 101) for i in ids])),
+        throughput(f"{label}.addMarksBatch", w3, records, batched(
+            w3, key, lambda c: fns.addMarksBatch(COLLEGE, [wallet(i) for i in c], ["Physics"] * len(c),
+                                                 [i % 101 for i in c]),
+            list(ids), MARKS_GAS)),
+    ]
+    results.append(latency(f"{label}.getStudent", records,
+                           lambda i: fns.getStudent(COLLEGE, wallet(i % records)).call()))
+    results.append(latency(f"{label}.getMarks", records,
+                           lambda i: fns.getMarks(COLLEGE, wallet(i % records)).call()))
+    return results
+
+
+def bench_health(w3, key, records, artifacts_dir):
+    source, name = CONTRACTS['health']
+    contract = deploy(w3, key, source, name, artifacts_dir)
+    fns = contract.functions
+    admin = w3.eth.account.from_key(key).address
+    wait_all(w3, [send(w3, key, fns.registerHospital(HOSPITAL))])
+    wait_all(w3, [send(w3, key, fns.addStaff(HOSPITAL, admin, "Bench Admin", "Admin"))])
+    ids = range(records)
+    results = [
+        throughput("health.addStaff", w3, records, single(
+            w3, key, [fns.addStaff(HOSPITAL, wallet(i), f"Staff {i}", "Nurse") for i in ids])),
+        throughput("health.addStaffBatch", w3, records, batched(
+            w3, key, lambda c: fns.addStaffBatch(HOSPITAL, [wallet(i) for i in c], [f"Staff {i}" for i in c],
+                                                 ["Nurse"] * len(c)),
+            list(range(records, 2 * records)), STAFF_GAS)),
+        throughput("health.addStaff.queued", w3, records, queued(
+            w3, key, [fns.addStaff(HOSPITAL, wallet(i), f"Staff {i}", "Nurse") for i in range(2 * records, 3 * records)],
+            350000)),
+        throughput("health.submitHealthReport", w3, records, single(
+            w3, key, [fns.submitHealthReport(HOSPITAL, wallet(i), CID, 10, summary_hash(i)) for i in ids])),
+        throughput("health.submitHealthReports", w3, records, batched(
+            w3, key, lambda c: fns.submitHealthReports(HOSPITAL, [(wallet(i), CID, 10, summary_hash(i)) for i in c]),
+            list(ids), REPORT_GAS)),
+    ]
+    results.append(throughput("health.paySalaries", w3, records, pay_run(w3, key, contract, ids)))
+    results.append(throughput("health.anchorReportBatch", w3, records, anchor_run(w3, key, contract, ids)))
+    results.append(latency("health.getReportCount", records, lambda i: fns.getReportCount(HOSPITAL).call()))
+    results.append(latency("health.getStaffRange", records,
+                           lambda i: fns.getStaffRange(HOSPITAL, (i * 50) % records, 50).call()))
+    results.append(latency("health.getReportsRange", records,
+                           lambda i: fns.getReportsRange(HOSPITAL, (i * 50) % records, 50).call()))
+    results.append(index_events("health.HealthReportSubmitted", w3, records,
+                                contract.events.HealthReportSubmitted))
+    results.append(index_events("health.StaffAdded", w3, records, contract.events.StaffAdded))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark portal contracts on a local EVM")
+    parser.add_argument("--backend", choices=["tester", "hardhat"], default="tester")
+    parser.add_argument("--rpc", help="use an existing node instead of --backend")
+    parser.add_argument("--key", help="funded private key for --rpc")
+    parser.add_argument("--records", type=int, default=200)
+    parser.add_argument("--artifacts", default=ARTIFACTS_DIR)
+    parser.add_argument("--out", default=DEFAULT_OUT)
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--threshold", type=float, default=1.5)
+    parser.add_argument("--check", action="store_true", help="exit with status 1 on regressions")
+    args = parser.parse_args()
+
+    if args.rpc:
+        w3, key, stop = rpc_backend(args.rpc, args.key)
+    elif args.backend == "hardhat":
+        w3, key, stop = hardhat_backend()
+    else:
+        w3, key, stop = tester_backend()
+    backend = args.rpc or args.backend
+
+    try:
+        results = []
+        for label in ('stu', 'college_admin'):
+            results += bench_college(w3, key, label, CONTRACTS[label][0], args.records, args.artifacts)
+        results += bench_health(w3, key, args.records, args.artifacts)
+    finally:
+        stop()
+
+    for r in results:
+        extra = {k: v for k, v in r.items() if k not in ('name', 'rows', 'median_s')}
+        print(f"{r['rows']:>8}  {r['name']:<40} {r['median_s'] * 1000:10.2f} ms  {extra}")
+
+    report = {'created': time.strftime('%Y-%m-%dT%H:%M:%S'), 'backend': backend, 'results': results}
+    out = args.baseline if args.save_baseline else args.out
+    with open(out, 'w') as f:
+        json.dump(report, f, indent=1)
+    print(f"\nWrote {len(results)} results to {out}")
+
+    if args.save_baseline:
+        return
+    if not os.path.exists(args.baseline):
+        print(f"No baseline at {args.baseline}; record one with --save-baseline")
+        if args.check:
+            sys.exit(1)
+        return
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    if baseline.get('backend') != backend:
+        print(f"Baseline was recorded on {baseline.get('backend')}; skipping comparison")
+        if args.check:
+            sys.exit(1)
+        return
+    regressions = compare(results, baseline, args.threshold)
+    print(f"{len(regressions)} regression(s) over {args.threshold}x")
+    if regressions and args.check:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
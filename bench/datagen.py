@@ -0,0 +1,163 @@
+"""
+Synthetic Portal Data
+=====================
+- Writes all nine CSV tables with the live column layout at any row count.
+- Rows are generated column-wise with numpy (10M rows per table stays in
+  the minutes range), from a fixed seed so runs are comparable.
+- Tables reference each other: grades/points/scholarships/reports use
+  student wallets, salary rows use staff addresses.
+"""
+
+import json
+import os
+import numpy as np
+import pandas as pd
+
+SUBJECTS = ['Maths', 'Physics', 'Chemistry', 'English', 'Programming', 'Electronics', 'Mechanics', 'Biology']
+DEPARTMENTS = ['CSE', 'ECE', 'EEE', 'ME', 'CE', 'CHE', 'AE', 'BT']
+SECTIONS = ['A', 'B', 'C']
+ROLES = ['Professor', 'Associate Professor', 'Assistant Professor', 'HOD', 'Lab Staff']
+STAFF_ROLES = ['Doctor', 'Nurse', 'ENT', 'Radiologist', 'Pharmacist', 'Admin']
+
+MARKER = 'bench_meta.json'
+
+
+def parse_rows(text):
+    """'1k' -> 1000, '100k' -> 100000, '10M' -> 10000000."""
+    text = text.strip()
+    scale = {'k': 10 ** 3, 'K': 10 ** 3, 'm': 10 ** 6, 'M': 10 ** 6}.get(text[-1], 1)
+    return int(float(text[:-1] if scale > 1 else text) * scale)
+
+
+def addresses(start, count):
+    """Deterministic lowercase 0x addresses for ids start..start+count-1."""
+    ids = np.arange(start, start + count, dtype='>u8')
+    raw = np.zeros((count, 20), dtype=np.uint8)
+    raw[:, 12:] = ids.view(np.uint8).reshape(count, 8)
+    raw[:, 0] = 0xbe  # keep clear of the precompile/zero range
+    hex_rows = np.frombuffer(raw.tobytes().hex().encode(), dtype='S40').astype(str)
+    return np.char.add('0x', hex_rows)
+
+
+def group_count(rows, per_group, cap):
+    return int(min(cap, max(1, rows // per_group)))
+
+
+def colleges(rows):
+    return np.array([f"College {i}" for i in range(group_count(rows, 5000, 200))])
+
+
+def hospitals(rows):
+    return np.array([f"Hospital {i}" for i in range(group_count(rows, 5000, 200))])
+
+
+def probe():
+    """Keys present in every generated dataset (used by the getter benchmarks)."""
+    return {
+        'college': 'College 0',
+        'department': 'CSE',
+        'wallet': str(addresses(0, 1)[0]),
+        'hospital': 'Hospital 0',
+    }
+
+
+def generate_tables(rows, seed=0):
+    """Yield (table file name, DataFrame) pairs, `rows` rows each, one table in memory at a time."""
+    rng = np.random.default_rng(seed)
+    college_names = colleges(rows)
+    hospital_names = hospitals(rows)
+    # Student i belongs to college i % C so every college has students
+    student_wallets = addresses(0, rows)
+    student_college = college_names[np.arange(rows) % len(college_names)]
+
+    def pick_students(n):
+        idx = rng.integers(0, rows, n)
+        return student_college[idx], student_wallets[idx]
+
+    yield 'students.csv', pd.DataFrame({
+        'collegeName': student_college,
+        'wallet': student_wallets,
+        'name': np.char.add('Student ', np.arange(rows).astype(str)),
+        'rollNo': np.char.add('R', np.arange(rows).astype(str)),
+        'year': rng.integers(1, 5, rows),
+        'department': rng.choice(DEPARTMENTS, rows),
+        'section': rng.choice(SECTIONS, rows),
+        'email': np.char.add(np.char.add('s', np.arange(rows).astype(str)), '@college.edu'),
+    })
+    college, wallet = pick_students(rows)
+    yield 'grades.csv', pd.DataFrame({
+        'collegeName': college, 'wallet': wallet,
+        'subject': rng.choice(SUBJECTS, rows), 'marks': rng.integers(0, 101, rows),
+    })
+    college, wallet = pick_students(rows)
+    yield 'points.csv', pd.DataFrame({
+        'collegeName': college, 'wallet': wallet, 'points': rng.integers(0, 500, rows),
+    })
+    college, wallet = pick_students(rows)
+    yield 'scholarships.csv', pd.DataFrame({
+        'collegeName': college, 'wallet': wallet,
+        'amount': rng.integers(1, 10 ** 6, rows).astype(np.uint64) * np.uint64(10 ** 12),
+    })
+    yield 'departments.csv', pd.DataFrame({
+        'collegeName': college_names[np.arange(rows) % len(college_names)],
+        'deptName': np.char.add('Dept ', (np.arange(rows) // len(college_names)).astype(str)),
+        'deptAdmin': addresses(10 ** 9, rows),
+    })
+    yield 'faculty.csv', pd.DataFrame({
+        'collegeName': rng.choice(college_names, rows),
+        'deptName': rng.choice(DEPARTMENTS, rows),
+        'wallet': addresses(2 * 10 ** 9, rows),
+        'name': np.char.add('Faculty ', np.arange(rows).astype(str)),
+        'role': rng.choice(ROLES, rows),
+    })
+    staff_addresses = addresses(3 * 10 ** 9, rows)
+    staff_hospital = hospital_names[np.arange(rows) % len(hospital_names)]
+    yield 'staff.csv', pd.DataFrame({
+        'hospitalName': staff_hospital,
+        'staffAddress': staff_addresses,
+        'staffName': np.char.add('Staff ', np.arange(rows).astype(str)),
+        'staffRole': rng.choice(STAFF_ROLES, rows),
+    })
+    paid = rng.permutation(rows)[:rows * 9 // 10]
+    yield 'salary.csv', pd.DataFrame({
+        'hospitalName': staff_hospital[paid],
+        'staffAddress': staff_addresses[paid],
+        'salaryWei': rng.integers(1, 5 * 10 ** 6, len(paid)).astype(np.uint64) * np.uint64(10 ** 12),
+    })
+    _, wallet = pick_students(rows)
+    yield 'reports.csv', pd.DataFrame({
+        'hospitalName': rng.choice(hospital_names, rows),
+        'studentAddress': wallet,
+        'cid': np.char.add('bafkrei', np.arange(rows).astype(str)),
+        'timestamp': 1_700_000_000 + np.arange(rows),
+        'points': rng.integers(0, 50, rows),
+        'summaryHash': np.char.add('0x', np.arange(rows).astype(str)),
+    })
+
+
+def write_dataset(out_dir, rows, seed=0):
+    """Write the nine CSVs into `out_dir` unless an identical dataset is already there."""
+    os.makedirs(out_dir, exist_ok=True)
+    marker = os.path.join(out_dir, MARKER)
+    meta = {'rows': rows, 'seed': seed}
+    if os.path.exists(marker):
+        with open(marker) as f:
+            if json.load(f) == meta:
+                return out_dir
+    for name, df in generate_tables(rows, seed):
+        df.to_csv(os.path.join(out_dir, name), index=False)
+    with open(marker, 'w') as f:
+        json.dump(meta, f)
+    return out_dir
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Write synthetic portal CSVs")
+    parser.add_argument("out_dir")
+    parser.add_argument("--rows", default="1k", help="rows per table, e.g. 1k, 100k, 10M")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    write_dataset(args.out_dir, parse_rows(args.rows), args.seed)
+    print(f"Wrote {parse_rows(args.rows)} rows per table to {args.out_dir}")
@@ -0,0 +1,80 @@
+"""
+Cold-Start Import Budget
+========================
+- Runs home.py and each portal page once in a fresh interpreter (Streamlit
+  bare mode, CSV-only default view). streamlit and pandas are imported
+  first and timed on their own, so the budget covers only what the page
+  adds on top of them; that share is stable where the ~1.4 s of the bare
+  imports is not.
+- Fails (exit status 1) if any page pulls in web3, plotly.express or ollama
+  before a feature needs them (checked in sys.modules after the run), if
+  home.py adds more than the budget, or if a cold start goes over the
+  loose wall-clock limit.
+
+    python bench/import_budget.py                 # home.py may add 0.5 s; 4 s wall clock per page
+    python bench/import_budget.py --budget 0.3 --wall 3 --repeat 5
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PAGES = ['home.py', 'college_admin.py', 'college_analyst_report.py', 'hospital_admin.py', 'stu.py']
+LAZY_MODULES = ['web3', 'plotly.express', 'ollama']
+
+DRIVER = """
+import json, runpy, sys, time
+start = time.perf_counter()
+import pandas, streamlit
+base = time.perf_counter() - start
+runpy.run_path({page!r}, run_name="__main__")
+seconds = time.perf_counter() - start
+print("IMPORT_BUDGET " + json.dumps({{"seconds": seconds, "added": seconds - base,
+                                     "loaded": [m for m in {lazy!r} if m in sys.modules]}}))
+"""
+
+
+def cold_start(page):
+    """Seconds (total and added over streamlit + pandas) and heavy modules loaded for one run of `page`."""
+    proc = subprocess.run([sys.executable, "-c", DRIVER.format(page=page, lazy=LAZY_MODULES)],
+                          cwd=REPO_DIR, capture_output=True, text=True)
+    for line in proc.stdout.splitlines():
+        if line.startswith("IMPORT_BUDGET "):
+            return json.loads(line[len("IMPORT_BUDGET "):])
+    raise RuntimeError(f"{page} failed to start:\n{proc.stderr[-2000:]}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check cold-start time and lazy imports of the portal pages")
+    parser.add_argument("--budget", type=float, default=float(os.environ.get("PORTAL_IMPORT_BUDGET", "0.5")),
+                        help="max seconds home.py may add to the streamlit + pandas imports")
+    parser.add_argument("--wall", type=float, default=4.0, help="max seconds for any cold start, imports included")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per page; the fastest one counts")
+    args = parser.parse_args()
+
+    failures = []
+    for page in PAGES:
+        runs = [cold_start(page) for _ in range(args.repeat)]
+        best = min(r["seconds"] for r in runs)
+        added = min(r["added"] for r in runs)
+        loaded = sorted({m for r in runs for m in r["loaded"]})
+        print(f"{page:<28} {best:6.3f} s  (+{added:.3f} s over streamlit/pandas)  "
+              f"eager heavy imports: {', '.join(loaded) or 'none'}")
+        if loaded:
+            failures.append(f"{page} imports {', '.join(loaded)} at startup")
+        if page == 'home.py' and added > args.budget:
+            failures.append(f"home.py adds {added:.3f} s to its cold start, over the {args.budget:.3f} s budget")
+        if best > args.wall:
+            failures.append(f"{page} cold start {best:.3f} s is over the {args.wall:.1f} s wall-clock limit")
+
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
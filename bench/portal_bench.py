@@ -0,0 +1,293 @@
+"""
+Portal Benchmarks
+=================
+- Times the CSV hot paths of every portal on synthetic data (see datagen.py):
+  table loads, page module imports, each CSV fallback getter, each analytics
+  computation (in memory and streamed) and full page renders through
+  Streamlit's AppTest. Each case but parse/ and import/ gets one untimed
+  warm-up call, so cold index builds stay out of the samples.
+- Writes machine-readable JSON and compares it against a stored baseline.
+
+    python bench/portal_bench.py --sizes 1k,100k
+    python bench/portal_bench.py --sizes 1k --baseline bench/baseline.json --check
+    python bench/portal_bench.py --sizes 1k,100k --save-baseline
+"""
+
+import argparse
+import importlib
+import io
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+import warnings
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, REPO_DIR)
+
+import pandas as pd  # noqa: E402
+import datagen  # noqa: E402
+import analytics  # noqa: E402
+import datasets  # noqa: E402
+import streaming  # noqa: E402
+import parallel  # noqa: E402
+import leaderboard  # noqa: E402
+import grade_stats  # noqa: E402
+import search_index  # noqa: E402
+import profiles  # noqa: E402
+import blob_store  # noqa: E402
+from money import payroll_totals  # noqa: E402
+from schema import TABLES, load_table  # noqa: E402
+
+DEFAULT_BASELINE = os.path.join(BENCH_DIR, 'baseline.json')
+DEFAULT_OUT = os.path.join(BENCH_DIR, 'latest.json')
+PORTAL_MODULES = ['stu', 'college_admin', 'hospital_admin']
+BLOB_BYTES = 16 << 20  # one report file hashed (sha2-256 + keccak) and stored per blobs/add
+NOISE_FLOOR_S = 0.002  # differences below this are never reported as regressions
+
+
+def timed(fn, repeat, warmup=0):
+    """min/median wall time of `repeat` calls of fn(), after `warmup` untimed calls."""
+    for _ in range(warmup):
+        fn()
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return {'min_s': min(samples), 'median_s': statistics.median(samples), 'repeat': repeat}
+
+
+def fresh_import(name):
+    sys.modules.pop(name, None)
+    return importlib.import_module(name)
+
+
+# === CASES ===
+def load_cases():
+    """load/ hits the dataset cache once warm; parse/ forces a full parse every call."""
+    cases = {f"load/{name}": (lambda name=name: load_table(name)) for name in TABLES}
+    for name in TABLES:
+        cases[f"parse/{name}"] = lambda name=name: (datasets.invalidate(name), load_table(name))
+    return cases
+
+
+def import_cases():
+    return {f"import/{name}": (lambda name=name: fresh_import(name)) for name in PORTAL_MODULES}
+
+
+def getter_cases(keys):
+    stu = fresh_import('stu')
+    college = fresh_import('college_admin')
+    hospital = fresh_import('hospital_admin')
+    c, w, h = keys['college'], keys['wallet'], keys['hospital']
+    return {
+        'getter/stu.get_student_csv': lambda: stu.get_student_csv(c, w),
+        'getter/stu.get_grades_csv': lambda: stu.get_grades_csv(c, w),
+        'getter/stu.get_scholarship_csv': lambda: stu.get_scholarship_csv(c, w),
+        'getter/stu.get_points_csv': lambda: stu.get_points_csv(c, w),
+        'getter/college_admin.get_departments_csv': lambda: college.get_departments_csv(c),
+        'getter/college_admin.get_faculty_csv': lambda: college.get_faculty_csv(c, keys['department']),
+        'getter/college_admin.get_student_csv': lambda: college.get_student_csv(c, w),
+        'getter/college_admin.get_marks_csv': lambda: college.get_marks_csv(c, w),
+        'getter/hospital_admin.get_staff_count_csv': lambda: hospital.get_staff_count_csv(h),
+        'getter/hospital_admin.get_staff_list_csv': lambda: hospital.get_staff_list_csv(h),
+        'getter/hospital_admin.get_report_count_csv': lambda: hospital.get_report_count_csv(h),
+        'getter/hospital_admin.get_reports_csv': lambda: hospital.get_reports_csv(h),
+    }
+
+
+def analytics_cases(keys):
+    students, grades = load_table('students.csv'), load_table('grades.csv')
+    faculty = load_table('faculty.csv')
+    staff, salary = load_table('staff.csv'), load_table('salary.csv')
+    c = keys['college']
+    s, g = analytics.college_slice(students, grades, c)
+    merged = analytics.merge_grades_students(g, s, how='inner')
+    leaderboard.refresh(students, grades)
+    student_key = students.loc[students['collegeName'] == c, 'walletKey'].iloc[0]
+    grade_stats.refresh(grades)
+    subject = grades.loc[grades['collegeName'] == c, 'subject'].iloc[0]
+    search_index.refresh('students.csv', students)
+    scholarships = load_table('scholarships.csv')
+    profiles.refresh(students, grades, scholarships)
+    name_prefix = str(students.loc[students['collegeName'] == c, 'name'].iloc[0])[:4]
+    blob_store.BLOB_DIR = tempfile.mkdtemp(prefix="blobs-bench-")
+    report_file = os.urandom(BLOB_BYTES)
+    return {
+        'analytics/college_slice': lambda: analytics.college_slice(students, grades, c),
+        'analytics/subject_averages': lambda: analytics.subject_averages(g),
+        'analytics/department_counts': lambda: analytics.department_counts(s),
+        'analytics/merge_grades_students': lambda: analytics.merge_grades_students(g, s, how='left'),
+        'analytics/year_progression': lambda: analytics.year_progression(merged),
+        'analytics/college_stats': lambda: analytics.college_stats(s, g, faculty, c),
+        'analytics/payroll_totals': lambda: payroll_totals(staff, salary),
+        'analytics/college_report': lambda: analytics.college_report(students, grades, faculty, c),
+        'analytics/all_colleges': lambda: parallel.all_college_report(students, grades, faculty, workers=1),
+        'leaderboard/refresh': lambda: leaderboard.refresh(students, grades),
+        'leaderboard/top': lambda: leaderboard.top(leaderboard.MARKS, c, 10),
+        'leaderboard/rank': lambda: leaderboard.rank(leaderboard.MARKS, c, student_key),
+        'grade_stats/refresh': lambda: grade_stats.refresh(grades),
+        'grade_stats/standing': lambda: grade_stats.standing(c, subject, 50),
+        'profiles/refresh': lambda: profiles.refresh(students, grades, scholarships),
+        'profiles/get': lambda: profiles.get(c, keys['wallet']),
+        'search/refresh': lambda: search_index.refresh('students.csv', students),
+        'search/query': lambda: search_index.search('students.csv', c, name_prefix),
+        'blobs/add': lambda: blob_store.add(io.BytesIO(report_file), "report.bin"),
+        'stream/college_report': lambda: streaming.college_report(c, 'students.csv', 'grades.csv', 'faculty.csv'),
+        'stream/rows_page': lambda: streaming.rows_page('reports.csv', 'hospitalName', keys['hospital'], 0, 50),
+    }
+
+
+def render_cases(keys):
+    from streamlit.testing.v1 import AppTest
+
+    def app(page):
+        at = AppTest.from_file(os.path.join(REPO_DIR, page), default_timeout=600)
+        return checked(at.run())
+
+    def checked(at):
+        if at.exception:
+            raise RuntimeError(f"{at.exception[0].message}")
+        return at
+
+    def stu():
+        at = app('stu.py')
+        at.sidebar.checkbox[0].uncheck()
+        at.sidebar.text_input[0].set_value(keys['college'])
+        at.sidebar.text_input[1].set_value(keys['wallet']).run()
+        checked(at.sidebar.selectbox[0].select("👤 Student Profile & Grades").run())
+
+    def hospital(view):
+        at = app('hospital_admin.py')
+        at.sidebar.checkbox[0].uncheck()
+        at.sidebar.text_input[0].set_value(keys['hospital']).run()
+        checked(at.sidebar.radio[0].set_value(view).run())
+
+    def college():
+        at = app('college_admin.py')
+        at.sidebar.checkbox[0].uncheck()
+        checked(at.sidebar.radio[0].set_value("📝 Add/View Grades").run())
+
+    def home_route(page):
+        checked(app('home.py').sidebar.radio[0].set_value(page).run())
+
+    def report():
+        at = app('college_analyst_report.py')
+        checked(at.sidebar.text_input[0].set_value(keys['college']).run())
+
+    return {
+        'render/stu.profile': stu,
+        'render/hospital_admin.staff_list': lambda: hospital("🗂 Staff List"),
+        'render/hospital_admin.reports': lambda: hospital("📑 All Health Reports"),
+        'render/hospital_admin.payroll': lambda: hospital("💰 Payroll Summary"),
+        'render/college_admin.grades': college,
+        'render/college_analyst_report': report,
+        'render/home': lambda: app('home.py'),
+        'render/home.run_script': lambda: home_route("🏥 Hospital Admin"),
+    }
+
+
+# === RUN ===
+def link_pages(data_dir):
+    """home.run_script opens page files relative to the working directory."""
+    for page in PORTAL_MODULES + ['college_analyst_report']:
+        target = os.path.join(data_dir, page + '.py')
+        if not os.path.exists(target):
+            os.symlink(os.path.join(REPO_DIR, page + '.py'), target)
+
+
+def run_size(rows, data_root, repeat, pages=True):
+    data_dir = datagen.write_dataset(os.path.join(data_root, str(rows)), rows)
+    link_pages(data_dir)
+    keys = datagen.probe()
+    cwd = os.getcwd()
+    os.chdir(data_dir)  # portals read their CSVs relative to the working directory
+    try:
+        groups = [load_cases(), import_cases(), getter_cases(keys), analytics_cases(keys)]
+        if pages:
+            groups.append(render_cases(keys))
+        results = []
+        for cases in groups:
+            for name, fn in cases.items():
+                n = min(repeat, 3) if name.startswith(('render/', 'import/')) else repeat
+                # parse/ and import/ are cold by design; everything else is timed once its indexes
+                # and caches are built, so the first sample doesn't carry a one-off build
+                warmup = 0 if name.startswith(('parse/', 'import/')) else 1
+                result = {'name': name, 'rows': rows, **timed(fn, n, warmup)}
+                results.append(result)
+                print(f"{rows:>10}  {name:<45} {result['median_s'] * 1000:10.2f} ms")
+        return results
+    finally:
+        os.chdir(cwd)
+
+
+def machine_info():
+    return {
+        'python': platform.python_version(),
+        'pandas': pd.__version__,
+        'platform': platform.platform(),
+        'processor': platform.processor() or platform.machine(),
+        'cpus': os.cpu_count(),
+    }
+
+
+def compare(results, baseline, threshold):
+    """Print current vs baseline medians; returns the regressed entries."""
+    base = {(r['name'], r['rows']): r for r in baseline['results']}
+    regressions = []
+    print(f"\n{'rows':>10}  {'case':<45} {'baseline ms':>12} {'current ms':>12} {'ratio':>7}")
+    for r in results:
+        old = base.get((r['name'], r['rows']))
+        if old is None:
+            continue
+        ratio = r['median_s'] / old['median_s'] if old['median_s'] else float('inf')
+        regressed = ratio > threshold and r['median_s'] - old['median_s'] > NOISE_FLOOR_S
+        flag = '  REGRESSION' if regressed else ''
+        print(f"{r['rows']:>10}  {r['name']:<45} {old['median_s'] * 1000:12.2f} "
+              f"{r['median_s'] * 1000:12.2f} {ratio:7.2f}{flag}")
+        if regressed:
+            regressions.append({**r, 'baseline_median_s': old['median_s'], 'ratio': ratio})
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark portal CSV hot paths on synthetic data")
+    parser.add_argument("--sizes", default="1k,100k", help="comma-separated rows per table (1k, 100k, 10M)")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--data-dir", default=os.path.join(tempfile.gettempdir(), 'portal-bench'),
+                        help="where synthetic datasets are generated (reused across runs)")
+    parser.add_argument("--no-pages", action="store_true", help="skip AppTest page renders")
+    parser.add_argument("--out", default=DEFAULT_OUT)
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--save-baseline", action="store_true", help="write results as the new baseline")
+    parser.add_argument("--threshold", type=float, default=1.5, help="median ratio counted as a regression")
+    parser.add_argument("--check", action="store_true", help="exit with status 1 on regressions")
+    args = parser.parse_args()
+
+    warnings.filterwarnings('ignore')
+
+    results = []
+    for size in args.sizes.split(','):
+        results += run_size(datagen.parse_rows(size), args.data_dir, args.repeat, pages=not args.no_pages)
+
+    report = {'created': time.strftime('%Y-%m-%dT%H:%M:%S'), 'machine': machine_info(), 'results': results}
+    out = DEFAULT_BASELINE if args.save_baseline else args.out
+    with open(out, 'w') as f:
+        json.dump(report, f, indent=1)
+    print(f"\nWrote {len(results)} results to {out}")
+
+    if not args.save_baseline and os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.threshold)
+        print(f"{len(regressions)} regression(s) over {args.threshold}x")
+        if regressions and args.check:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,251 @@
+"""
+Report Blob Store
+=================
+- Local content-addressed store for health report files: a file is
+  streamed once in CHUNK_BYTES blocks through sha2-256 and keccak256 at the
+  same time, so its CID and its summary hash come out of one pass and the
+  file is never held in memory.
+- The CID is CIDv1, raw codec, sha2-256 (the `bafkrei...` form): the same
+  CID `ipfs add --cid-version 1` gives a file of up to one block (256 KiB),
+  and a stable content address for larger ones. The summary hash is the
+  keccak256 of the file (bytes32, what `submitHealthReport` expects).
+- Identical uploads are stored once: the blob lives at blobs/<cid>, and
+  pins.json keeps a pin per blob with its name, size, summary hash and
+  the number of uploads; `gc` removes blobs that are no longer pinned.
+- `python blob_store.py serve` is a local stand-in for an IPFS gateway:
+  GET /ipfs/<cid> streams the blob back (`verify` rehashes a stored blob).
+
+    python blob_store.py add report.pdf
+    python blob_store.py ls
+    python blob_store.py serve --port 8088
+"""
+
+import base64
+import hashlib
+import json
+import os
+import tempfile
+import time
+from datetime import datetime
+
+from points_ledger import file_lock
+
+BLOB_DIR = os.environ.get("PORTAL_BLOB_DIR", "blobs")
+PINS = "pins.json"
+CHUNK_BYTES = 1 << 20
+CID_PREFIX = bytes([0x01, 0x55, 0x12, 0x20])   # CIDv1, raw, sha2-256, 32-byte digest
+GATEWAY_PORT = 8088
+UPLOAD_GRACE = 3600   # seconds since its last write before gc treats an upload temp file as abandoned
+
+
+# === HASHING ===
+def cid_of(sha256_digest):
+    """Base32 CIDv1 string of a raw block with this sha2-256 digest."""
+    return "b" + base64.b32encode(CID_PREFIX + sha256_digest).decode("ascii").lower().rstrip("=")
+
+
+def digest_of(cid):
+    """sha2-256 digest inside a CID produced by cid_of(); ValueError for anything else."""
+    if not isinstance(cid, str) or not cid.startswith("b"):
+        raise ValueError(f"Not a base32 CIDv1: {cid}")
+    body = cid[1:].upper()
+    try:
+        raw = base64.b32decode(body + "=" * (-len(body) % 8))
+    except ValueError:
+        raise ValueError(f"Not a base32 CIDv1: {cid}") from None
+    if raw[:4] != CID_PREFIX or len(raw) != 36:
+        raise ValueError(f"Not a raw sha2-256 CID: {cid}")
+    return raw[4:]
+
+
+def hash_stream(stream, sink=None, chunk_bytes=CHUNK_BYTES):
+    """(cid, summary hash, size) of a binary stream read once; every chunk is also written to `sink`."""
+    from eth_hash.auto import keccak
+    sha, kec, size = hashlib.sha256(), keccak.new(b""), 0
+    while True:
+        chunk = stream.read(chunk_bytes)
+        if not chunk:
+            break
+        sha.update(chunk)
+        kec.update(chunk)
+        size += len(chunk)
+        if sink is not None:
+            sink.write(chunk)
+    return cid_of(sha.digest()), "0x" + kec.digest().hex(), size
+
+
+# === STORE ===
+def blob_path(cid):
+    digest_of(cid)   # never build a path from an arbitrary string
+    return os.path.join(BLOB_DIR, cid)
+
+
+def load_pins():
+    try:
+        with open(os.path.join(BLOB_DIR, PINS), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_pins(pins):
+    path = os.path.join(BLOB_DIR, PINS)
+    with open(path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(pins, f, indent=1)
+    os.replace(path + ".tmp", path)
+
+
+def add(stream, name=""):
+    """Store (and pin) a binary stream; returns its pin: {'cid', 'summaryHash', 'size', 'name', 'uploads', ...}.
+
+    The stream is hashed while it is spooled to a temp file in BLOB_DIR; if the
+    blob is already stored the temp file is dropped and only the pin is updated.
+    """
+    os.makedirs(BLOB_DIR, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=BLOB_DIR, prefix=".upload-")
+    try:
+        with os.fdopen(fd, "wb") as sink:
+            cid, summary_hash, size = hash_stream(stream, sink)
+        with file_lock(os.path.abspath(os.path.join(BLOB_DIR, PINS))):
+            if os.path.exists(blob_path(cid)):
+                os.remove(tmp)
+            else:
+                os.replace(tmp, blob_path(cid))
+            pins = load_pins()
+            pin = pins.get(cid) or {'cid': cid, 'summaryHash': summary_hash, 'size': size, 'name': name,
+                                    'added': datetime.now().isoformat(timespec='seconds'), 'uploads': 0}
+            pin.update(uploads=pin['uploads'] + 1, pinned=True)
+            pins[cid] = pin
+            _save_pins(pins)
+            return dict(pin)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+
+
+def add_file(path):
+    with open(path, "rb") as f:
+        return add(f, os.path.basename(path))
+
+
+def pin(cid, pinned=True):
+    """Pin or unpin a stored blob; returns False if the store does not know it."""
+    with file_lock(os.path.abspath(os.path.join(BLOB_DIR, PINS))):
+        pins = load_pins()
+        if cid not in pins:
+            return False
+        pins[cid]['pinned'] = pinned
+        _save_pins(pins)
+        return True
+
+
+def gc():
+    """Remove unpinned blobs (and abandoned upload temp files); returns the bytes freed.
+
+    Uploads are spooled before the pins lock is taken, so a temp file still
+    being written is left alone until it is UPLOAD_GRACE seconds old.
+    """
+    freed = 0
+    with file_lock(os.path.abspath(os.path.join(BLOB_DIR, PINS))):
+        pins = load_pins()
+        for cid in [c for c, p in pins.items() if not p.get('pinned')]:
+            if os.path.exists(blob_path(cid)):
+                freed += os.path.getsize(blob_path(cid))
+                os.remove(blob_path(cid))
+            del pins[cid]
+        cutoff = time.time() - UPLOAD_GRACE
+        for name in os.listdir(BLOB_DIR) if os.path.isdir(BLOB_DIR) else []:
+            path = os.path.join(BLOB_DIR, name)
+            if name.startswith(".upload-") and os.path.getmtime(path) < cutoff:
+                freed += os.path.getsize(path)
+                os.remove(path)
+        _save_pins(pins)
+    return freed
+
+
+def has(cid):
+    try:
+        return os.path.exists(blob_path(cid))
+    except ValueError:
+        return False
+
+
+def open_blob(cid):
+    """Binary file object of a stored blob; FileNotFoundError if it is not stored here."""
+    return open(blob_path(cid), "rb")
+
+
+def verify(cid):
+    """True if the stored bytes still hash to `cid`."""
+    with open_blob(cid) as f:
+        return hash_stream(f)[0] == cid
+
+
+def gateway_url(cid, port=GATEWAY_PORT):
+    return f"http://127.0.0.1:{port}/ipfs/{cid}"
+
+
+# === GATEWAY ===
+def serve(port=GATEWAY_PORT):
+    """Serve GET /ipfs/<cid> from the store until interrupted (a local IPFS gateway stand-in)."""
+    import shutil
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class Gateway(BaseHTTPRequestHandler):
+        def do_GET(self):
+            cid = self.path.split("?")[0].rstrip("/").rsplit("/", 1)[-1]
+            if not self.path.startswith("/ipfs/") or not has(cid):
+                self.send_error(404, "Blob not stored here")
+                return
+            pin_info = load_pins().get(cid, {})
+            self.send_response(200)
+            self.send_header("Content-Type", "application/octet-stream")
+            self.send_header("Content-Length", str(os.path.getsize(blob_path(cid))))
+            self.send_header("Cache-Control", "public, max-age=31536000, immutable")
+            self.send_header("Etag", f'"{cid}"')
+            if pin_info.get('name'):
+                self.send_header("Content-Disposition", f'inline; filename="{pin_info["name"].replace(chr(34), "")}"')
+            self.end_headers()
+            with open_blob(cid) as f:
+                shutil.copyfileobj(f, self.wfile, CHUNK_BYTES)
+
+    server = ThreadingHTTPServer(("127.0.0.1", port), Gateway)
+    print(f"serving {os.path.abspath(BLOB_DIR)} at http://127.0.0.1:{port}/ipfs/<cid>")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Local content-addressed store for health report files")
+    sub = parser.add_subparsers(dest="command", required=True)
+    add_cmd = sub.add_parser("add", help="store and pin files")
+    add_cmd.add_argument("files", nargs="+")
+    sub.add_parser("ls", help="list pinned blobs")
+    for name in ("verify", "unpin"):
+        sub.add_parser(name).add_argument("cid")
+    sub.add_parser("gc", help="remove unpinned blobs")
+    serve_cmd = sub.add_parser("serve", help="local gateway: GET /ipfs/<cid>")
+    serve_cmd.add_argument("--port", type=int, default=GATEWAY_PORT)
+    args = parser.parse_args()
+
+    if args.command == "add":
+        for path in args.files:
+            p = add_file(path)
+            print(f"{p['cid']}  {p['summaryHash']}  {p['size']} bytes  {p['name']}")
+    elif args.command == "ls":
+        for p in load_pins().values():
+            print(f"{p['cid']}  {p['size']:>12}  {'pinned' if p.get('pinned') else 'unpinned':8}  {p['name']}")
+    elif args.command == "verify":
+        print("ok" if verify(args.cid) else "CORRUPT")
+    elif args.command == "unpin":
+        print("unpinned" if pin(args.cid, False) else "unknown blob")
+    elif args.command == "gc":
+        print(f"freed {gc()} bytes")
+    else:
+        serve(args.port)
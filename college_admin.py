@@ -1,141 +1,57 @@
 import streamlit as st
-import json
 import pandas as pd
-from web3 import Web3
 import os
+from tracing import traced, span, rerun
+from batching import send_batches, raw_transaction, STUDENT_GAS, MARKS_GAS
+from wallets import add_wallet_keys, drop_wallet_keys, wallet_key, require_address, checksum_addresses
+from schema import load_table, save_table, append_rows, append_csv
+import contracts
+import points_ledger
+import search_index
+import tx_queue
 
 # === CONFIGURATION ===
 NODE_URL = "http://127.0.0.1:8545"  # Your local blockchain node URL or RPC endpoint
 CONTRACT_ADDRESS = "0x2279B7A0a67DB372996a5FaB50D91eAA73d2eBe6"  # Replace with your deployed contract address
 
-# Replace this with your actual Contract ABI JSON string copied from Remix or Hardhat
-CONTRACT_ABI = json.loads("""
-[
-    {
-        "inputs": [],
-        "stateMutability": "nonpayable",
-        "type": "constructor"
-    },
-    {
-        "inputs": [],
-        "name": "owner",
-        "outputs": [
-            {
-                "internalType": "address",
-                "name": "",
-                "type": "address"
-            }
-        ],
-        "stateMutability": "view",
-        "type": "function"
-    },
-    {
-        "inputs": [
-            {"internalType": "string", "name": "_collegeName", "type": "string"}
-        ],
-        "name": "registerCollege",
-        "outputs": [],
-        "stateMutability": "nonpayable",
-        "type": "function"
-    },
-    {
-        "inputs": [
-            {"internalType": "string", "name": "_collegeName", "type": "string"},
-            {"internalType": "string", "name": "_deptName", "type": "string"},
-            {"internalType": "address", "name": "_deptAdmin", "type": "address"}
-        ],
-        "name": "addDepartment",
-        "outputs": [],
-        "stateMutability": "nonpayable",
-        "type": "function"
-    },
-    {
-        "inputs": [
-            {"internalType": "string", "name": "_collegeName", "type": "string"},
-            {"internalType": "string", "name": "_deptName", "type": "string"},
-            {"internalType": "address", "name": "_wallet", "type": "address"},
-            {"internalType": "string", "name": "_name", "type": "string"},
-            {"internalType": "string", "name": "_role", "type": "string"}
-        ],
-        "name": "addFaculty",
-        "outputs": [],
-        "stateMutability": "nonpayable",
-        "type": "function"
-    },
-    {
-        "inputs": [
-            {"internalType": "string", "name": "_collegeName", "type": "string"},
-            {"internalType": "string", "name": "_department", "type": "string"},
-            {"internalType": "address", "name": "_wallet", "type": "address"},
-            {"internalType": "string", "name": "_name", "type": "string"},
-            {"internalType": "string", "name": "_rollNo", "type": "string"},
-            {"internalType": "uint8", "name": "_year", "type": "uint8"},
-            {"internalType": "string", "name": "_section", "type": "string"},
-            {"internalType": "string", "name": "_email", "type": "string"}
-        ],
-        "name": "addStudent",
-        "outputs": [],
-        "stateMutability": "nonpayable",
-        "type": "function"
-    },
-    {
-        "inputs": [
-            {"internalType": "string", "name": "_collegeName", "type": "string"},
-            {"internalType": "address", "name": "_student", "type": "address"},
-            {"internalType": "string", "name": "_subject", "type": "string"},
-            {"internalType": "uint8", "name": "_marks", "type": "uint8"}
-        ],
-        "name": "addMarks",
-        "outputs": [],
-        "stateMutability": "nonpayable",
-        "type": "function"
-    },
-    {
-        "inputs": [
-            {"internalType": "string", "name": "_collegeName", "type": "string"},
-            {"internalType": "address", "name": "_student", "type": "address"}
-        ],
-        "name": "getMarks",
-        "outputs": [
-            {"internalType": "string[]", "name": "", "type": "string[]"},
-            {"internalType": "uint8[]", "name": "", "type": "uint8[]"}
-        ],
-        "stateMutability": "view",
-        "type": "function"
-    }
-]
-""")
-
 # === CSV FILE PATHS ===
 DEPARTMENTS_CSV = "departments.csv"
 FACULTY_CSV = "faculty.csv"
 STUDENTS_CSV = "students.csv"
 GRADES_CSV = "grades.csv"
 
-# === Helper functions for CSV ===
-def load_csv(file_path, columns):
-    if not os.path.exists(file_path):
-        df = pd.DataFrame(columns=columns)
-        df.to_csv(file_path, index=False)
-    return pd.read_csv(file_path)
+# Load CSV at app start (compact typed tables, see schema.py)
+departments_df = load_table(DEPARTMENTS_CSV)
+faculty_df = load_table(FACULTY_CSV)
+students_df = load_table(STUDENTS_CSV)
+grades_df = load_table(GRADES_CSV)
 
-def save_csv(df, file_path):
-    df.to_csv(file_path, index=False)
+# --- Web3 helpers ---
+def connect_blockchain(offline=False):
+    """With `offline`, a down node still gives a contract to queue transactions with (see tx_queue.py)."""
+    return contracts.connect(NODE_URL, "CollegeAdmin", CONTRACT_ADDRESS, offline)
 
-# Load CSV at app start
-departments_df = load_csv(DEPARTMENTS_CSV, ['collegeName', 'deptName', 'deptAdmin'])
-faculty_df = load_csv(FACULTY_CSV, ['collegeName', 'deptName', 'wallet', 'name', 'role'])
-students_df = load_csv(STUDENTS_CSV, ['collegeName', 'department', 'wallet', 'name', 'rollNo', 'year', 'section', 'email'])
-grades_df = load_csv(GRADES_CSV, ['collegeName', 'studentWallet', 'subject', 'marks'])
+def send_tx(w3, priv, call, gas, queue=False):
+    """Sign and send one admin transaction, or queue it for the background sender; returns the tx hash."""
+    if queue:
+        entry = tx_queue.enqueue(w3, priv, call, gas, label=call.fn_name, node_url=NODE_URL)
+        return entry['txHash']
+    admin = w3.eth.account.from_key(priv)
+    tx = call.build_transaction({
+        "from": admin.address,
+        "nonce": w3.eth.get_transaction_count(admin.address),
+        "gas": gas,
+        "gasPrice": w3.to_wei("2", "gwei"),
+    })
+    signed = w3.eth.account.sign_transaction(tx, priv)
+    with span("college_admin.send_raw_transaction"):
+        tx_hash = w3.eth.send_raw_transaction(raw_transaction(signed))
+    return w3.to_hex(tx_hash)
 
-# --- Web3 helpers ---
-def connect_blockchain():
-    w3 = Web3(Web3.HTTPProvider(NODE_URL))
-    if not w3.is_connected():
-        return None, None
-    contract = w3.eth.contract(address=CONTRACT_ADDRESS, abi=CONTRACT_ABI)
-    return w3, contract
+def tx_done(message, tx_hash, queued):
+    st.success(f"{message} Tx Hash: {tx_hash}" + (" (queued, sent in the background)" if queued else ""))
 
+@traced()
 def get_marks_web3(contract, college, student_wallet):
     try:
         subjects, marks = contract.functions.getMarks(college, student_wallet).call()
@@ -144,28 +60,40 @@ def get_marks_web3(contract, college, student_wallet):
         return [], []
 
 # === CSV fallback fetch functions ===
+@traced()
 def get_departments_csv(college_name):
     df = departments_df[departments_df['collegeName']==college_name]
     return df['deptName'].tolist()
 
+@traced()
 def get_faculty_csv(college_name, dept_name):
     df = faculty_df[(faculty_df['collegeName']==college_name) & (faculty_df['deptName']==dept_name)]
     return df[['wallet','name','role']].to_dict('records')
 
+@traced()
 def get_student_csv(college_name, student_wallet):
-    df = students_df[(students_df['collegeName']==college_name) & (students_df['wallet'].str.lower() == student_wallet.lower())]
+    df = students_df[(students_df['collegeName']==college_name) & (students_df['walletKey'] == wallet_key(student_wallet))]
     if df.empty:
         return None
-    return df.iloc[0].to_dict()
+    return drop_wallet_keys(df).iloc[0].to_dict()
 
+@traced()
 def get_marks_csv(college_name, student_wallet):
-    df = grades_df[(grades_df['collegeName']==college_name) & (grades_df['studentWallet'].str.lower() == student_wallet.lower())]
+    df = grades_df[(grades_df['collegeName']==college_name) & (grades_df['walletKey'] == wallet_key(student_wallet))]
     if df.empty:
         return [], []
     subjects = df['subject'].tolist()
     marks = df['marks'].astype(int).tolist()
     return subjects, marks
 
+@traced()
+def search_people_csv(college_name, query, kind="Students"):
+    if kind == "Students":
+        df = search_index.search_table(STUDENTS_CSV, students_df, college_name, query)
+        return drop_wallet_keys(df)[['name', 'rollNo', 'department', 'year', 'section', 'email', 'wallet']]
+    df = search_index.search_table(FACULTY_CSV, faculty_df, college_name, query)
+    return drop_wallet_keys(df)[['name', 'role', 'deptName', 'wallet']]
+
 # --- Streamlit app ---
 def main():
     st.set_page_config(page_title="🎓 College Admin Portal Hybrid", layout="wide")
@@ -179,15 +107,29 @@ def main():
         "🏢 Add Department",
         "👩‍🏫 Add Faculty/Staff",
         "🧑‍🎓 Add Students",
-        "📝 Add/View Grades"
+        "📝 Add/View Grades",
+        "🏅 Grant Points",
+        "🔎 Search People",
+        "📦 Bulk Import",
+        "📮 Transaction Queue"
     ])
 
+    queue_txs = use_web3 and st.sidebar.checkbox("Send transactions in the background", value=True)
+    if queue_txs:
+        queue = tx_queue.stats()
+        if queue['depth']:
+            tx_queue.ensure_sender(NODE_URL)   # left waiting by an earlier run; otherwise the first enqueue starts it
+        st.sidebar.caption(f"Tx queue: {queue['depth']} waiting, {queue['drainPerMin']} tx/min drained"
+                           + (f", {queue['failed']} failed" if queue['failed'] else ""))
+
     if menu == "🏠 Home":
         st.markdown("""
         ## Features:
         - Register colleges, departments, faculty, and students on-chain.
         - Pay ETH salary to faculty at registration.
         - Add and view marks (grades) for students.
+        - Grant reward points to students (on-chain or the local points ledger).
+        - Search students and faculty by name, roll number, email, role or wallet prefix.
         - CSV fallback for offline/local testing.
         """)
 
@@ -204,25 +146,18 @@ def main():
         if st.button("Add Department"):
             if use_web3:
                 try:
-                    w3, contract = connect_blockchain()
+                    w3, contract = connect_blockchain(queue_txs)
                     if w3 is None:
                         st.error("Blockchain node connection failed.")
                         return
                     priv = admin_priv.strip()
                     if not priv.startswith("0x"):
                         priv = "0x" + priv
-                    admin = w3.eth.account.from_key(priv)
-                    dept_admin_addr = Web3.to_checksum_address(dept_admin)
-                    nonce = w3.eth.get_transaction_count(admin.address)
-                    tx = contract.functions.addDepartment(college_name, dept_name, dept_admin_addr).build_transaction({
-                        "from": admin.address,
-                        "nonce": nonce,
-                        "gas": 350000,
-                        "gasPrice": w3.to_wei("2", "gwei"),
-                    })
-                    signed = w3.eth.account.sign_transaction(tx, priv)
-                    tx_hash = w3.eth.send_raw_transaction(signed.rawTransaction)
-                    st.success(f"Department added! Tx Hash: {w3.to_hex(tx_hash)}")
+                    dept_admin_addr = require_address(dept_admin)
+                    tx_hash = send_tx(w3, priv, contract.functions.addDepartment(
+                        college_name, dept_name, dept_admin_addr
+                    ), 350000, queue_txs)
+                    tx_done("Department added!", tx_hash, queue_txs)
                 except Exception as e:
                     st.error(f"Error: {e}")
             else:
@@ -231,13 +166,12 @@ def main():
                 if ((departments_df['collegeName']==college_name) & (departments_df['deptName']==dept_name)).any():
                     st.warning("Department already exists in CSV database.")
                 else:
-                    new_row = pd.DataFrame([{
+                    departments_df = append_rows(departments_df, [{
                         'collegeName': college_name,
                         'deptName': dept_name,
                         'deptAdmin': dept_admin
-                    }])
-                    departments_df = pd.concat([departments_df, new_row], ignore_index=True)
-                    save_csv(departments_df, DEPARTMENTS_CSV)
+                    }], DEPARTMENTS_CSV)
+                    save_table(departments_df, DEPARTMENTS_CSV)
                     st.success("Department added to CSV database.")
 
     elif menu == "👩‍🏫 Add Faculty/Staff":
@@ -252,45 +186,40 @@ def main():
         if st.button("Add Faculty"):
             if use_web3:
                 try:
-                    w3, contract = connect_blockchain()
+                    w3, contract = connect_blockchain(queue_txs)
                     if w3 is None:
                         st.error("Blockchain node connection failed.")
                         return
                     priv = admin_priv.strip()
                     if not priv.startswith("0x"):
                         priv = "0x" + priv
-                    admin = w3.eth.account.from_key(priv)
-                    faculty_addr = Web3.to_checksum_address(faculty_eth)
-                    nonce = w3.eth.get_transaction_count(admin.address)
-                    tx = contract.functions.addFaculty(
-                        college_name, dept_name, faculty_addr, faculty_name, role
-                    ).build_transaction({
-                        "from": admin.address,
-                        "nonce": nonce,
-                        "gas": 300000,
-                        "gasPrice": w3.to_wei("2", "gwei"),
-                    })
-                    signed = w3.eth.account.sign_transaction(tx, priv)
-                    tx_hash = w3.eth.send_raw_transaction(signed.rawTransaction)
-                    st.success(f"Faculty added! Tx Hash: {w3.to_hex(tx_hash)}")
+                    faculty_addr = require_address(faculty_eth)
+                    tx_hash = send_tx(w3, priv, contract.functions.addFaculty(
+                        college_name, dept_name, (faculty_name, role, faculty_addr)
+                    ), 300000, queue_txs)
+                    tx_done("Faculty added!", tx_hash, queue_txs)
                 except Exception as e:
                     st.error(f"Transaction failed: {e}")
             else:
                 # CSV fallback add faculty
                 global faculty_df
-                if ((faculty_df['collegeName']==college_name) & (faculty_df['deptName']==dept_name) & 
-                    (faculty_df['wallet'].str.lower()==faculty_eth.lower())).any():
+                faculty_key = wallet_key(faculty_eth)
+                if faculty_key is None:
+                    st.error("Invalid Faculty ETH Address.")
+                elif ((faculty_df['collegeName']==college_name) & (faculty_df['deptName']==dept_name) &
+                    (faculty_df['walletKey']==faculty_key)).any():
                     st.warning("Faculty already exists in CSV database.")
                 else:
-                    new_row = pd.DataFrame([{
+                    row = {
                         'collegeName': college_name,
                         'deptName': dept_name,
-                        'wallet': faculty_eth,
+                        'wallet': require_address(faculty_eth),
                         'name': faculty_name,
                         'role': role
-                    }])
-                    faculty_df = pd.concat([faculty_df, new_row], ignore_index=True)
-                    save_csv(faculty_df, FACULTY_CSV)
+                    }
+                    # Append only: the people search index extends itself from new rows
+                    faculty_df = append_rows(faculty_df, [row], FACULTY_CSV)
+                    append_csv([row], FACULTY_CSV)
                     st.success("Faculty added to CSV database.")
 
     elif menu == "🧑‍🎓 Add Students":
@@ -308,47 +237,41 @@ def main():
         if st.button("Add Student"):
             if use_web3:
                 try:
-                    w3, contract = connect_blockchain()
+                    w3, contract = connect_blockchain(queue_txs)
                     if w3 is None:
                         st.error("Blockchain node connection failed.")
                         return
                     priv = admin_priv.strip()
                     if not priv.startswith("0x"):
                         priv = "0x" + priv
-                    admin = w3.eth.account.from_key(priv)
-                    student_addr = Web3.to_checksum_address(student_eth)
-                    nonce = w3.eth.get_transaction_count(admin.address)
-                    tx = contract.functions.addStudent(
-                        college_name, dept, student_addr, name, roll, year, section, email
-                    ).build_transaction({
-                        "from": admin.address,
-                        "nonce": nonce,
-                        "gas": 300000,
-                        "gasPrice": w3.to_wei("2", "gwei"),
-                    })
-                    signed = w3.eth.account.sign_transaction(tx, priv)
-                    tx_hash = w3.eth.send_raw_transaction(signed.rawTransaction)
-                    st.success(f"Student added! Tx Hash: {w3.to_hex(tx_hash)}")
+                    student_addr = require_address(student_eth)
+                    tx_hash = send_tx(w3, priv, contract.functions.addStudent(
+                        college_name, student_addr, (name, roll, year, dept, section, email)
+                    ), 300000, queue_txs)
+                    tx_done("Student added!", tx_hash, queue_txs)
                 except Exception as e:
                     st.error(f"Error: {e}")
             else:
                 # CSV fallback add student
                 global students_df
-                if ((students_df['collegeName']==college_name) & (students_df['wallet'].str.lower()==student_eth.lower())).any():
+                student_key = wallet_key(student_eth)
+                if student_key is None:
+                    st.error("Invalid Student ETH Address.")
+                elif ((students_df['collegeName']==college_name) & (students_df['walletKey']==student_key)).any():
                     st.warning("Student already exists in CSV database.")
                 else:
-                    new_row = pd.DataFrame([{
+                    row = {
                         'collegeName': college_name,
                         'department': dept,
-                        'wallet': student_eth,
+                        'wallet': require_address(student_eth),
                         'name': name,
                         'rollNo': roll,
                         'year': year,
                         'section': section,
                         'email': email
-                    }])
-                    students_df = pd.concat([students_df, new_row], ignore_index=True)
-                    save_csv(students_df, STUDENTS_CSV)
+                    }
+                    students_df = append_rows(students_df, [row], STUDENTS_CSV)
+                    append_csv([row], STUDENTS_CSV)
                     st.success("Student added to CSV database.")
 
     elif menu == "📝 Add/View Grades":
@@ -363,7 +286,7 @@ def main():
                     if w3 is None:
                         st.error("Blockchain node connection failed.")
                         return
-                    student_addr = Web3.to_checksum_address(student_eth)
+                    student_addr = require_address(student_eth)
                     action = st.radio("Action", ["Add Marks", "View Marks"])
 
                     if action == "Add Marks":
@@ -375,19 +298,10 @@ def main():
                             priv = admin_priv.strip()
                             if not priv.startswith("0x"):
                                 priv = "0x" + priv
-                            admin = w3.eth.account.from_key(priv)
-                            nonce = w3.eth.get_transaction_count(admin.address)
-                            tx = contract.functions.addMarks(
+                            tx_hash = send_tx(w3, priv, contract.functions.addMarks(
                                 college_name, student_addr, subject, marks
-                            ).build_transaction({
-                                "from": admin.address,
-                                "nonce": nonce,
-                                "gas": 200000,
-                                "gasPrice": w3.to_wei("2", "gwei"),
-                            })
-                            signed = w3.eth.account.sign_transaction(tx, priv)
-                            tx_hash = w3.eth.send_raw_transaction(signed.rawTransaction)
-                            st.success(f"Marks added successfully! Tx Hash: {w3.to_hex(tx_hash)}")
+                            ), 200000, queue_txs)
+                            tx_done("Marks added successfully!", tx_hash, queue_txs)
 
                     elif action == "View Marks":
                         subjects, marks_list = contract.functions.getMarks(college_name, student_addr).call()
@@ -411,6 +325,140 @@ def main():
                 else:
                     st.warning("Adding marks is only supported on blockchain in this app.")
 
+    elif menu == "🏅 Grant Points":
+        st.header("Grant Reward Points")
+        college_name = st.text_input("College Name", key="points_college")
+        student_eth = st.text_input("Student ETH Address", key="points_student")
+        points = st.number_input("Points", min_value=1, value=10, step=1)
+
+        if use_web3:
+            admin_priv = st.text_input("Admin Private Key", type="password", key="points_priv")
+            if st.button("Grant Points"):
+                try:
+                    w3, contract = connect_blockchain(queue_txs)
+                    if w3 is None:
+                        st.error("Blockchain node connection failed.")
+                        return
+                    student_addr = require_address(student_eth)
+                    priv = admin_priv.strip()
+                    if not priv.startswith("0x"):
+                        priv = "0x" + priv
+                    tx_hash = send_tx(w3, priv, contract.functions.addPoints(
+                        college_name, student_addr, int(points)
+                    ), 100000, queue_txs)
+                    tx_done("Points granted!", tx_hash, queue_txs)
+                except Exception as e:
+                    st.error(f"Failed or invalid input: {e}")
+        elif st.button("Grant Points"):
+            if not college_name or not student_eth:
+                st.error("College name and student address are required.")
+            elif get_student_csv(college_name, student_eth) is None:
+                st.error("Student not found in CSV data for this college.")
+            else:
+                entry = points_ledger.credit(college_name, student_eth, int(points), points_ledger.GRANT)
+                st.success(f"Granted {int(points)} points; new balance {entry['balance']}.")
+
+    elif menu == "🔎 Search People":
+        st.header("Search Students & Faculty")
+        st.caption("Searches the local CSV records; every word is matched as a prefix.")
+        college_name = st.text_input("College Name", key="search_college")
+        kind = st.radio("Search in", ["Students", "Faculty"], horizontal=True)
+        query = st.text_input("Name, roll no, email, role or wallet", key="search_query")
+        if college_name and query.strip():
+            found = search_people_csv(college_name, query, kind)
+            if found.empty:
+                st.info("No matches.")
+            else:
+                limited = len(found) >= search_index.MAX_RESULTS
+                st.caption(f"{len(found)} match(es)" + (f" (first {search_index.MAX_RESULTS})" if limited else ""))
+                st.dataframe(found.reset_index(drop=True))
+
+    elif menu == "📦 Bulk Import":
+        st.header("Bulk Import Students / Marks")
+        college_name = st.text_input("College Name", key="bulk_college")
+        kind = st.radio("Records", ["Students", "Marks"])
+        if kind == "Students":
+            st.caption("CSV columns: department, wallet, name, rollNo, year, section, email")
+        else:
+            st.caption("CSV columns: wallet, subject, marks")
+        upload = st.file_uploader("Upload CSV", type="csv")
+        admin_priv = st.text_input("Admin Private Key", type="password", key="bulk_priv")
+
+        if upload is not None and college_name:
+            bulk_df = add_wallet_keys(pd.read_csv(upload))
+            st.write(f"{len(bulk_df)} records")
+            st.dataframe(drop_wallet_keys(bulk_df).head(20))
+
+            if st.button("Import"):
+                if use_web3:
+                    try:
+                        w3, contract = connect_blockchain()
+                        if w3 is None:
+                            st.error("Blockchain node connection failed.")
+                            return
+                        priv = admin_priv.strip()
+                        if not priv.startswith("0x"):
+                            priv = "0x" + priv
+                        if bulk_df['walletKey'].isna().any():
+                            st.error("Upload contains invalid Ethereum addresses.")
+                            return
+                        bulk_df['wallet'] = checksum_addresses(bulk_df['walletKey'])
+                        rows = bulk_df.to_dict('records')
+                        if kind == "Students":
+                            records = [
+                                (r['wallet'],
+                                 (r['name'], str(r['rollNo']), int(r['year']), r['department'], str(r['section']), r['email']))
+                                for r in rows
+                            ]
+                            make_call = lambda chunk: contract.functions.addStudents(
+                                college_name, [c[0] for c in chunk], [c[1] for c in chunk])
+                            per_record_gas = STUDENT_GAS
+                        else:
+                            records = [(r['wallet'], str(r['subject']), int(r['marks'])) for r in rows]
+                            make_call = lambda chunk: contract.functions.addMarksBatch(
+                                college_name, [c[0] for c in chunk], [c[1] for c in chunk], [c[2] for c in chunk])
+                            per_record_gas = MARKS_GAS
+                        results = send_batches(w3, priv, make_call, records, per_record_gas)
+                        st.success(f"Imported {len(records)} records in {len(results)} transaction(s).")
+                        st.dataframe(pd.DataFrame(results))
+                    except Exception as e:
+                        st.error(f"Bulk import failed: {e}")
+                else:
+                    # CSV fallback bulk import
+                    global grades_df
+                    new_rows = bulk_df[bulk_df['walletKey'].notna()].assign(collegeName=college_name)
+                    new_rows['wallet'] = checksum_addresses(new_rows['walletKey'])
+                    skipped = 0
+                    if kind == "Students":
+                        # one student per (college, wallet), as the single add enforces
+                        uploaded = len(new_rows)
+                        existing = students_df.loc[students_df['collegeName'] == college_name, 'walletKey']
+                        new_rows = new_rows.drop_duplicates('walletKey')
+                        new_rows = new_rows[~new_rows['walletKey'].isin(existing)]
+                        skipped = uploaded - len(new_rows)
+                        students_df = append_rows(students_df, drop_wallet_keys(new_rows), STUDENTS_CSV)
+                        append_csv(new_rows, STUDENTS_CSV)
+                    else:
+                        grades_df = append_rows(grades_df, drop_wallet_keys(new_rows), GRADES_CSV)
+                        save_table(grades_df, GRADES_CSV)
+                    st.success(f"Imported {len(new_rows)} records into CSV database.")
+                    if skipped:
+                        st.info(f"Skipped {skipped} student row(s) already in the CSV database or repeated in the upload.")
+
+    elif menu == "📮 Transaction Queue":
+        st.header("Transaction Queue")
+        st.caption("Transactions signed by the admin pages wait here until the background sender "
+                   "gets them mined, in nonce order per account.")
+        queue = tx_queue.stats()
+        col1, col2, col3, col4 = st.columns(4)
+        col1.metric("Waiting", queue['depth'])
+        col2.metric("Drain rate (tx/min)", queue['drainPerMin'])
+        col3.metric("Oldest waiting (s)", queue['oldestSeconds'] if queue['oldestSeconds'] is not None else "-")
+        col4.metric("Failed / dropped / reverted", queue['failed'] + queue['dropped'] + queue['reverted'])
+        st.button("Refresh")
+        st.dataframe(tx_queue.frame(), hide_index=True)
+
 
 if __name__ == "__main__":
-    main()
+    with rerun("college_admin"):
+        main()
@@ -2,103 +2,167 @@
 College Analytics Report Generator (CSV-only)
 =============================================
 - Load and analyze educational data from CSV files.
+- Streaming mode aggregates CSVs chunk by chunk for datasets larger than memory.
+- All-colleges comparison computed in a process pool (parallel.py).
 - Interactive 2D/3D plots including animated charts.
 - AI-generated detailed summary report with Ollama.
+- Serves pre-rendered reports from report_scheduler.py when they match the
+  current data; "Refresh now" rebuilds only if the data changed.
 """
 
 import streamlit as st
 import pandas as pd
-import numpy as np
-import plotly.express as px
-import plotly.graph_objs as go
-import ollama
 import os
+from wallets import drop_wallet_keys
+import streaming
+from schema import load_table
+from datasets import data_version
+from tracing import span
+from analytics import college_report, college_charts, report_prompt
+from parallel import all_college_report
+import report_scheduler
+import leaderboard
 
 # --- CSV data file paths ---
 STUDENTS_CSV = "students.csv"
 FACULTY_CSV = "faculty.csv"
 GRADES_CSV = "grades.csv"
 DEPARTMENTS_CSV = "departments.csv"
+CSV_FILES = [STUDENTS_CSV, FACULTY_CSV, GRADES_CSV, DEPARTMENTS_CSV]
+PREVIEW_ROWS = 1000
+
+
+@st.cache_data(show_spinner=False, max_entries=32)
+def ai_summary(college_name, version, _messages):
+    """Ollama report, reused until the CSVs behind it change (`version` is the data version)."""
+    import ollama
+    with span("ollama.chat", model="llama3"):
+        response = ollama.chat(model="llama3", messages=_messages)
+    return response['message']['content']
+
+
+@st.cache_data(show_spinner="Streaming CSV files...", max_entries=8)
+def streamed_report(college_name, version, chunk_rows):
+    """One bounded-memory pass over the CSVs per (college, file version, chunk size)."""
+    return streaming.college_report(college_name, STUDENTS_CSV, GRADES_CSV, FACULTY_CSV, chunk_rows)
+
+
+@st.cache_data(show_spinner="Comparing all colleges...", max_entries=4)
+def all_colleges(version, _students, _grades, _faculty):
+    """Cross-college comparison, recomputed only when the data version changes."""
+    return all_college_report(_students, _grades, _faculty)
+
+
+def artifact_charts(artifact):
+    """Chart builders that load the pre-rendered figure JSON instead of calling Plotly Express."""
+    import plotly.io as pio
+    return {name: (lambda px, name=name: pio.from_json(report_scheduler.chart_json(artifact, name)))
+            for name in artifact['charts']}
+
+
+def plot(name, build):
+    """Build a Plotly figure with build(px) and render it, timing both steps separately."""
+    import plotly.express as px  # loaded on the first chart, not at page import
+    with span(f"chart.{name}.build"):
+        fig = build(px)
+    with span(f"chart.{name}.render"):
+        st.plotly_chart(fig, use_container_width=True)
+
 
 # Page config
 st.set_page_config(page_title="📊 College Analytics Dashboard", layout="wide")
 
 st.title("📊 College Analytics Report Generator")
 
-# Function to load CSV (creates one with headers if missing)
-def load_csv(csv_file, columns):
-    if not os.path.exists(csv_file):
-        # Create an empty CSV with the correct headers
-        pd.DataFrame(columns=columns).to_csv(csv_file, index=False)
-    return pd.read_csv(csv_file)
-
-# Load all CSV datasets
-students = load_csv(STUDENTS_CSV, ['collegeName','wallet','name','rollNo','department','section','year','email'])
-faculty = load_csv(FACULTY_CSV, ['collegeName','deptName','wallet','name','role'])
-grades = load_csv(GRADES_CSV, ['collegeName','wallet','subject','marks','year'])
-departments = load_csv(DEPARTMENTS_CSV, ['collegeName','deptName','deptAdmin'])
-
 # Sidebar: Dataset selector
 st.sidebar.header("Dataset & Report Options")
 college_name = st.sidebar.text_input("Select College Name for Report", "")
+stream = st.sidebar.checkbox("Streaming mode (datasets larger than memory)", value=streaming.auto(CSV_FILES))
+
+# Pre-rendered report for this college, if one was built from the current data
+artifact = None
+if college_name:
+    if st.sidebar.button("🔄 Refresh now"):
+        with st.spinner("Rebuilding report..."):
+            artifact, rebuilt = report_scheduler.ensure(college_name)
+        if not rebuilt:
+            st.sidebar.success("Report is already up to date.")
+    artifact = report_scheduler.latest(college_name)
+    if artifact is not None and artifact['fingerprint'] != report_scheduler.current_fingerprint():
+        artifact = None
+    if artifact is not None:
+        st.sidebar.caption(f"Pre-rendered report built {artifact['built_at']} "
+                           f"(data {artifact['fingerprint'][:12]})")
+
+if stream:
+    chunk_rows = int(st.sidebar.number_input("Rows per chunk", min_value=1000, value=streaming.CHUNK_ROWS, step=10000))
+    version = hash(tuple((os.path.getmtime(p), os.path.getsize(p)) for p in CSV_FILES if os.path.exists(p)))
+    report = streamed_report(college_name, version, chunk_rows) if college_name and artifact is None else None
+else:
+    # Load all CSV datasets (compact typed tables; creates missing files with headers)
+    students = load_table(STUDENTS_CSV)
+    faculty = load_table(FACULTY_CSV)
+    grades = load_table(GRADES_CSV)
+    departments = load_table(DEPARTMENTS_CSV)
+    version = data_version(CSV_FILES)
+    report = college_report(students, grades, faculty, college_name) if college_name and artifact is None else None
+
+if artifact is not None:
+    charts, sampled, years = artifact_charts(artifact), artifact['sampled'], artifact['years']
+elif report is not None:
+    charts, sampled, years = college_charts(report, college_name), report['sampled'], report['years']
+has_report = artifact is not None or report is not None
 
 # Main UI Tabs
-tab_preview, tab_analytics, tab_animation, tab_ai = st.tabs([
+tab_preview, tab_analytics, tab_animation, tab_ai, tab_colleges, tab_leaders = st.tabs([
     "🗃 Data Preview",
     "📈 2D & 3D Analytics",
     "🎞 Animated Trends",
-    "🤖 AI Summary"
+    "🤖 AI Summary",
+    "🏫 All Colleges",
+    "🏆 Leaderboard"
 ])
 
 # Tab 1: Preview raw data so end users can validate dataset correctness
 with tab_preview:
     st.header("🗃 Data Preview")
-    st.markdown("Preview first rows of datasets. Upload/replace CSV files externally to refresh data.")
+    st.markdown("Preview first rows of datasets. Replace or append to the CSV files externally; "
+                "changes are picked up on the next rerun (appended rows are parsed on their own).")
 
-    with st.expander("Students Dataset", expanded=True):
-        st.dataframe(students)
-
-    with st.expander("Faculty Dataset"):
-        st.dataframe(faculty)
-
-    with st.expander("Department Dataset"):
-        st.dataframe(departments)
+    if stream:
+        st.caption(f"Streaming mode: first {PREVIEW_ROWS} rows of each file.")
+        tables = {name: streaming.head(path, PREVIEW_ROWS) for name, path in
+                  [("Students", STUDENTS_CSV), ("Faculty", FACULTY_CSV),
+                   ("Department", DEPARTMENTS_CSV), ("Grades", GRADES_CSV)]}
+    else:
+        st.caption(f"Data version {version}")
+        tables = {"Students": students, "Faculty": faculty, "Department": departments, "Grades": grades}
 
-    with st.expander("Grades Dataset"):
-        st.dataframe(grades)
+    for i, (name, table) in enumerate(tables.items()):
+        with st.expander(f"{name} Dataset", expanded=i == 0):
+            st.dataframe(drop_wallet_keys(table) if table is not None else None)
 
 # Tab 2: Interactive 2D and 3D charts to explore distributions and relationships
 with tab_analytics:
     st.header("📈 Interactive Analytics")
 
     if college_name:
-        filtered_students = students[students['collegeName'] == college_name]
-        filtered_grades = grades[grades['collegeName'] == college_name]
-
-        if filtered_students.empty or filtered_grades.empty:
+        if not has_report:
             st.warning(f"No data available for college: {college_name}")
         else:
             # Average grade by subject over the college
-            avg_subject = filtered_grades.groupby("subject").marks.mean().sort_values(ascending=False)
             st.subheader("Average Marks by Subject")
-            fig_bar = px.bar(avg_subject, labels={"index": "Subject", "marks": "Average Mark"},
-                             title="Average Marks per Subject")
-            st.plotly_chart(fig_bar, use_container_width=True)
+            plot("subject_bar", charts['subject_bar'])
 
             # Pie chart for student distribution across departments
-            dep_counts = filtered_students['department'].value_counts()
             st.subheader(f"Student Distribution by Department in {college_name}")
-            fig_pie = px.pie(names=dep_counts.index, values=dep_counts.values,
-                             title="Department Breakdown", hole=0.3)
-            st.plotly_chart(fig_pie, use_container_width=True)
+            plot("department_pie", charts['department_pie'])
 
             # 3D scatter plot: Subject vs Year vs Marks
             st.subheader("3D Scatter: Subject - Year - Marks")
-            merged = filtered_grades.merge(filtered_students[['wallet','department']], left_on='wallet', right_on='wallet', how='left')
-            fig_3d = px.scatter_3d(merged, x='subject', y='year', z='marks',
-                                   color='department', symbol='department',
-                                   hover_data=['wallet'], title="3D View of Grades")
-            st.plotly_chart(fig_3d, use_container_width=True)
+            if sampled:
+                st.caption(f"Uniform sample of {streaming.SAMPLE_ROWS} grade rows.")
+            plot("grades_3d", charts['grades_3d'])
     else:
         st.info("Please enter a college name in the sidebar to view analytics.")
 
@@ -107,28 +171,17 @@ with tab_animation:
     st.header("🎞 Animated Analytical Trends")
 
     if college_name:
-        filtered_students = students[students['collegeName'] == college_name]
-        filtered_grades = grades[grades['collegeName'] == college_name]
-
-        if filtered_students.empty or filtered_grades.empty:
+        if not has_report:
             st.warning(f"No data available for college: {college_name}")
         else:
             # Avg marks progression by department over years
-            merged = filtered_grades.merge(filtered_students[['wallet','department']], on='wallet')
-            if merged['year'].nunique() < 2:
+            if years < 2:
                 st.info("Insufficient year diversity for animation.")
             else:
-                progression = merged.groupby(['year', 'department']).marks.mean().reset_index()
-                fig_line = px.line(progression, x="year", y="marks", color="department",
-                                   markers=True, animation_frame='department',
-                                   title="Average Marks Progression Over Years by Department")
-                st.plotly_chart(fig_line, use_container_width=True)
+                plot("year_progression", charts['year_progression'])
 
                 # Animated 3D scatter by year and department
-                fig_ani_3d = px.scatter_3d(merged, x='subject', y='year', z='marks', color='department',
-                                          symbol='department', animation_frame='department',
-                                          title="Animated 3D Scatter of Subject-Year-Marks")
-                st.plotly_chart(fig_ani_3d, use_container_width=True)
+                plot("grades_3d_animated", charts['grades_3d_animated'])
     else:
         st.info("Please enter a college name in the sidebar to view animated trends.")
 
@@ -137,41 +190,76 @@ with tab_ai:
     st.header("🤖 AI Generated Analytical Summary")
 
     if college_name:
-        # Compute stats for prompt
-        filtered_students = students[students['collegeName'] == college_name]
-        filtered_grades = grades[grades['collegeName'] == college_name]
-
-        if filtered_students.empty or filtered_grades.empty:
+        if not has_report:
             st.warning(f"No data available for college: {college_name}")
         else:
-            stats = {
-                "total_students": len(filtered_students),
-                "total_faculty": len(faculty[faculty['collegeName'] == college_name]),
-                "departments": filtered_students['department'].nunique(),
-                "subjects": filtered_grades['subject'].nunique(),
-                "average_mark": round(filtered_grades['marks'].mean(), 2),
-                "median_mark": round(filtered_grades['marks'].median(), 2),
-                "max_mark": int(filtered_grades['marks'].max()),
-                "min_mark": int(filtered_grades['marks'].min())
-            }
-            stats_md = "\n".join([f"- **{k.replace('_', ' ').capitalize()}:** {v}" for k, v in stats.items()])
-
-            prompt = (f"Generate a detailed analytical report for the following college: {college_name}.\n"
-                      f"Statistics:\n{stats_md}\n\n"
-                      f"Subject-wise average grades:\n{filtered_grades.groupby('subject')['marks'].mean().round(2).to_string()}\n\n"
-                      f"Department sizes:\n{filtered_students['department'].value_counts().to_string()}\n\n"
-                      f"Identify patterns, strengths, weaknesses, and advice for administration and faculty.")
-
-            ollama_prompt = [
-                {"role": "system", "content": "You are a university data analyst AI assistant."},
-                {"role": "user", "content": prompt}
-            ]
+            # Pre-rendered narrative when the scheduler produced one, otherwise ask Ollama now
+            summary = report_scheduler.summary_text(artifact) if artifact is not None else None
+            ollama_prompt = artifact['messages'] if artifact is not None else report_prompt(college_name, report)
 
             try:
-                response = ollama.chat(model="llama3", messages=ollama_prompt)
-                report = response['message']['content']
-                st.text_area("AI Report", report, height=600)
+                if summary is None:
+                    summary = ai_summary(college_name, version, ollama_prompt)
+                st.text_area("AI Report", summary, height=600)
             except Exception as e:
                 st.error(f"Failed to get AI summary: {e}")
     else:
         st.info("Please enter a college name in the sidebar to generate the AI summary.")
+
+# Tab 5: Board view — every college side by side
+with tab_colleges:
+    st.header("🏫 All Colleges Comparison")
+
+    if stream:
+        st.info("The all-colleges comparison needs the tables in memory; turn off streaming mode to build it.")
+    elif st.button("Build comparison") or st.session_state.get("all_colleges_built"):
+        st.session_state["all_colleges_built"] = True
+        comparison = all_colleges(version, students, grades, faculty)
+        if comparison['summary'].empty:
+            st.warning("No colleges found in the datasets.")
+        else:
+            st.subheader("Summary by College")
+            st.dataframe(comparison['summary'])
+
+            subject_table = comparison['subject_averages']
+            st.subheader("Average Marks by Subject and College")
+            plot("colleges_subject_heatmap", lambda px: px.imshow(subject_table, aspect="auto",
+                                                                  labels={"color": "Average Mark"},
+                                                                  color_continuous_scale="Viridis"))
+
+            dept_table = comparison['department_counts'].reset_index().melt(
+                id_vars='college', var_name='department', value_name='students')
+            st.subheader("Department Distribution by College")
+            plot("colleges_departments", lambda px: px.bar(dept_table[dept_table['students'] > 0], x='college',
+                                                           y='students', color='department'))
+
+            # Grade-weighted mean over departments: one progression line per college
+            yearly = comparison['year_progression'].assign(
+                total=lambda d: d['marks'] * d['grades']).groupby(['college', 'year'], as_index=False)[['total', 'grades']].sum()
+            yearly['marks'] = yearly['total'] / yearly['grades']
+            st.subheader("Average Marks Progression Over Years by College")
+            plot("colleges_year_progression", lambda px: px.line(yearly, x='year', y='marks', color='college',
+                                                                 markers=True))
+    else:
+        st.info("Compare subject averages, departments, year progression and summary stats across every college.")
+
+# Tab 6: Top students of the college (or one department) by marks and reward points
+with tab_leaders:
+    st.header("🏆 Leaderboard")
+
+    if not college_name:
+        st.info("Please enter a college name in the sidebar to view the leaderboard.")
+    elif stream:
+        st.info("The leaderboard needs the tables in memory; turn off streaming mode to view it.")
+    else:
+        leaderboard.refresh(students, grades)
+        scope = st.selectbox("Department", ["All departments"] + leaderboard.departments(college_name))
+        department = None if scope == "All departments" else scope
+        k = st.slider("Students shown", min_value=5, max_value=100, value=10, step=5)
+        col_marks, col_points = st.columns(2)
+        with col_marks:
+            st.subheader("Average Marks")
+            st.dataframe(leaderboard.top_frame(leaderboard.MARKS, college_name, k, department), hide_index=True)
+        with col_points:
+            st.subheader("Reward Points")
+            st.dataframe(leaderboard.top_frame(leaderboard.POINTS, college_name, k, department), hide_index=True)
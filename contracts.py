@@ -0,0 +1,221 @@
+"""
+Contract Registry
+=================
+- One ABI per contract, loaded once from the compiled Hardhat artifact
+  (artifacts/remix/<file>.sol/<Name>.json), a Remix artifact
+  (remix/artifacts/<Name>.json) or the checked-in snapshot abi/<Name>.json.
+- Function selectors and output decoders are built once per contract; web3
+  clients and contract objects are shared by every portal in the process.
+- `check` parses each portal and verifies every `contract.functions.X(...)`
+  call against the ABI, so drifted calls fail before they reach a node.
+
+    python contracts.py check     # exit 1 on any call that does not match the ABI
+    python contracts.py export    # refresh abi/*.json after `npx hardhat compile`
+"""
+
+import ast
+import functools
+import json
+import os
+import sys
+import threading
+
+from eth_hash.auto import keccak
+
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+ARTIFACTS_DIR = os.path.join(REPO_DIR, 'artifacts')
+SNAPSHOT_DIR = os.path.join(REPO_DIR, 'abi')
+
+# contract name -> Solidity source and the portals that call it
+CONTRACTS = {
+    'CollegeAdmin': {'source': 'remix/stu.sol', 'portals': ['stu.py', 'college_admin.py']},
+    'HealthPortal': {'source': 'remix/HealthPoints.sol', 'portals': ['hospital_admin.py', 'payroll.py', 'merkle.py']},
+}
+
+_lock = threading.Lock()
+_clients = {}     # node url -> Web3
+_contracts = {}   # (node url, contract name, address) -> web3 contract
+
+
+def artifact_candidates(name):
+    """Where an ABI for `name` may live, most authoritative first."""
+    source = CONTRACTS[name]['source']
+    return [
+        os.path.join(ARTIFACTS_DIR, source, name + '.json'),           # npx hardhat compile
+        os.path.join(REPO_DIR, 'remix', 'artifacts', name + '.json'),  # Remix workspace
+        os.path.join(SNAPSHOT_DIR, name + '.json'),                    # checked-in snapshot
+    ]
+
+
+@functools.lru_cache(maxsize=None)
+def load_abi(name):
+    """(abi, path) of the first artifact found for contract `name`."""
+    for path in artifact_candidates(name):
+        if os.path.exists(path):
+            with open(path, encoding='utf-8') as f:
+                return tuple(json.load(f)['abi']), path
+    raise FileNotFoundError(f"No ABI for {name}; run `npx hardhat compile` or restore abi/{name}.json")
+
+
+def abi(name):
+    return list(load_abi(name)[0])
+
+
+# === SELECTORS & DECODERS ===
+def canonical_type(param):
+    """ABI type with tuples expanded, e.g. '(string,string,address)[]'."""
+    kind = param['type']
+    if kind.startswith('tuple'):
+        return '(' + ','.join(canonical_type(c) for c in param['components']) + ')' + kind[len('tuple'):]
+    return kind
+
+
+def signature(entry):
+    return f"{entry['name']}({','.join(canonical_type(p) for p in entry['inputs'])})"
+
+
+@functools.lru_cache(maxsize=None)
+def functions(name):
+    """Function name -> signature, 4-byte selector, input/output types and a result decoder."""
+    table = {}
+    for entry in load_abi(name)[0]:
+        if entry.get('type') != 'function':
+            continue
+        outputs = [canonical_type(p) for p in entry['outputs']]
+        sig = signature(entry)
+        table[entry['name']] = {
+            'signature': sig,
+            'selector': '0x' + keccak(sig.encode()).hex()[:8],
+            'inputs': entry['inputs'],
+            'outputs': outputs,
+            'mutability': entry['stateMutability'],
+            'decode': functools.partial(_decode, outputs),
+        }
+    return table
+
+
+def _decode(types, data):
+    from eth_abi import decode
+    values = decode(types, bytes(data))
+    return values[0] if len(values) == 1 else values
+
+
+def selector(name, fn):
+    return functions(name)[fn]['selector']
+
+
+def decode_result(name, fn, data):
+    """Decode raw eth_call return data of `fn` on contract `name`."""
+    return functions(name)[fn]['decode'](data)
+
+
+# === SHARED CLIENTS ===
+def web3_client(node_url):
+    """One Web3 HTTP client per node URL for the whole process."""
+    with _lock:
+        w3 = _clients.get(node_url)
+        if w3 is None:
+            from web3 import Web3  # loaded only when a page actually connects
+            w3 = _clients[node_url] = Web3(Web3.HTTPProvider(node_url))
+        return w3
+
+
+def get_contract(w3, name, address):
+    """Shared contract object for `name` at `address` on the node `w3` talks to."""
+    key = (getattr(w3.provider, 'endpoint_uri', id(w3)), name, address)
+    with _lock:
+        contract = _contracts.get(key)
+        if contract is None:
+            contract = _contracts[key] = w3.eth.contract(address=address, abi=abi(name))
+        return contract
+
+
+def connect(node_url, name, address, offline=False):
+    """(w3, contract), or (None, None) when the node is unreachable.
+
+    With `offline` the node is not checked: the pair can still sign
+    transactions for tx_queue.py to send later, but calls fail until it is up.
+    """
+    w3 = web3_client(node_url)
+    if not offline and not w3.is_connected():
+        return None, None
+    return w3, get_contract(w3, name, address)
+
+
+# === CALL CHECK ===
+def portal_calls(path):
+    """(line, function, positional args) of every `<x>.functions.<fn>(...)` call in a portal."""
+    with open(path, encoding='utf-8') as f:
+        tree = ast.parse(f.read(), filename=path)
+    for node in ast.walk(tree):
+        if (isinstance(node, ast.Call) and isinstance(node.func, ast.Attribute)
+                and isinstance(node.func.value, ast.Attribute) and node.func.value.attr == 'functions'):
+            yield node.lineno, node.func.attr, node.args
+
+
+def check_call(table, fn, args):
+    """Problems with one call: unknown function, wrong arity, or a tuple literal of the wrong width."""
+    entry = table.get(fn)
+    if entry is None:
+        return [f"{fn} is not in the ABI"]
+    if any(isinstance(a, ast.Starred) for a in args):
+        return []
+    params = entry['inputs']
+    if len(args) != len(params):
+        return [f"{entry['signature']} takes {len(params)} argument(s), called with {len(args)}"]
+    problems = []
+    for arg, param in zip(args, params):
+        if param['type'] == 'tuple' and isinstance(arg, (ast.Tuple, ast.List)) and len(arg.elts) != len(param['components']):
+            problems.append(f"{entry['signature']}: '{param['name']}' needs {len(param['components'])} fields, got {len(arg.elts)}")
+        elif param['type'] != 'tuple' and isinstance(arg, ast.Tuple):
+            problems.append(f"{entry['signature']}: '{param['name']}' is {param['type']}, got a tuple")
+    return problems
+
+
+def check():
+    failures = 0
+    for name, spec in CONTRACTS.items():
+        table = functions(name)
+        print(f"{name}: {load_abi(name)[1]}")
+        for portal in spec['portals']:
+            calls = list(portal_calls(os.path.join(REPO_DIR, portal)))
+            for line, fn, args in calls:
+                for problem in check_call(table, fn, args):
+                    failures += 1
+                    print(f"  {portal}:{line}: {problem}")
+            print(f"  {portal}: {len(calls)} call(s) checked")
+    print(f"{failures} mismatch(es)")
+    return failures
+
+
+def export():
+    """Copy the ABIs of freshly compiled artifacts over the abi/ snapshots."""
+    os.makedirs(SNAPSHOT_DIR, exist_ok=True)
+    for name, spec in CONTRACTS.items():
+        path = artifact_candidates(name)[0]
+        if not os.path.exists(path):
+            print(f"{name}: {path} not found, snapshot kept")
+            continue
+        with open(path, encoding='utf-8') as f:
+            artifact = json.load(f)
+        with open(os.path.join(SNAPSHOT_DIR, name + '.json'), 'w', encoding='utf-8') as f:
+            json.dump({'contractName': name, 'sourceName': spec['source'], 'abi': artifact['abi']}, f, indent=2)
+            f.write("\n")
+        print(f"{name}: snapshot updated from {path}")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Contract ABI registry")
+    parser.add_argument("command", choices=["check", "export", "selectors"])
+    args = parser.parse_args()
+
+    if args.command == "check":
+        sys.exit(1 if check() else 0)
+    elif args.command == "export":
+        export()
+    else:
+        for name in CONTRACTS:
+            for fn, entry in sorted(functions(name).items()):
+                print(f"{name:<14} {entry['selector']}  {entry['signature']}")
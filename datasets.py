@@ -0,0 +1,192 @@
+"""
+Dataset Versions
+================
+- Watches each CSV by (mtime, size) and a blake2b digest of the bytes already
+  parsed, so an unchanged file is never parsed twice in one process.
+- Append-only growth (same prefix, more lines) parses just the new tail and
+  extends the cached table; any other change re-parses the whole file.
+- Every parse bumps a process-wide data version; caches downstream key on
+  `data_version(paths)` instead of re-hashing tables. `epoch(path)` only
+  moves on a full parse, so consumers can fold just the appended rows.
+- A load hands out the cached table itself, not a copy: callers must not
+  mutate it in place (copy first, or build a new frame as append_rows does).
+"""
+
+import hashlib
+import io
+import os
+import threading
+import time
+
+from tracing import span
+
+BLOCK = 1 << 20             # bytes per read while hashing
+RACY_NS = 2_000_000_000     # files modified this close to our last check are always re-hashed
+
+_lock = threading.Lock()
+_path_locks = {}
+_entries = {}               # abs path -> cached state, see _remember()
+_digests = {}               # (abs path, mtime_ns, size) -> digest of files hashed without loading
+_version = 0
+STATS = {'hit': 0, 'touch': 0, 'tail': 0, 'full': 0}
+
+
+def _digest():
+    return hashlib.blake2b(digest_size=16)
+
+
+def _path_lock(path):
+    with _lock:
+        return _path_locks.setdefault(path, threading.Lock())
+
+
+def _bump():
+    global _version
+    with _lock:
+        _version += 1
+        return _version
+
+
+def _count(kind):
+    with _lock:
+        STATS[kind] += 1
+
+
+def _remember(path, stat, data_len, digest, header, ends_with_newline, df, version, epoch):
+    _entries[path] = {
+        'mtime_ns': stat.st_mtime_ns, 'size': stat.st_size, 'checked_ns': time.time_ns(),
+        'parsed': data_len, 'digest': digest, 'header': header,
+        'ends_with_newline': ends_with_newline, 'df': df, 'version': version, 'epoch': epoch,
+    }
+
+
+def _unchanged(entry, stat):
+    """Same mtime and size, and the file was not written in the same instant we last looked."""
+    return ((stat.st_mtime_ns, stat.st_size) == (entry['mtime_ns'], entry['size'])
+            and entry['checked_ns'] - stat.st_mtime_ns > RACY_NS)
+
+
+def _scan(f, split):
+    """Digest of the first `split` bytes (running hasher) and everything after them."""
+    hasher = _digest()
+    left = split
+    while left:
+        block = f.read(min(BLOCK, left))
+        if not block:
+            break
+        hasher.update(block)
+        left -= len(block)
+    return hasher, f.read()
+
+
+def _full(path, stat, parse):
+    with open(path, 'rb') as f:
+        data = f.read()
+    with span("csv.parse", table=os.path.basename(path), bytes=len(data)):
+        df = parse(io.BytesIO(data))
+    hasher = _digest()
+    hasher.update(data)
+    header = data.split(b"\n", 1)[0] + b"\n"
+    version = _bump()
+    _remember(path, stat, len(data), hasher.hexdigest(), header, data.endswith(b"\n"), df, version, version)
+    _count('full')
+    return df
+
+
+def load(file_path, parse, extend):
+    """Table for `file_path`: cached, extended by its appended tail, or fully parsed.
+
+    parse(buffer) turns CSV bytes (with header) into a table; extend(df, tail_df)
+    appends freshly parsed rows to the cached table and must return a new one.
+    The returned table is shared with every other caller: do not mutate it.
+    """
+    path = os.path.abspath(file_path)
+    with _path_lock(path):
+        stat = os.stat(path)
+        entry = _entries.get(path)
+        if entry is not None and _unchanged(entry, stat):
+            _count('hit')
+            return entry['df']
+        if entry is None or stat.st_size < entry['parsed'] or not entry['ends_with_newline']:
+            return _full(path, stat, parse)
+
+        with open(path, 'rb') as f:
+            hasher, tail = _scan(f, entry['parsed'])
+        if hasher.hexdigest() != entry['digest']:
+            return _full(path, stat, parse)
+
+        complete = tail[:tail.rfind(b"\n") + 1]   # a half-written last line waits for the next check
+        if complete.strip():
+            with span("csv.tail", table=os.path.basename(path), bytes=len(complete)):
+                df = extend(entry['df'], parse(io.BytesIO(entry['header'] + complete)))
+            version = _bump()
+            _count('tail')
+        else:
+            df, version = entry['df'], entry['version']
+            _count('touch')
+        hasher.update(complete)
+        _remember(path, stat, entry['parsed'] + len(complete), hasher.hexdigest(), entry['header'],
+                  True, df, version, entry['epoch'])
+        return df
+
+
+# === VERSIONS ===
+def version(file_path):
+    """Data version of one file (0 until it has been loaded)."""
+    entry = _entries.get(os.path.abspath(file_path))
+    return entry['version'] if entry else 0
+
+
+def epoch(file_path):
+    """Version of the file's last full parse: while it is unchanged, newer versions only appended rows."""
+    entry = _entries.get(os.path.abspath(file_path))
+    return entry['epoch'] if entry else 0
+
+
+def data_version(paths=None):
+    """Version that changes whenever any of `paths` (default: every loaded file) changes."""
+    if paths is None:
+        return _version
+    return max((version(p) for p in paths), default=0)
+
+
+def fingerprint(file_path):
+    """blake2b hex digest of the file's bytes (stable across processes).
+
+    Reuses the load cache when it covers the whole current file; otherwise the
+    file is hashed once per (mtime, size), without parsing it.
+    """
+    path = os.path.abspath(file_path)
+    if not os.path.exists(path):
+        return None
+    stat = os.stat(path)
+    entry = _entries.get(path)
+    if entry is not None and (entry['mtime_ns'], entry['size'], entry['parsed']) == (stat.st_mtime_ns, stat.st_size, stat.st_size):
+        return entry['digest']
+    key = (path, stat.st_mtime_ns, stat.st_size)
+    digest = _digests.get(key)
+    if digest is None:
+        with open(path, 'rb') as f:
+            digest = _scan(f, stat.st_size)[0].hexdigest()
+        with _lock:
+            for old in [k for k in _digests if k[0] == path]:
+                del _digests[old]
+            _digests[key] = digest
+    return digest
+
+
+def data_fingerprint(paths):
+    """One digest over several files' contents, e.g. the key of pre-rendered reports."""
+    hasher = _digest()
+    for path in paths:
+        hasher.update(f"{os.path.basename(path)}:{fingerprint(path)}\n".encode())
+    return hasher.hexdigest()
+
+
+def invalidate(file_path=None):
+    """Forget one file (or all) so the next load parses it from scratch."""
+    with _lock:
+        if file_path is None:
+            _entries.clear()
+        else:
+            _entries.pop(os.path.abspath(file_path), None)
@@ -0,0 +1,106 @@
+"""
+Grade Cohort Statistics
+=======================
+- One 101-bin histogram of marks (0-100) per (college, subject), with its
+  cumulative counts, so a mark's percentile, class rank and the cohort mean
+  are a couple of array lookups instead of a filter over every grade row.
+- Histograms follow grades.csv incrementally: appended rows (datasets.epoch()
+  unchanged) are added to the bins they fall in; only a rewritten file
+  rebuilds them, in one vectorized pass.
+- Cohorts are built from grades.csv only. Marks written on chain (addMarks /
+  addMarksBatch) emit no event to fold in, so the student portal shows
+  percentile and rank in CSV mode only.
+"""
+
+import threading
+
+import numpy as np
+
+import datasets
+from tracing import span, traced
+
+GRADES_CSV = "grades.csv"
+BINS = 101      # marks 0..100 (uint8 on chain; larger values are clipped)
+
+_lock = threading.Lock()
+_index = {
+    'grades': (None, 0),  # (epoch, rows folded) of grades.csv
+    'hist': {},           # (college, subject) -> counts per mark, int64[BINS]
+    'above': {},          # (college, subject) -> rows with a mark greater than each bin
+    'sum': {},            # (college, subject) -> total of all marks
+}
+
+
+def _fold(grades):
+    """Add grade rows to the histograms in one grouped pass; refresh the touched cumulative counts."""
+    grades = grades[grades['marks'].notna()]
+    marks = np.minimum(grades['marks'].to_numpy(dtype=np.int64), BINS - 1)
+    counts = (grades.assign(marks=marks)
+              .groupby([grades['collegeName'].astype(object), grades['subject'].astype(object), 'marks'],
+                       observed=True).size())
+    touched = set()
+    for (college_name, subject, mark), n in counts.items():
+        hist = _index['hist'].get((college_name, subject))
+        if hist is None:
+            hist = _index['hist'][(college_name, subject)] = np.zeros(BINS, dtype=np.int64)
+            _index['sum'][(college_name, subject)] = 0
+        hist[mark] += n
+        _index['sum'][(college_name, subject)] += int(mark) * int(n)
+        touched.add((college_name, subject))
+    for group in touched:
+        hist = _index['hist'][group]
+        _index['above'][group] = hist.sum() - np.cumsum(hist)
+
+
+@traced()
+def refresh(grades):
+    """Bring the histograms up to date with the loaded grades table."""
+    grades_epoch, grades_rows = datasets.epoch(GRADES_CSV), len(grades)
+    folded_epoch, folded_rows = _index['grades']
+    with _lock:
+        if grades_epoch != folded_epoch or grades_rows < folded_rows:
+            with span("grade_stats.rebuild", grades=grades_rows):
+                for part in ('hist', 'above', 'sum'):
+                    _index[part].clear()
+                _fold(grades)
+        elif grades_rows > folded_rows:
+            with span("grade_stats.fold", grades=grades_rows - folded_rows):
+                _fold(grades.iloc[folded_rows:])
+        _index['grades'] = (grades_epoch, grades_rows)
+
+
+def standing(college_name, subject, mark):
+    """Where `mark` stands in its (college, subject) cohort, or None if there is no cohort.
+
+    percentile: share of the cohort below the mark, counting ties as half;
+    rank: 1 + number of strictly higher marks.
+    """
+    with _lock:
+        hist = _index['hist'].get((college_name, subject))
+        if hist is None:
+            return None
+        mark = min(int(mark), BINS - 1)
+        total = int(_index['above'][(college_name, subject)][0] + hist[0])
+        above = int(_index['above'][(college_name, subject)][mark])
+        below = total - above - int(hist[mark])
+        return {
+            'percentile': round(100 * (below + int(hist[mark]) / 2) / total, 1),
+            'rank': above + 1,
+            'cohort': total,
+            'mean': round(_index['sum'][(college_name, subject)] / total, 2),
+        }
+
+
+def profile_table(college_name, subjects, marks):
+    """The profile's grade table with percentile, class rank and cohort mean per subject."""
+    import pandas as pd
+    rows = []
+    for subject, mark in zip(subjects, marks):
+        stats = standing(college_name, subject, mark)
+        rows.append({
+            "Subject": subject, "Marks": mark,
+            "Percentile": stats['percentile'] if stats else None,
+            "Class Rank": f"{stats['rank']} / {stats['cohort']}" if stats else None,
+            "Cohort Mean": stats['mean'] if stats else None,
+        })
+    return pd.DataFrame(rows)
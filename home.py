@@ -1,5 +1,10 @@
 import streamlit as st
 import os
+import pandas as pd
+import tracing
+import profiler
+from contextlib import nullcontext
+from schema import TABLES
 
 # --- Page Configuration ---
 st.set_page_config(page_title="College Portal", layout="wide")
@@ -20,21 +25,58 @@ selected_page = st.sidebar.radio("Go to", [
 def run_script(script_name):
     with open(script_name, "r", encoding="utf-8") as file:
         code = file.read()
-    exec(code, globals())
+    exec(compile(code, script_name, "exec"), globals())
+
+# --- Hidden timing panel (open with ?panel=trace) ---
+def format_attrs(attrs):
+    return ", ".join(f"{k}={v}" for k, v in attrs.items())
+
+
+def show_trace_panel():
+    st.markdown("---")
+    st.subheader("⏱ Timing Panel")
+    last = tracing.last_rerun()
+    if last:
+        st.caption(f"Last rerun: {last['page']} in {last['duration'] * 1000:.1f} ms")
+        spans = sorted(last["spans"], key=lambda s: s["start"])
+        st.dataframe(pd.DataFrame([{"span": "  " * s["depth"] + s["name"], "ms": s["duration"] * 1000,
+                                    "attrs": format_attrs(s["attrs"])} for s in spans]))
+    st.markdown("**Slowest spans (recent reruns)**")
+    slowest = tracing.slowest_spans(20)
+    if slowest:
+        st.dataframe(pd.DataFrame([{"page": s["page"], "span": s["name"], "ms": s["duration"] * 1000,
+                                    "attrs": format_attrs(s["attrs"])} for s in slowest]))
+    st.markdown("**Per-span summary**")
+    summary = tracing.span_summary()
+    if summary:
+        st.dataframe(pd.DataFrame(summary))
+    st.download_button("Download reruns (JSONL)", tracing.jsonl_dump(), file_name="portal_trace.jsonl")
+    st.download_button("Download Prometheus metrics", tracing.prometheus_text(), file_name="portal_metrics.prom")
+
 
 # --- Main Content ---
-if selected_page == "🏠 Home":
-    st.subheader("Welcome!")
-    st.write("Use the sidebar to navigate to different modules of the system.")
+profiling = profiler.enabled(st.query_params)
+page_profile = profiler.profile(selected_page, profiler.data_size_label(TABLES)) if profiling else nullcontext()
+
+with page_profile as profile_result, tracing.rerun(selected_page):
+    if selected_page == "🏠 Home":
+        st.subheader("Welcome!")
+        st.write("Use the sidebar to navigate to different modules of the system.")
+
+    elif selected_page == "🏫 College Admin":
+        run_script("college_admin.py")
+
+    elif selected_page == "📊 College Analyst Report":
+        run_script("college_analyst_report.py")
 
-elif selected_page == "🏫 College Admin":
-    run_script("college_admin.py")
+    elif selected_page == "🏥 Hospital Admin":
+        run_script("hospital_admin.py")
 
-elif selected_page == "📊 College Analyst Report":
-    run_script("college_analyst_report.py")
+if profiling and profile_result["path"]:
+    st.sidebar.caption(f"Profile saved: {profile_result['path']} ({profile_result['samples']} samples)")
 
-elif selected_page == "🏥 Hospital Admin":
-    run_script("hospital_admin.py")
+if st.query_params.get("panel") == "trace":
+    show_trace_panel()
 
 # Optional footer
 st.markdown("---")
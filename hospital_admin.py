@@ -1,446 +1,104 @@
 import streamlit as st
-import json
 import pandas as pd
-from web3 import Web3
 from datetime import datetime
 import os
+from tracing import traced, rerun
+from batching import send_batches, raw_transaction, STAFF_GAS, REPORT_GAS
+from wallets import add_wallet_keys, drop_wallet_keys, wallet_key, normalize_address, checksum_addresses
+from schema import load_table, save_table, append_rows, append_csv
+import streaming
+from money import parse_eth, format_eth_column, assign_wei, payroll_totals
+import contracts
+import points_pipeline
+import search_index
+import merkle
+import blob_store
+import tx_queue
 
 # === CONFIG ===
 NODE_URL = "http://127.0.0.1:8545"  # Your Ethereum node (Ganache, Hardhat)
 CONTRACT_ADDRESS = "0xa513E6E4b8f2a923D98304ec87F64353C4D5C853"  # Replace with your deployed contract address
 
-# Paste your contract ABI JSON string copied from Remix or Hardhat (your own full ABI)
-CONTRACT_ABI = json.loads("""
-[
-	{
-		"inputs": [
-			{
-				"internalType": "string",
-				"name": "hospitalName",
-				"type": "string"
-			},
-			{
-				"internalType": "address",
-				"name": "staffEth",
-				"type": "address"
-			},
-			{
-				"internalType": "string",
-				"name": "staffName",
-				"type": "string"
-			},
-			{
-				"internalType": "string",
-				"name": "staffRole",
-				"type": "string"
-			}
-		],
-		"name": "addStaff",
-		"outputs": [],
-		"stateMutability": "nonpayable",
-		"type": "function"
-	},
-	{
-		"anonymous": false,
-		"inputs": [
-			{
-				"indexed": false,
-				"internalType": "string",
-				"name": "hospitalName",
-				"type": "string"
-			},
-			{
-				"indexed": true,
-				"internalType": "address",
-				"name": "staff",
-				"type": "address"
-			},
-			{
-				"indexed": true,
-				"internalType": "address",
-				"name": "student",
-				"type": "address"
-			},
-			{
-				"indexed": false,
-				"internalType": "string",
-				"name": "cid",
-				"type": "string"
-			},
-			{
-				"indexed": false,
-				"internalType": "uint256",
-				"name": "points",
-				"type": "uint256"
-			}
-		],
-		"name": "HealthReportSubmitted",
-		"type": "event"
-	},
-	{
-		"anonymous": false,
-		"inputs": [
-			{
-				"indexed": false,
-				"internalType": "string",
-				"name": "hospitalName",
-				"type": "string"
-			},
-			{
-				"indexed": true,
-				"internalType": "address",
-				"name": "admin",
-				"type": "address"
-			}
-		],
-		"name": "HospitalRegistered",
-		"type": "event"
-	},
-	{
-		"inputs": [
-			{
-				"internalType": "string",
-				"name": "hospitalName",
-				"type": "string"
-			}
-		],
-		"name": "registerHospital",
-		"outputs": [],
-		"stateMutability": "nonpayable",
-		"type": "function"
-	},
-	{
-		"anonymous": false,
-		"inputs": [
-			{
-				"indexed": false,
-				"internalType": "string",
-				"name": "hospitalName",
-				"type": "string"
-			},
-			{
-				"indexed": true,
-				"internalType": "address",
-				"name": "staffAddr",
-				"type": "address"
-			},
-			{
-				"indexed": false,
-				"internalType": "uint256",
-				"name": "newSalary",
-				"type": "uint256"
-			}
-		],
-		"name": "SalaryUpdated",
-		"type": "event"
-	},
-	{
-		"inputs": [
-			{
-				"internalType": "string",
-				"name": "hospitalName",
-				"type": "string"
-			},
-			{
-				"internalType": "address",
-				"name": "staffEth",
-				"type": "address"
-			},
-			{
-				"internalType": "uint256",
-				"name": "salaryInWei",
-				"type": "uint256"
-			}
-		],
-		"name": "setSalary",
-		"outputs": [],
-		"stateMutability": "nonpayable",
-		"type": "function"
-	},
-	{
-		"anonymous": false,
-		"inputs": [
-			{
-				"indexed": false,
-				"internalType": "string",
-				"name": "hospitalName",
-				"type": "string"
-			},
-			{
-				"indexed": true,
-				"internalType": "address",
-				"name": "staffAddr",
-				"type": "address"
-			},
-			{
-				"indexed": false,
-				"internalType": "string",
-				"name": "staffName",
-				"type": "string"
-			},
-			{
-				"indexed": false,
-				"internalType": "string",
-				"name": "role",
-				"type": "string"
-			}
-		],
-		"name": "StaffAdded",
-		"type": "event"
-	},
-	{
-		"inputs": [
-			{
-				"internalType": "string",
-				"name": "hospitalName",
-				"type": "string"
-			},
-			{
-				"internalType": "address",
-				"name": "student",
-				"type": "address"
-			},
-			{
-				"internalType": "string",
-				"name": "cid",
-				"type": "string"
-			},
-			{
-				"internalType": "uint256",
-				"name": "points",
-				"type": "uint256"
-			},
-			{
-				"internalType": "bytes32",
-				"name": "summaryHash",
-				"type": "bytes32"
-			}
-		],
-		"name": "submitHealthReport",
-		"outputs": [],
-		"stateMutability": "nonpayable",
-		"type": "function"
-	},
-	{
-		"inputs": [
-			{
-				"internalType": "string",
-				"name": "hospitalName",
-				"type": "string"
-			}
-		],
-		"name": "getAllReports",
-		"outputs": [
-			{
-				"components": [
-					{
-						"internalType": "address",
-						"name": "student",
-						"type": "address"
-					},
-					{
-						"internalType": "string",
-						"name": "cid",
-						"type": "string"
-					},
-					{
-						"internalType": "uint256",
-						"name": "timestamp",
-						"type": "uint256"
-					},
-					{
-						"internalType": "uint256",
-						"name": "points",
-						"type": "uint256"
-					},
-					{
-						"internalType": "bytes32",
-						"name": "summaryHash",
-						"type": "bytes32"
-					}
-				],
-				"internalType": "struct HealthPortal.HealthReport[]",
-				"name": "",
-				"type": "tuple[]"
-			}
-		],
-		"stateMutability": "view",
-		"type": "function"
-	},
-	{
-		"inputs": [
-			{
-				"internalType": "string",
-				"name": "hospitalName",
-				"type": "string"
-			},
-			{
-				"internalType": "address",
-				"name": "staffEth",
-				"type": "address"
-			}
-		],
-		"name": "getSalary",
-		"outputs": [
-			{
-				"internalType": "uint256",
-				"name": "",
-				"type": "uint256"
-			}
-		],
-		"stateMutability": "view",
-		"type": "function"
-	},
-	{
-		"inputs": [
-			{
-				"internalType": "string",
-				"name": "hospitalName",
-				"type": "string"
-			}
-		],
-		"name": "getStaffList",
-		"outputs": [
-			{
-				"internalType": "address[]",
-				"name": "staffAddresses",
-				"type": "address[]"
-			},
-			{
-				"internalType": "string[]",
-				"name": "names",
-				"type": "string[]"
-			},
-			{
-				"internalType": "string[]",
-				"name": "rolesArr",
-				"type": "string[]"
-			},
-			{
-				"internalType": "uint256[]",
-				"name": "salaries",
-				"type": "uint256[]"
-			},
-			{
-				"internalType": "bool[]",
-				"name": "activeFlags",
-				"type": "bool[]"
-			}
-		],
-		"stateMutability": "view",
-		"type": "function"
-	},
-	{
-		"inputs": [
-			{
-				"internalType": "string",
-				"name": "hospitalName",
-				"type": "string"
-			},
-			{
-				"internalType": "address",
-				"name": "user",
-				"type": "address"
-			}
-		],
-		"name": "isAdmin",
-		"outputs": [
-			{
-				"internalType": "bool",
-				"name": "",
-				"type": "bool"
-			}
-		],
-		"stateMutability": "view",
-		"type": "function"
-	},
-	{
-		"inputs": [
-			{
-				"internalType": "address",
-				"name": "",
-				"type": "address"
-			}
-		],
-		"name": "roles",
-		"outputs": [
-			{
-				"internalType": "enum HealthPortal.Role",
-				"name": "",
-				"type": "uint8"
-			}
-		],
-		"stateMutability": "view",
-		"type": "function"
-	}
-]
-""")
-
 # === CSV FILE PATHS ===
 STAFF_CSV = 'staff.csv'
 SALARY_CSV = 'salary.csv'
 REPORTS_CSV = 'reports.csv'
 
 
-# === Helper Functions for CSV Handling ===
-def load_csv_or_create(file_path, columns):
-    if not os.path.exists(file_path):
-        df = pd.DataFrame(columns=columns)
-        df.to_csv(file_path, index=False)
-    return pd.read_csv(file_path)
+# Load CSVs (compact typed tables, see schema.py)
+staff_df = load_table(STAFF_CSV)
+salary_df = load_table(SALARY_CSV)
+# reports.csv grows without bound; past PORTAL_STREAM_BYTES it is read in chunks, never whole
+STREAM_REPORTS = streaming.auto([REPORTS_CSV])
+reports_df = None if STREAM_REPORTS else load_table(REPORTS_CSV)
 
 
-def save_csv(df, file_path):
-    df.to_csv(file_path, index=False)
+# === Web3 helpers ===
+@traced()
+def get_contract():
+    return contracts.connect(NODE_URL, "HealthPortal", CONTRACT_ADDRESS)
 
 
-# Load CSVs
-staff_df = load_csv_or_create(STAFF_CSV, ['hospitalName', 'staffAddress', 'staffName', 'staffRole'])
-salary_df = load_csv_or_create(SALARY_CSV, ['hospitalName', 'staffAddress', 'salaryWei'])
-reports_df = load_csv_or_create(REPORTS_CSV, ['hospitalName', 'studentAddress', 'cid', 'timestamp', 'points', 'summaryHash'])
+def safe_address(addr):
+    return normalize_address(addr)
 
 
-# === Web3 helpers ===
-def get_contract():
-    w3 = Web3(Web3.HTTPProvider(NODE_URL))
-    if not w3.is_connected():
-        return None, None
-    contract = w3.eth.contract(address=CONTRACT_ADDRESS, abi=CONTRACT_ABI)
-    return w3, contract
+PAGE_SIZE = 50  # rows fetched per RPC/CSV page in the list views
 
 
-def safe_address(addr):
+def _staff_record(s):
+    return {
+        'staffAddress': s[0],
+        'staffName': s[1],
+        'staffRole': s[2],
+        'salaryWei': s[3],
+        'active': s[4],
+    }
+
+
+def _report_record(r):
+    return {
+        "studentAddress": r[0],
+        "cid": r[1],
+        "timestamp": r[2],
+        "points": r[3],
+        "summaryHash": r[4].hex() if isinstance(r[4], bytes) else r[4]
+    }
+
+
+# Fetch Staff from blockchain or CSV fallback (one page at a time)
+@traced()
+def get_staff_count_blockchain(contract, hospital_name):
     try:
-        return Web3.to_checksum_address(addr)
+        return contract.functions.getStaffCount(hospital_name).call()
     except Exception:
         return None
 
 
-# Fetch Staff from blockchain or CSV fallback
-def get_staff_list_blockchain(contract, hospital_name):
+@traced()
+def get_staff_list_blockchain(contract, hospital_name, offset=0, limit=PAGE_SIZE):
     try:
-        results = contract.functions.getStaffList(hospital_name).call()
-        # results is a tuple of arrays: (addresses[], names[], roles[], salaries[], activeFlags[])
-        staff_list = []
-        for i in range(len(results[0])):
-            staff_list.append({
-                'staffAddress': results[0][i],
-                'staffName': results[1][i],
-                'staffRole': results[2][i],
-                'salaryWei': results[3][i],
-                'active': results[4][i],
-            })
-        return staff_list
+        page = contract.functions.getStaffRange(hospital_name, offset, limit).call()
+        return [_staff_record(s) for s in page]
     except Exception:
         return None
 
 
-def get_staff_list_csv(hospital_name):
-    df = staff_df[staff_df['hospitalName'] == hospital_name]
-    sal_df = salary_df[salary_df['hospitalName'] == hospital_name].set_index('staffAddress')
+@traced()
+def get_staff_count_csv(hospital_name):
+    return int((staff_df['hospitalName'] == hospital_name).sum())
+
+
+@traced()
+def get_staff_list_csv(hospital_name, offset=0, limit=PAGE_SIZE, query=""):
+    if query.strip():
+        df = search_index.search_table(STAFF_CSV, staff_df, hospital_name, query, limit)
+    else:
+        df = staff_df[staff_df['hospitalName'] == hospital_name].iloc[offset:offset + limit]
+    sal_df = salary_df[salary_df['hospitalName'] == hospital_name].set_index('staffAddressKey')
     staff_list = []
     for _, row in df.iterrows():
-        sal = sal_df['salaryWei'].get(row['staffAddress'], None)
+        sal = sal_df['salaryWei'].get(row['staffAddressKey'], None)
         staff_list.append({
             'staffAddress': row['staffAddress'],
             'staffName': row['staffName'],
@@ -451,26 +109,50 @@ def get_staff_list_csv(hospital_name):
     return staff_list
 
 
-# Fetch reports blockchain or CSV fallback
-def get_reports_blockchain(contract, hospital_name):
+# Fetch reports blockchain or CSV fallback (one page at a time)
+@traced()
+def get_report_count_blockchain(contract, hospital_name):
     try:
-        reports = contract.functions.getAllReports(hospital_name).call()
-        parsed = []
-        for r in reports:
-            parsed.append({
-                "studentAddress": r[0],
-                "cid": r[1],
-                "timestamp": r[2],
-                "points": r[3],
-                "summaryHash": r[4].hex() if isinstance(r[4], bytes) else r[4]
-            })
-        return parsed
+        return contract.functions.getReportCount(hospital_name).call()
     except Exception:
         return None
 
 
-def get_reports_csv(hospital_name):
-    df = reports_df[reports_df['hospitalName'] == hospital_name]
+@traced()
+def get_reports_blockchain(contract, hospital_name, offset=0, limit=PAGE_SIZE):
+    try:
+        page = contract.functions.getReportsRange(hospital_name, offset, limit).call()
+        return [_report_record(r) for r in page]
+    except Exception:
+        return None
+
+
+def iter_reports_blockchain(contract, hospital_name, page_size=PAGE_SIZE):
+    """Yield report pages until the chain returns a short page."""
+    offset = 0
+    while True:
+        page = get_reports_blockchain(contract, hospital_name, offset, page_size)
+        if not page:
+            return
+        yield page
+        if len(page) < page_size:
+            return
+        offset += page_size
+
+
+@traced()
+def get_report_count_csv(hospital_name):
+    if STREAM_REPORTS:
+        return streaming.group_counts(REPORTS_CSV, 'hospitalName').get(hospital_name, 0)
+    return int((reports_df['hospitalName'] == hospital_name).sum())
+
+
+@traced()
+def get_reports_csv(hospital_name, offset=0, limit=PAGE_SIZE):
+    if STREAM_REPORTS:
+        df = streaming.rows_page(REPORTS_CSV, 'hospitalName', hospital_name, offset, limit)
+    else:
+        df = reports_df[reports_df['hospitalName'] == hospital_name].iloc[offset:offset + limit]
     parsed = []
     for _, row in df.iterrows():
         parsed.append({
@@ -483,8 +165,20 @@ def get_reports_csv(hospital_name):
     return parsed
 
 
+def page_selector(total, key):
+    """Render a page picker for `total` rows and return (offset, limit)."""
+    pages = max(1, -(-total // PAGE_SIZE))
+    page = st.number_input(f"Page (1-{pages})", min_value=1, max_value=pages, value=1, step=1, key=key)
+    st.caption(f"{total} records, {PAGE_SIZE} per page")
+    return (page - 1) * PAGE_SIZE, PAGE_SIZE
+
+
 # --- Build and send blockchain transaction helper ---
-def build_sign_send_tx(w3, priv_key, tx_function, gas=350000, gas_price_gwei=2):
+@traced()
+def build_sign_send_tx(w3, priv_key, tx_function, gas=350000, gas_price_gwei=2, queue=False):
+    if queue:   # signed now, sent by the background sender (tx_queue.py)
+        return tx_queue.enqueue(w3, priv_key, tx_function, gas, gas_price_gwei,
+                                label=tx_function.fn_name, node_url=NODE_URL)['txHash']
     account = w3.eth.account.from_key(priv_key)
     nonce = w3.eth.get_transaction_count(account.address)
     tx = tx_function.build_transaction({
@@ -494,10 +188,14 @@ def build_sign_send_tx(w3, priv_key, tx_function, gas=350000, gas_price_gwei=2):
         "gasPrice": w3.to_wei(gas_price_gwei, 'gwei'),
     })
     signed_tx = w3.eth.account.sign_transaction(tx, priv_key)
-    tx_hash = w3.eth.send_raw_transaction(signed_tx.rawTransaction)
+    tx_hash = w3.eth.send_raw_transaction(raw_transaction(signed_tx))
     return tx_hash.hex()
 
 
+def tx_done(message, tx_hash, queued):
+    st.success(f"{message} Tx hash: {tx_hash}" + (" (queued, sent in the background)" if queued else ""))
+
+
 # === Streamlit app ===
 def main():
     st.set_page_config(page_title="🏥 Hybrid Hospital Portal", layout="wide")
@@ -511,13 +209,22 @@ def main():
 
     menu = st.sidebar.radio("Mode",
                            ["🏠 Home", "👨‍⚕️ Register Hospital", "👩‍💼 Add Staff", "💳 Set Staff Salary", "🗂 Staff List",
-                            "📄 Upload Health Report", "📑 All Health Reports"])
+                            "📄 Upload Health Report", "📑 All Health Reports", "📦 Bulk Import", "💰 Payroll Summary",
+                            "💸 Payroll Run", "⚓ Report Anchors", "📮 Transaction Queue"])
 
+    w3 = contract = None
     if use_blockchain:
         w3, contract = get_contract()
         if w3 is None or contract is None:
             st.error("Could not connect to blockchain node. Falling back to CSV mode.")
             use_blockchain = False
+    queue_txs = use_blockchain and st.sidebar.checkbox("Send transactions in the background", value=True)
+    if queue_txs:
+        queue = tx_queue.stats()
+        if queue['depth']:
+            tx_queue.ensure_sender(NODE_URL)   # left waiting by an earlier run; otherwise the first enqueue starts it
+        st.sidebar.caption(f"Tx queue: {queue['depth']} waiting, {queue['drainPerMin']} tx/min drained"
+                           + (f", {queue['failed']} failed" if queue['failed'] else ""))
 
     if menu == "🏠 Home":
         st.header("🏥 Welcome to the Hybrid Hospital Portal")
@@ -543,8 +250,8 @@ def main():
                             tx_hash = build_sign_send_tx(
                                 w3, priv,
                                 contract.functions.registerHospital(hospital_input),
-                                gas=350000)
-                            st.success(f"Hospital registered! Tx hash: {tx_hash}")
+                                gas=350000, queue=queue_txs)
+                            tx_done("Hospital registered!", tx_hash, queue_txs)
                         except Exception as e:
                             st.error(f"Transaction failed: {e}")
                     else:
@@ -575,90 +282,108 @@ def main():
                                 tx_hash = build_sign_send_tx(
                                     w3, priv,
                                     contract.functions.addStaff(hospital_name, staff_eth, staff_name, staff_role),
-                                    gas=350000)
-                                st.success(f"Staff added! Tx hash: {tx_hash}")
+                                    gas=350000, queue=queue_txs)
+                                tx_done("Staff added!", tx_hash, queue_txs)
                             except Exception as e:
                                 st.error(f"Transaction failed: {e}")
                         else:
                             # CSV mode: add staff to CSV
                             global staff_df
-                            if ((staff_df['hospitalName'] == hospital_name) & (staff_df['staffAddress'].str.lower() == staff_eth.lower())).any():
+                            if ((staff_df['hospitalName'] == hospital_name) & (staff_df['staffAddressKey'] == wallet_key(staff_eth))).any():
                                 st.warning("Staff already exists in CSV data.")
                             else:
-                                new_row = pd.DataFrame([{
+                                row = {
                                     'hospitalName': hospital_name,
                                     'staffAddress': staff_eth,
                                     'staffName': staff_name,
                                     'staffRole': staff_role
-                                }])
-                                staff_df = pd.concat([staff_df, new_row], ignore_index=True)
-                                save_csv(staff_df, STAFF_CSV)
+                                }
+                                # Append only: the staff search index extends itself from new rows
+                                staff_df = append_rows(staff_df, [row], STAFF_CSV)
+                                append_csv([row], STAFF_CSV)
                                 st.success("Staff added to CSV data.")
 
     elif menu == "💳 Set Staff Salary":
         st.header("Set Staff Salary")
         with st.form("set_salary"):
             staff_eth_str = st.text_input("Staff Ethereum Address")
-            salary_eth = st.number_input("Salary in ETH (per month)", min_value=0.0, step=0.01)
+            salary_eth = st.text_input("Salary in ETH (per month)", value="0")
             priv = st.text_input("Admin Private Key (0x...) for signing", type="password")
             submit = st.form_submit_button("Set Salary")
 
             if submit:
-                if not staff_eth_str or salary_eth is None or not priv:
+                if not staff_eth_str or not salary_eth or not priv:
                     st.error("All fields including private key are required.")
                 else:
                     staff_eth = safe_address(staff_eth_str)
+                    try:
+                        salary_wei = parse_eth(salary_eth)
+                    except ValueError as e:
+                        salary_wei = None
+                        st.error(str(e))
                     if staff_eth is None:
                         st.error("Invalid Ethereum address for staff.")
-                    else:
-                        salary_wei = int(salary_eth * 1e18)
+                    elif salary_wei is not None:
                         if use_blockchain:
                             try:
                                 tx_hash = build_sign_send_tx(
                                     w3, priv,
                                     contract.functions.setSalary(hospital_name, staff_eth, salary_wei),
-                                    gas=250000)
-                                st.success(f"Salary set! Tx hash: {tx_hash}")
+                                    gas=250000, queue=queue_txs)
+                                tx_done("Salary set!", tx_hash, queue_txs)
                             except Exception as e:
                                 st.error(f"Transaction failed: {e}")
                         else:
                             global salary_df
                             condition = (salary_df['hospitalName'] == hospital_name) & (
-                                    salary_df['staffAddress'].str.lower() == staff_eth.lower())
+                                    salary_df['staffAddressKey'] == wallet_key(staff_eth))
                             if condition.any():
-                                salary_df.loc[condition, 'salaryWei'] = salary_wei
+                                # the loaded table is shared with the load cache: update a copy
+                                salary_df = assign_wei(salary_df.copy(), condition, 'salaryWei', salary_wei)
                             else:
-                                new_row = pd.DataFrame([{
+                                salary_df = append_rows(salary_df, [{
                                     'hospitalName': hospital_name,
                                     'staffAddress': staff_eth,
                                     'salaryWei': salary_wei
-                                }])
-                                salary_df = pd.concat([salary_df, new_row], ignore_index=True)
-                            save_csv(salary_df, SALARY_CSV)
+                                }], SALARY_CSV)
+                            save_table(salary_df, SALARY_CSV)
                             st.success("Salary updated in CSV data.")
 
     elif menu == "🗂 Staff List":
         st.header("Staff List")
         if use_blockchain:
             if hospital_name:
-                staff_list = get_staff_list_blockchain(contract, hospital_name)
-                if staff_list is None:
+                total = get_staff_count_blockchain(contract, hospital_name)
+                if total is None:
                     st.error("Failed to fetch staff list from blockchain.")
-                elif len(staff_list) == 0:
+                elif total == 0:
                     st.info("No staff found.")
                 else:
-                    df = pd.DataFrame(staff_list)
-                    df['Salary (ETH)'] = df['salaryWei'].apply(lambda x: Web3.from_wei(x, "ether"))
-                    st.dataframe(df[['staffAddress', 'staffName', 'staffRole', 'Salary (ETH)', 'active']].rename(
-                        columns={'staffAddress': 'Address', 'staffName': 'Name', 'staffRole': 'Role', 'active': 'Active'}))
+                    offset, limit = page_selector(total, "staff_page")
+                    staff_list = get_staff_list_blockchain(contract, hospital_name, offset, limit)
+                    if staff_list is None:
+                        st.error("Failed to fetch staff list from blockchain.")
+                    else:
+                        df = pd.DataFrame(staff_list)
+                        df['Salary (ETH)'] = format_eth_column(df['salaryWei'].astype(object))
+                        st.dataframe(df[['staffAddress', 'staffName', 'staffRole', 'Salary (ETH)', 'active']].rename(
+                            columns={'staffAddress': 'Address', 'staffName': 'Name', 'staffRole': 'Role', 'active': 'Active'}))
         else:
             if hospital_name:
-                staff_list = get_staff_list_csv(hospital_name)
-                if len(staff_list) == 0:
+                total = get_staff_count_csv(hospital_name)
+                query = st.text_input("🔎 Search staff", placeholder="name, role or address prefix")
+                if total == 0:
                     st.info("No staff found in CSV data.")
                 else:
-                    df = pd.DataFrame(staff_list)
-                    df['Salary (ETH)'] = df['salaryWei'].apply(lambda x: x / 1e18)
+                    if query.strip():
+                        staff_list = get_staff_list_csv(hospital_name, query=query)
+                        st.caption(f"{len(staff_list)} match(es)"
+                                   + (f" (first {search_index.MAX_RESULTS})" if len(staff_list) >= search_index.MAX_RESULTS else ""))
+                    else:
+                        offset, limit = page_selector(total, "staff_page")
+                        staff_list = get_staff_list_csv(hospital_name, offset, limit)
+                    df = pd.DataFrame(staff_list, columns=['staffAddress', 'staffName', 'staffRole', 'salaryWei', 'active'])
+                    df['Salary (ETH)'] = format_eth_column(df['salaryWei'].astype(object))
                     st.dataframe(df[['staffAddress', 'staffName', 'staffRole', 'Salary (ETH)', 'active']].rename(
                         columns={'staffAddress': 'Address', 'staffName': 'Name', 'staffRole': 'Role', 'active': 'Active'}))
             else:
@@ -666,12 +391,24 @@ def main():
 
     elif menu == "📄 Upload Health Report":
         st.header("Upload Health Report")
+        report_file = st.file_uploader("Report file (stored and pinned locally; fills in the CID and summary hash)")
+        if report_file is not None and st.session_state.get('report_file_id') != report_file.file_id:
+            # Hashed once per upload while it is spooled to the blob store, never read whole
+            stored = blob_store.add(report_file, report_file.name)
+            st.session_state.update(report_file_id=report_file.file_id, report_blob=stored,
+                                    report_cid=stored['cid'], report_summary_hash=stored['summaryHash'])
+        if report_file is not None and st.session_state.get('report_blob'):
+            stored = st.session_state['report_blob']
+            st.caption(f"Stored {stored['name']} ({stored['size']} bytes) as {stored['cid']}"
+                       + (" (already in the store)" if stored['uploads'] > 1 else "")
+                       + f"; local gateway: {blob_store.gateway_url(stored['cid'])}")
         with st.form("upload_report"):
             staff_priv = st.text_input("Staff Private Key (0x...) (for signing)", type="password")
             student_addr_input = st.text_input("Student Ethereum Address")
-            ipfs_cid = st.text_input("IPFS CID")
+            ipfs_cid = st.text_input("IPFS CID", key="report_cid")
             points = st.number_input("Karma Points", min_value=0, value=10)
-            summary_hash = st.text_input("AI Summary Hash (bytes32)", max_chars=66)
+            summary_hash = st.text_input("AI Summary Hash (bytes32)", max_chars=66, key="report_summary_hash")
+            batch = st.checkbox("Anchor in a Merkle batch (one transaction per batch, see ⚓ Report Anchors)")
             submit = st.form_submit_button("Submit Health Report")
 
             if submit:
@@ -682,38 +419,54 @@ def main():
                     if student_eth is None:
                         st.error("Invalid Ethereum address for student.")
                     else:
-                        if use_blockchain:
+                        if use_blockchain and not batch:
                             try:
                                 tx_hash = build_sign_send_tx(
                                     w3, staff_priv,
                                     contract.functions.submitHealthReport(hospital_name, student_eth, ipfs_cid, points,
                                                                          summary_hash),
-                                    gas=450000)
-                                st.success(f"Health report submitted! Tx hash: {tx_hash}")
+                                    gas=450000, queue=queue_txs)
+                                tx_done("Health report submitted!", tx_hash, queue_txs)
                             except Exception as e:
                                 st.error(f"Transaction failed: {e}")
                         else:
                             global reports_df
-                            new_row = pd.DataFrame([{
+                            row = {
                                 'hospitalName': hospital_name,
                                 'studentAddress': student_eth,
                                 'cid': ipfs_cid,
                                 'timestamp': int(datetime.now().timestamp()),
                                 'points': points,
                                 'summaryHash': summary_hash
-                            }])
-                            reports_df = pd.concat([reports_df, new_row], ignore_index=True)
-                            save_csv(reports_df, REPORTS_CSV)
-                            st.success("Health report added to CSV data.")
+                            }
+                            if batch:
+                                try:
+                                    merkle.buffer_reports(hospital_name, [row])
+                                except ValueError as e:
+                                    st.error(f"Cannot anchor this report: {e}")
+                                    return
+                            # Append only: the points pipeline reads new reports from its byte offset
+                            if not STREAM_REPORTS:
+                                reports_df = append_rows(reports_df, [row], REPORTS_CSV)
+                            append_csv([row], REPORTS_CSV)
+                            st.success("Health report queued for the next anchored batch." if batch
+                                       else "Health report added to CSV data.")
+                            if points_pipeline.sync_reports()['pending']:
+                                st.warning("Some reported students are not enrolled in any college yet; "
+                                           "their points are credited once they are.")
 
     elif menu == "📑 All Health Reports":
         st.header("All Health Reports")
         if hospital_name:
             if use_blockchain:
-                reports = get_reports_blockchain(contract, hospital_name)
-                if reports is None:
+                total = get_report_count_blockchain(contract, hospital_name)
+                reports = None
+                if total:
+                    offset, limit = page_selector(total, "reports_page")
+                    reports = get_reports_blockchain(contract, hospital_name, offset, limit)
+                if total is None or (total and reports is None):
                     st.error("Failed to fetch health reports from blockchain.")
-                elif len(reports) == 0:
+                elif total == 0:
                     st.info("No health reports found.")
                 else:
                     df = pd.DataFrame(reports)
@@ -722,18 +475,122 @@ def main():
                         columns={'studentAddress': 'Student Address', 'cid': 'IPFS CID', 'points': 'Points',
                                  'summaryHash': 'Summary Hash'}))
             else:
-                reports = get_reports_csv(hospital_name)
-                if len(reports) == 0:
+                total = get_report_count_csv(hospital_name)
+                if total == 0:
                     st.info("No health reports found in CSV data.")
                 else:
+                    offset, limit = page_selector(total, "reports_page")
+                    reports = get_reports_csv(hospital_name, offset, limit)
                     df = pd.DataFrame(reports)
                     df['Timestamp'] = df['timestamp'].apply(lambda x: datetime.fromtimestamp(x))
                     st.dataframe(df[['studentAddress', 'cid', 'Timestamp', 'points', 'summaryHash']].rename(
                         columns={'studentAddress': 'Student Address', 'cid': 'IPFS CID', 'points': 'Points',
                                  'summaryHash': 'Summary Hash'}))
+            import hospital_panels
+            hospital_panels.report_file()
         else:
             st.info("Please enter hospital name to load health reports.")
 
+    elif menu == "📦 Bulk Import":
+        st.header("Bulk Import Staff / Health Reports")
+        kind = st.radio("Records", ["Staff", "Health Reports"])
+        if kind == "Staff":
+            st.caption("CSV columns: staffAddress, staffName, staffRole (signed by hospital admin)")
+        else:
+            st.caption("CSV columns: studentAddress, cid, points, summaryHash (signed by hospital staff)")
+        upload = st.file_uploader("Upload CSV", type="csv")
+        priv = st.text_input("Private Key (0x...) for signing", type="password", key="bulk_priv")
+        batch = kind != "Staff" and st.checkbox("Anchor in a Merkle batch instead of submitHealthReports "
+                                                "(see ⚓ Report Anchors)")
+
+        if upload is not None:
+            bulk_df = add_wallet_keys(pd.read_csv(upload))
+            st.write(f"{len(bulk_df)} records")
+            st.dataframe(drop_wallet_keys(bulk_df).head(20))
+
+            if st.button("Import"):
+                address_col = 'staffAddress' if kind == "Staff" else 'studentAddress'
+                invalid = bulk_df.loc[bulk_df[address_col + 'Key'].isna(), address_col]
+                bulk_df[address_col] = checksum_addresses(bulk_df[address_col + 'Key'])
+                rows = bulk_df.to_dict('records')
+                if len(invalid):
+                    st.error(f"{len(invalid)} invalid Ethereum address(es), e.g. {invalid.iloc[0]}")
+                elif use_blockchain and not batch:
+                    if not priv:
+                        st.error("Private key is required.")
+                        return
+                    try:
+                        if kind == "Staff":
+                            records = [(r['staffAddress'], r['staffName'], r['staffRole']) for r in rows]
+                            make_call = lambda chunk: contract.functions.addStaffBatch(
+                                hospital_name, [c[0] for c in chunk], [c[1] for c in chunk], [c[2] for c in chunk])
+                            per_record_gas = STAFF_GAS
+                        else:
+                            records = [(r['studentAddress'], r['cid'], int(r['points']), r['summaryHash'])
+                                       for r in rows]
+                            make_call = lambda chunk: contract.functions.submitHealthReports(hospital_name, chunk)
+                            per_record_gas = REPORT_GAS
+                        results = send_batches(w3, priv, make_call, records, per_record_gas)
+                        st.success(f"Imported {len(records)} records in {len(results)} transaction(s).")
+                        st.dataframe(pd.DataFrame(results))
+                    except Exception as e:
+                        st.error(f"Bulk import failed: {e}")
+                else:
+                    new_rows = bulk_df.assign(hospitalName=hospital_name)
+                    skipped = 0
+                    if kind == "Staff":
+                        uploaded = len(new_rows)
+                        existing = staff_df.loc[staff_df['hospitalName'] == hospital_name, 'staffAddressKey']
+                        new_rows = new_rows.drop_duplicates('staffAddressKey')
+                        new_rows = new_rows[~new_rows['staffAddressKey'].isin(existing)]
+                        skipped = uploaded - len(new_rows)
+                        staff_df = append_rows(staff_df, drop_wallet_keys(new_rows), STAFF_CSV)
+                        append_csv(new_rows, STAFF_CSV)
+                    else:
+                        new_rows['timestamp'] = int(datetime.now().timestamp())
+                        if batch:
+                            try:
+                                merkle.buffer_reports(hospital_name, new_rows.to_dict('records'))
+                            except ValueError as e:
+                                st.error(f"Cannot anchor these reports: {e}")
+                                return
+                        if not STREAM_REPORTS:
+                            reports_df = append_rows(reports_df, drop_wallet_keys(new_rows), REPORTS_CSV)
+                        append_csv(new_rows, REPORTS_CSV)
+                        pending = points_pipeline.sync_reports()['pending']
+                        if pending:
+                            st.warning(f"{pending} report(s) for students not enrolled in any college yet; "
+                                       "their points are credited once they are.")
+                    st.success(f"Imported {len(new_rows)} records into CSV data.")
+                    if skipped:
+                        st.info(f"Skipped {skipped} staff row(s) already in the CSV data or repeated in the upload.")
+
+    elif menu == "💰 Payroll Summary":
+        st.header("Monthly Payroll Summary (all hospitals, CSV data)")
+        summary = payroll_totals(staff_df, salary_df)
+        if summary.empty:
+            st.info("No staff found in CSV data.")
+        else:
+            current = summary[summary['hospitalName'] == hospital_name]
+            if not current.empty:
+                st.metric(f"{hospital_name} monthly payroll (ETH)", current.iloc[0]['totalEth'])
+            st.dataframe(summary[['hospitalName', 'staff', 'withSalary', 'totalEth']].rename(
+                columns={'hospitalName': 'Hospital', 'staff': 'Staff', 'withSalary': 'With Salary',
+                         'totalEth': 'Total (ETH)'}))
+
+    elif menu == "💸 Payroll Run":
+        import hospital_panels
+        hospital_panels.payroll_run(hospital_name, use_blockchain, w3, contract, staff_df, salary_df)
+
+    elif menu == "⚓ Report Anchors":
+        import hospital_panels
+        hospital_panels.report_anchors(hospital_name, use_blockchain, w3, contract)
+
+    elif menu == "📮 Transaction Queue":
+        import hospital_panels
+        hospital_panels.transaction_queue()
+
 
 if __name__ == "__main__":
-    main()
+    with rerun("hospital_admin"):
+        main()
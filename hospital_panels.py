@@ -0,0 +1,168 @@
+"""
+Hospital Admin Panels
+=====================
+- The Payroll Run, Report Anchors and Transaction Queue views and the report
+  file opener of hospital_admin.py. The page imports this module only when one
+  of them is picked, so payroll.py, merkle.py, blob_store.py and tx_queue.py
+  are not loaded for the other views.
+- Streamlit rewrites and recompiles the page script on every fresh session;
+  keeping these views out of it keeps that cost at what the page had before
+  they were added.
+"""
+
+from datetime import datetime
+
+import pandas as pd
+import streamlit as st
+
+from batching import MAX_CHUNK_SIZE
+from money import format_eth, format_eth_column
+import payroll
+import merkle
+import blob_store
+import tx_queue
+
+
+# === REPORT FILES ===
+def report_file():
+    """Look up a report file in the local blob store by CID and offer it for download."""
+    with st.expander("Open a report file"):
+        cid = st.text_input("IPFS CID", key="open_cid")
+        if cid and blob_store.has(cid):
+            stored = blob_store.load_pins().get(cid, {})
+            st.caption(f"{stored.get('size', '?')} bytes, summary hash {stored.get('summaryHash')}; "
+                       f"local gateway: {blob_store.gateway_url(cid)}")
+            with blob_store.open_blob(cid) as f:
+                st.download_button("Download", f.read(), file_name=stored.get('name') or cid)
+        elif cid:
+            st.info("This report file is not in the local blob store.")
+
+
+# === PAYROLL RUN ===
+def payroll_run(hospital_name, use_blockchain, w3, contract, staff_df, salary_df):
+    st.header("Payroll Run")
+    period = st.text_input("Pay period", value=datetime.now().strftime("%Y-%m"))
+    mode = 'chain' if use_blockchain else 'csv'
+    if use_blockchain:
+        try:
+            lines = payroll.chain_lines(contract, hospital_name)
+        except Exception as e:
+            st.error(f"Failed to fetch staff salaries from blockchain: {e}")
+            return
+    else:
+        st.info("CSV mode: the run is planned and recorded in the payroll log; no ETH is sent.")
+        lines = payroll.csv_lines(staff_df, salary_df, hospital_name)
+
+    run = payroll.load_run(hospital_name, period, mode)
+    if lines.empty and run is None:
+        st.info("No staff with a salary set.")
+        return
+    col1, col2 = st.columns(2)
+    col1.metric("Payees", len(lines))
+    col2.metric("Total (ETH)", format_eth(sum(int(w) for w in lines['salaryWei'])))
+    with st.expander("Pay lines"):
+        st.dataframe(lines.assign(salaryWei=format_eth_column(lines['salaryWei'].astype(object))).rename(
+            columns={'staffAddress': 'Address', 'staffName': 'Name', 'staffRole': 'Role',
+                     'salaryWei': 'Salary (ETH)'}))
+
+    priv = st.text_input("Admin Private Key (0x...) for signing", type="password") if use_blockchain else None
+    label = "Resume payroll run" if run and not payroll.summary(run)['complete'] else "Start payroll run"
+    if st.button(label, disabled=bool(run and payroll.summary(run)['complete'])):
+        try:
+            if use_blockchain:
+                if not priv:
+                    st.error("Private key required to sign the payroll transactions.")
+                    return
+                run = payroll.plan(hospital_name, period, lines, payroll.chain_batch_size(w3), mode)
+                payroll.execute(run, w3, contract, priv)
+            else:
+                run = payroll.plan(hospital_name, period, lines, MAX_CHUNK_SIZE, mode)
+                payroll.record(run)
+            st.success(f"Payroll {run['runId']} complete.")
+        except Exception as e:
+            st.error(f"Payroll run stopped: {e}")
+            run = payroll.load_run(hospital_name, period, mode)
+
+    if run:
+        stats = payroll.summary(run)
+        st.subheader(f"Run {run['runId']} ({run['mode']})")
+        col1, col2, col3, col4 = st.columns(4)
+        col1.metric("Batches done", f"{stats['batchesDone']} / {stats['batches']}")
+        col2.metric("Paid (ETH)", f"{stats['paidEth']} / {stats['totalEth']}")
+        col3.metric("Payees / s", stats['payeesPerSecond'] if stats['payeesPerSecond'] else "-")
+        col4.metric("Gas per payee", stats['gasPerPayee'] if stats['gasPerPayee'] else "-")
+        st.dataframe(payroll.batches_frame(run), hide_index=True)
+
+    history = payroll.list_runs(hospital_name)
+    if history:
+        with st.expander("Previous runs"):
+            st.dataframe(pd.DataFrame([payroll.summary(r) for r in history]), hide_index=True)
+
+
+# === REPORT ANCHORS ===
+def report_anchors(hospital_name, use_blockchain, w3, contract):
+    st.header("Merkle-Anchored Health Reports")
+    st.caption("Reports uploaded with \"Anchor in a Merkle batch\" wait here; one anchorReportBatch "
+               "transaction commits the Merkle root of all of them.")
+    if not use_blockchain:
+        st.info("CSV mode: batches are sealed locally (root and proofs work) and anchored "
+                "the next time this runs in Blockchain mode.")
+    priv = st.text_input("Staff Private Key (0x...) for signing", type="password") if use_blockchain else None
+    if st.button("Anchor pending reports" if use_blockchain else "Seal pending reports"):
+        try:
+            if use_blockchain:
+                if not priv:
+                    st.error("Private key required to sign the anchor transaction.")
+                    return
+                merkle.anchor(hospital_name, w3, contract, priv)
+            else:
+                merkle.anchor(hospital_name)
+            st.success("Reports anchored." if use_blockchain else "Reports sealed.")
+        except Exception as e:
+            st.error(f"Anchoring stopped: {e}")
+    stats = merkle.summary(hospital_name)
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("Pending", stats['pending'])
+    col2.metric("Sealed, not anchored", stats['sealed'])
+    col3.metric("Anchored", stats['anchored'])
+    col4.metric("Gas per report", stats['gasPerReport'] if stats['gasPerReport'] else "-")
+    st.dataframe(merkle.batches_frame(hospital_name), hide_index=True)
+
+    st.subheader("Prove a report")
+    cid = st.text_input("IPFS CID of the report")
+    student = st.text_input("Student Ethereum Address (optional)")
+    if cid:
+        proof = merkle.prove(hospital_name, cid, student or None)
+        if proof is None:
+            st.info("No sealed batch holds this report (it may still be pending).")
+        else:
+            st.write(f"Batch {proof['batch']} ({proof['status']}), leaf {proof['index']}, "
+                     f"{len(proof['proof'])} sibling hash(es)")
+            st.json(proof)
+            if merkle.verify_proof(proof):
+                st.success("Proof matches the batch root.")
+            else:
+                st.error("Proof does not match the batch root.")
+            if use_blockchain and proof['batchId'] is not None:
+                try:
+                    if merkle.verify_on_chain(contract, hospital_name, proof):
+                        st.success(f"Verified on chain against batch {proof['batchId']}.")
+                    else:
+                        st.error("The anchored root on chain does not match this proof.")
+                except Exception as e:
+                    st.error(f"On-chain verification failed: {e}")
+
+
+# === TRANSACTION QUEUE ===
+def transaction_queue():
+    st.header("Transaction Queue")
+    st.caption("Transactions signed by the admin pages wait here until the background sender "
+               "gets them mined, in nonce order per account.")
+    queue = tx_queue.stats()
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("Waiting", queue['depth'])
+    col2.metric("Drain rate (tx/min)", queue['drainPerMin'])
+    col3.metric("Oldest waiting (s)", queue['oldestSeconds'] if queue['oldestSeconds'] is not None else "-")
+    col4.metric("Failed / dropped / reverted", queue['failed'] + queue['dropped'] + queue['reverted'])
+    st.button("Refresh")
+    st.dataframe(tx_queue.frame(), hide_index=True)
@@ -0,0 +1,206 @@
+"""
+Student Leaderboards
+====================
+- Ranked boards per college and per (college, department) for two metrics:
+  reward points (balances of points_ledger.py) and average marks (grades.csv).
+- Each board is a sorted array of (-score, wallet key) plus a key -> score
+  map; a score change is one bisect removal and one insort, and top-K or a
+  student's own rank is a bisect instead of a sort over every student.
+- Boards live in the process and follow the data incrementally: new ledger
+  entries from the journal offset, appended grade rows via datasets.epoch();
+  a full rebuild only happens when students.csv or a whole grades.csv changes.
+"""
+
+import os
+import threading
+from bisect import bisect_left, insort
+
+import datasets
+import points_ledger
+from wallets import wallet_key
+from tracing import span, traced
+
+STUDENTS_CSV = "students.csv"
+GRADES_CSV = "grades.csv"
+POINTS = 'points'
+MARKS = 'marks'
+
+_lock = threading.Lock()
+_index = {
+    'students': None,     # datasets version of the students table the boards were built for
+    'grades': (None, 0),  # (epoch, rows folded) of grades.csv
+    'ledger': (None, 0),  # (journal path, offset folded)
+    'departments': {},    # (college, key) -> department
+    'names': {},          # (college, key) -> student name
+    'marks': {},          # (college, key) -> [sum, count]
+    'points': {},         # (college, key) -> balance
+    'boards': {},         # (metric, college, department or None) -> board
+}
+
+
+# === BOARD ===
+def _board():
+    return {'order': [], 'score': {}}
+
+
+def _set(board, key, score):
+    """Move `key` to `score` on one board: O(log N) search plus one array shift."""
+    old = board['score'].get(key)
+    if old == score:
+        return
+    if old is not None:
+        del board['order'][bisect_left(board['order'], (-old, key))]
+    if score is None:
+        board['score'].pop(key, None)
+        return
+    board['score'][key] = score
+    insort(board['order'], (-score, key))
+
+
+def _rank(board, key):
+    """1-based competition rank (ties share a rank), or None if `key` is not on the board."""
+    score = board['score'].get(key)
+    if score is None:
+        return None
+    return bisect_left(board['order'], (-score,)) + 1
+
+
+# === INDEX ===
+def _scopes(college_name, key):
+    department = _index['departments'].get((college_name, key))
+    return (None,) if department is None else (None, department)
+
+
+def _update(metric, college_name, key, score):
+    """One student's new score on their college and department boards."""
+    for scope in _scopes(college_name, key):
+        _set(_index['boards'].setdefault((metric, college_name, scope), _board()), key, score)
+
+
+def _load_boards(metric, scores):
+    """Replace every `metric` board from (college, key) -> score with one sort per board."""
+    for board_key in [k for k in _index['boards'] if k[0] == metric]:
+        del _index['boards'][board_key]
+    orders = {}
+    for (college_name, key), score in scores.items():
+        if score is None:
+            continue
+        for scope in _scopes(college_name, key):
+            orders.setdefault((metric, college_name, scope), []).append((-score, key))
+    for board_key, order in orders.items():
+        order.sort()
+        _index['boards'][board_key] = {'order': order, 'score': {key: -neg for neg, key in order}}
+
+
+def _average(sums):
+    return round(sums[0] / sums[1], 2) if sums[1] else None
+
+
+def _fold_grades(grades, bulk=False):
+    """Add grade rows to the per-student mark sums; re-rank the students they touch."""
+    grades = grades[grades['marks'].notna() & grades['walletKey'].notna()]
+    totals = grades.groupby([grades['collegeName'].astype(object), grades['walletKey']],
+                            observed=True)['marks'].agg(['sum', 'count'])
+    for (college_name, key), total, count in zip(totals.index, totals['sum'], totals['count']):
+        sums = _index['marks'].setdefault((college_name, key), [0, 0])
+        sums[0] += int(total)
+        sums[1] += int(count)
+        if not bulk:
+            _update(MARKS, college_name, key, _average(sums))
+    if bulk:
+        _load_boards(MARKS, {k: _average(v) for k, v in _index['marks'].items()})
+
+
+def _fold_ledger():
+    """Apply ledger entries appended since the last fold; the first fold copies the ledger's index."""
+    path = os.path.abspath(points_ledger.LEDGER_CSV)   # relative: another working directory is another journal
+    folded_path, offset = _index['ledger']
+    if offset and folded_path == path:
+        try:
+            entries, offset = points_ledger.entries_since(offset)
+        except ValueError:   # journal replaced: start over
+            pass
+        else:
+            _index['ledger'] = (path, offset)
+            for row in entries:
+                key = (row['collegeName'], wallet_key(row['wallet']))
+                _index['points'][key] = int(row['balance'])
+                _update(POINTS, key[0], key[1], int(row['balance']))
+            return
+    _index['points'], offset = points_ledger.balances()
+    _index['ledger'] = (path, offset)
+    _load_boards(POINTS, _index['points'])
+
+
+def _rebuild(students, grades):
+    students = students.drop_duplicates(['collegeName', 'walletKey'])
+    keys = list(zip(students['collegeName'].astype(object), students['walletKey']))
+    _index['departments'] = dict(zip(keys, students['department'].astype(object)))
+    _index['names'] = dict(zip(keys, students['name']))
+    _index['marks'].clear()
+    _fold_grades(grades, bulk=True)
+    _load_boards(POINTS, _index['points'])
+
+
+@traced()
+def refresh(students, grades):
+    """Bring the boards up to date with the loaded tables and the points ledger."""
+    students_version = datasets.version(STUDENTS_CSV)
+    grades_epoch, grades_rows = datasets.epoch(GRADES_CSV), len(grades)
+    folded_epoch, folded_rows = _index['grades']
+    with _lock:
+        if _index['students'] is None or students_version != _index['students']:
+            with span("leaderboard.rebuild", students=len(students), grades=grades_rows):
+                _rebuild(students, grades)
+        elif grades_epoch != folded_epoch or grades_rows < folded_rows:
+            with span("leaderboard.rebuild", grades=grades_rows):
+                _index['marks'].clear()
+                _fold_grades(grades, bulk=True)
+        elif grades_rows > folded_rows:
+            with span("leaderboard.fold", grades=grades_rows - folded_rows):
+                _fold_grades(grades.iloc[folded_rows:])
+        _index['students'], _index['grades'] = students_version, (grades_epoch, grades_rows)
+        _fold_ledger()
+
+
+# === QUERIES ===
+def top(metric, college_name, k=10, department=None):
+    """Best `k` students of a board: [{'rank', 'key', 'name', 'department', 'score'}]."""
+    with _lock:
+        board = _index['boards'].get((metric, college_name, department))
+        if board is None:
+            return []
+        rows = []
+        for neg_score, key in board['order'][:k]:
+            rows.append({'rank': bisect_left(board['order'], (neg_score,)) + 1, 'key': key,
+                         'name': _index['names'].get((college_name, key)),
+                         'department': _index['departments'].get((college_name, key)),
+                         'score': -neg_score})
+        return rows
+
+
+def rank(metric, college_name, key, department=None):
+    """(rank, students on the board, score) of one student, or None if not ranked."""
+    with _lock:
+        board = _index['boards'].get((metric, college_name, department))
+        if board is None or key not in board['score']:
+            return None
+        return _rank(board, key), len(board['order']), board['score'][key]
+
+
+def department_of(college_name, key):
+    return _index['departments'].get((college_name, key))
+
+
+def departments(college_name):
+    with _lock:
+        return sorted({d for (m, c, d) in _index['boards'] if c == college_name and d is not None}, key=str)
+
+
+def top_frame(metric, college_name, k=10, department=None):
+    """top() as a display table."""
+    import pandas as pd
+    label = "Points" if metric == POINTS else "Average Mark"
+    return pd.DataFrame([{"Rank": r['rank'], "Name": r['name'], "Department": r['department'], label: r['score']}
+                         for r in top(metric, college_name, k, department)],
+                        columns=["Rank", "Name", "Department", label])
@@ -0,0 +1,338 @@
+"""
+Merkle Report Anchoring
+=======================
+- Health reports can be anchored in batches instead of one
+  `submitHealthReport` transaction each: reports are buffered locally
+  (anchors/<hospital>/pending.csv, besides the usual reports.csv row) and
+  one `anchorReportBatch` transaction commits the Merkle root of a whole
+  batch, at the same gas whatever the batch size.
+- Leaves are keccak256(keccak256(abi.encode(student, cid, points,
+  summaryHash, timestamp))), pairs are hashed in sorted order and an odd
+  node is carried up unchanged, as `reportLeaf` / `verifyReportProof` in
+  remix/HealthPoints.sol expect; any single report is proven with its
+  log2(N) sibling hashes, locally or on chain.
+- Sealing is atomic: pending.csv is renamed to the next batch number before
+  its batch log (anchors/<hospital>/<batch>.json) is written, so a crash
+  never loses or double-anchors a report. A batch left 'sent' is confirmed
+  from its receipt before anything is resent; in CSV mode batches stay
+  'sealed' (root and proofs work locally) until anchored from chain mode.
+
+    python merkle.py status "City Hospital"
+    python merkle.py prove "City Hospital" <cid> [--student 0x...]
+"""
+
+import csv
+import glob
+import json
+import os
+import time
+from datetime import datetime
+
+from points_ledger import file_lock
+from report_scheduler import slug
+from tracing import span, traced
+from wallets import wallet_key
+
+ANCHOR_DIR = os.environ.get("PORTAL_ANCHOR_DIR", "anchors")
+PENDING = "pending.csv"
+FIELDS = ['studentAddress', 'cid', 'points', 'summaryHash', 'timestamp']
+LEAF_TYPES = ['address', 'string', 'uint256', 'bytes32', 'uint256']
+ANCHOR_GAS = 150000         # fallback for nodes without eth_estimateGas: one struct push + event
+RECEIPT_TIMEOUT = 120       # seconds to wait for a batch root to be mined
+SEALED, SENT, ANCHORED, FAILED = 'sealed', 'sent', 'anchored', 'failed'
+
+
+# === HASHING ===
+def _keccak(data):
+    from eth_hash.auto import keccak
+    return keccak(data)
+
+
+def to_bytes32(value):
+    """A summary hash as 32 bytes: hex strings (0x-prefixed or not) are read as a big-endian number."""
+    if isinstance(value, (bytes, bytearray)):
+        return bytes(value).rjust(32, b"\0")
+    text = str(value).strip().lower()
+    text = text[2:] if text.startswith("0x") else text
+    try:
+        return int(text or "0", 16).to_bytes(32, "big")
+    except OverflowError:
+        raise ValueError(f"Summary hash longer than 32 bytes: {value}") from None
+
+
+def leaf(report):
+    """Leaf hash of one report dict (FIELDS), identical to HealthPortal.reportLeaf."""
+    from eth_abi import encode
+    from eth_utils import to_checksum_address
+    encoded = encode(LEAF_TYPES, [to_checksum_address(report['studentAddress']), str(report['cid']),
+                                  int(report['points']), to_bytes32(report['summaryHash']),
+                                  int(report['timestamp'])])
+    return _keccak(_keccak(encoded))
+
+
+def _parent(a, b):
+    return _keccak(a + b) if a < b else _keccak(b + a)
+
+
+def tree_levels(leaves):
+    """Every level of the tree, leaves first and root last."""
+    levels = [list(leaves)]
+    while len(levels[-1]) > 1:
+        level = levels[-1]
+        levels.append([_parent(level[i], level[i + 1]) if i + 1 < len(level) else level[i]
+                       for i in range(0, len(level), 2)])
+    return levels
+
+
+def root(leaves):
+    return tree_levels(leaves)[-1][0] if leaves else None
+
+
+def proof(levels, index):
+    """Sibling hashes from leaf `index` up to the root (a carried-up odd node has no sibling)."""
+    path = []
+    for level in levels[:-1]:
+        sibling = index ^ 1
+        if sibling < len(level):
+            path.append(level[sibling])
+        index //= 2
+    return path
+
+
+def verify(leaf_hash, path, expected_root):
+    node = leaf_hash
+    for sibling in path:
+        node = _parent(node, sibling)
+    return node == expected_root
+
+
+# === BUFFER ===
+def _dir(hospital_name):
+    return os.path.join(ANCHOR_DIR, slug(hospital_name))
+
+
+def buffer_reports(hospital_name, reports):
+    """Queue report dicts (FIELDS) for the next batch of `hospital_name`.
+
+    Raises ValueError if a report cannot be hashed (bad address or summary hash).
+    """
+    for report in reports:
+        leaf(report)
+    path = os.path.join(_dir(hospital_name), PENDING)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with file_lock(os.path.abspath(path)):
+        new = not os.path.exists(path) or os.path.getsize(path) == 0
+        with open(path, "a", newline="", encoding="utf-8") as f:
+            writer = csv.DictWriter(f, fieldnames=FIELDS, extrasaction='ignore')
+            if new:
+                writer.writeheader()
+            writer.writerows(reports)
+
+
+def _read_reports(path):
+    with open(path, newline="", encoding="utf-8") as f:
+        return [{**r, 'points': int(r['points']), 'timestamp': int(r['timestamp'])} for r in csv.DictReader(f)]
+
+
+def pending(hospital_name):
+    """Reports buffered and not sealed into a batch yet."""
+    path = os.path.join(_dir(hospital_name), PENDING)
+    return _read_reports(path) if os.path.exists(path) else []
+
+
+# === BATCHES ===
+def _batch_path(hospital_name, number, ext):
+    return os.path.join(_dir(hospital_name), f"{number:06d}.{ext}")
+
+
+def save_batch(batch):
+    path = _batch_path(batch['hospitalName'], batch['batch'], "json")
+    with open(path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(batch, f, indent=1)
+    os.replace(path + ".tmp", path)
+
+
+def list_batches(hospital_name):
+    """Every sealed batch of a hospital, oldest first."""
+    batches = []
+    for path in sorted(glob.glob(os.path.join(_dir(hospital_name), "[0-9]*.json"))):
+        with open(path, encoding="utf-8") as f:
+            batches.append(json.load(f))
+    return batches
+
+
+def _numbers(hospital_name, ext):
+    return [int(os.path.basename(p).split(".")[0])
+            for p in glob.glob(os.path.join(_dir(hospital_name), f"[0-9]*.{ext}"))]
+
+
+@traced()
+def seal(hospital_name):
+    """Turn the pending buffer into the next batch; returns the batches sealed (also ones a crash left half-sealed)."""
+    directory = _dir(hospital_name)
+    os.makedirs(directory, exist_ok=True)
+    sealed = []
+    with file_lock(os.path.abspath(os.path.join(directory, PENDING))):
+        path = os.path.join(directory, PENDING)
+        if os.path.exists(path) and pending(hospital_name):
+            number = max(_numbers(hospital_name, "json") + _numbers(hospital_name, "csv"), default=-1) + 1
+            os.replace(path, _batch_path(hospital_name, number, "csv"))
+        for number in sorted(_numbers(hospital_name, "csv")):
+            reports = _read_reports(_batch_path(hospital_name, number, "csv"))
+            with span("merkle.seal", reports=len(reports)):
+                batch_root = root([leaf(r) for r in reports])
+            batch = {'batch': number, 'hospitalName': hospital_name,
+                     'sealed': datetime.now().isoformat(timespec='seconds'), 'count': len(reports),
+                     'root': '0x' + batch_root.hex(), 'reports': reports, 'status': SEALED,
+                     'txHash': None, 'batchId': None, 'gasUsed': None, 'seconds': None}
+            save_batch(batch)
+            os.remove(_batch_path(hospital_name, number, "csv"))
+            sealed.append(batch)
+    return sealed
+
+
+def _send_root(w3, priv_key, contract, batch, gas_price_gwei):
+    """Send one batch root; CallReverted (nothing sent) if anchorReportBatch would revert."""
+    from batching import CallReverted, send_call
+    call = contract.functions.anchorReportBatch(batch['hospitalName'], bytes.fromhex(batch['root'][2:]),
+                                                batch['count'])
+    try:
+        return send_call(w3, priv_key, call, ANCHOR_GAS, gas_price_gwei=gas_price_gwei)[0]
+    except CallReverted as e:
+        raise CallReverted(f"Batch {batch['batch']}: {e}") from None
+
+
+def _receipt(w3, tx_hash, timeout=0):
+    try:
+        if timeout:
+            return w3.eth.wait_for_transaction_receipt(tx_hash, timeout=timeout)
+        return w3.eth.get_transaction_receipt(tx_hash)
+    except Exception:
+        return None
+
+
+def _known(w3, tx_hash):
+    """True while a sent transaction is still known to the node (mined or in its pool)."""
+    try:
+        return w3.eth.get_transaction(tx_hash) is not None
+    except Exception:
+        return False
+
+
+def _batch_id(contract, receipt):
+    from web3.logs import DISCARD
+    events = contract.events.ReportBatchAnchored().process_receipt(receipt, errors=DISCARD)
+    return int(events[0]['args']['batchId']) if events else None
+
+
+@traced()
+def anchor(hospital_name, w3=None, contract=None, priv_key=None, gas_price_gwei=2):
+    """Seal the pending reports, then (with a chain) anchor every batch not yet anchored; returns the batches.
+
+    A root is gas-estimated before it is sent: one that would revert (key not
+    staff of the hospital, unknown hospital) raises CallReverted and is not
+    sent, so a batch that reverted once is only resent once it would succeed.
+    """
+    seal(hospital_name)
+    batches = list_batches(hospital_name)
+    if w3 is None:
+        return batches
+    with file_lock(os.path.abspath(os.path.join(_dir(hospital_name), PENDING))):
+        for batch in batches:
+            if batch['status'] not in (SEALED, SENT, FAILED):
+                continue
+            start = time.perf_counter()
+            receipt = _receipt(w3, batch['txHash']) if batch['status'] == SENT else None
+            if receipt is None and not (batch['status'] == SENT and _known(w3, batch['txHash'])):
+                with span("merkle.anchor", reports=batch['count']):
+                    batch.update(txHash=_send_root(w3, priv_key, contract, batch, gas_price_gwei),
+                                 status=SENT)
+                    save_batch(batch)   # a crash from here on resumes from the receipt
+            if receipt is None:
+                receipt = _receipt(w3, batch['txHash'], RECEIPT_TIMEOUT)
+            if receipt is None:
+                raise TimeoutError(f"Batch {batch['batch']} not mined yet ({batch['txHash']}); anchor again later")
+            ok = receipt['status'] == 1
+            batch.update(status=ANCHORED if ok else FAILED, gasUsed=int(receipt['gasUsed']),
+                         batchId=_batch_id(contract, receipt) if ok else None,
+                         seconds=round(time.perf_counter() - start, 3))
+            save_batch(batch)
+            if not ok:
+                raise RuntimeError(f"Batch {batch['batch']} reverted ({batch['txHash']})")
+    return batches
+
+
+# === PROOFS ===
+def prove(hospital_name, cid, student=None):
+    """Proof of the newest batched report with `cid` (and `student`), or None if it was never sealed."""
+    key = wallet_key(student) if student else None
+    for batch in reversed(list_batches(hospital_name)):
+        for index, report in enumerate(batch['reports']):
+            if report['cid'] != cid or (key is not None and wallet_key(report['studentAddress']) != key):
+                continue
+            levels = tree_levels([leaf(r) for r in batch['reports']])
+            return {'batch': batch['batch'], 'batchId': batch['batchId'], 'status': batch['status'],
+                    'root': batch['root'], 'report': report, 'index': index,
+                    'leaf': '0x' + levels[0][index].hex(),
+                    'proof': ['0x' + h.hex() for h in proof(levels, index)]}
+    return None
+
+
+def verify_proof(p):
+    """Check a prove() result against its batch root locally."""
+    return verify(leaf(p['report']), [bytes.fromhex(h[2:]) for h in p['proof']], bytes.fromhex(p['root'][2:]))
+
+
+def verify_on_chain(contract, hospital_name, p):
+    """Check a prove() result against the root anchored on chain (the batch must be anchored)."""
+    return contract.functions.verifyReportProof(hospital_name, p['batchId'], bytes.fromhex(p['leaf'][2:]),
+                                                [bytes.fromhex(h[2:]) for h in p['proof']]).call()
+
+
+def summary(hospital_name):
+    """Pending / sealed / anchored report counts and gas per anchored report."""
+    batches = list_batches(hospital_name)
+    anchored = [b for b in batches if b['status'] == ANCHORED]
+    reports = sum(b['count'] for b in anchored)
+    return {
+        'pending': len(pending(hospital_name)),
+        'batches': len(batches),
+        'sealed': sum(b['count'] for b in batches if b['status'] != ANCHORED),
+        'anchored': reports,
+        'gasPerReport': round(sum(b['gasUsed'] for b in anchored) / reports) if reports else None,
+    }
+
+
+def batches_frame(hospital_name):
+    """One display row per batch."""
+    import pandas as pd
+    return pd.DataFrame([{"Batch": b['batch'], "Reports": b['count'], "Root": b['root'], "Status": b['status'],
+                          "Chain Batch Id": b['batchId'], "Gas Used": b['gasUsed'],
+                          "Gas / Report": round(b['gasUsed'] / b['count']) if b['gasUsed'] else None,
+                          "Tx Hash": b['txHash']} for b in list_batches(hospital_name)],
+                        columns=["Batch", "Reports", "Root", "Status", "Chain Batch Id", "Gas Used", "Gas / Report",
+                                 "Tx Hash"])
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Inspect Merkle-anchored health report batches")
+    sub = parser.add_subparsers(dest="command", required=True)
+    status_cmd = sub.add_parser("status")
+    status_cmd.add_argument("hospital")
+    prove_cmd = sub.add_parser("prove")
+    prove_cmd.add_argument("hospital")
+    prove_cmd.add_argument("cid")
+    prove_cmd.add_argument("--student")
+    args = parser.parse_args()
+
+    if args.command == "status":
+        print(summary(args.hospital))
+        print(batches_frame(args.hospital).drop(columns=["Root", "Tx Hash"]).to_string(index=False))
+    else:
+        p = prove(args.hospital, args.cid, args.student)
+        if p is None:
+            print(f"no batched report {args.cid} for {args.hospital}")
+        else:
+            print(json.dumps({**p, 'valid': verify_proof(p)}, indent=1))
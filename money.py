@@ -0,0 +1,102 @@
+"""
+Exact Wei Arithmetic
+====================
+- ETH <-> wei conversion through Decimal/int only (no float64 round-trips).
+- Vectorized exact sums: a wei column is split into two int64 limbs
+  (gwei, remainder wei) so totals are numpy sums with no precision loss,
+  even when single amounts or totals overflow uint64.
+"""
+
+from decimal import Decimal, InvalidOperation, ROUND_DOWN
+import numpy as np
+import pandas as pd
+
+WEI_PER_ETH = 10 ** 18
+LIMB = 10 ** 9  # wei per gwei: low limb holds 0..LIMB-1 wei
+
+
+def parse_eth(value):
+    """Exact wei for an ETH amount given as str/Decimal/int/float (float via its shortest repr)."""
+    try:
+        amount = Decimal(str(value).strip())
+    except InvalidOperation:
+        raise ValueError(f"Invalid ETH amount: {value}")
+    if not amount.is_finite() or amount < 0:
+        raise ValueError(f"Invalid ETH amount: {value}")
+    return int((amount * WEI_PER_ETH).to_integral_value(rounding=ROUND_DOWN))
+
+
+def format_eth(wei):
+    """Exact decimal ETH string for an integer wei amount."""
+    whole, frac = divmod(int(wei), WEI_PER_ETH)
+    if frac == 0:
+        return str(whole)
+    return f"{whole}.{frac:018d}".rstrip('0')
+
+
+def wei_limbs(values):
+    """(gwei, wei remainder) int64 arrays for a wei column (uint64 or Python ints)."""
+    values = pd.Series(values)
+    if values.dtype == object:
+        pairs = np.array([divmod(int(v), LIMB) for v in values], dtype=np.int64).reshape(-1, 2)
+        return pairs[:, 0], pairs[:, 1]
+    arr = values.to_numpy(dtype=np.uint64)
+    return (arr // LIMB).astype(np.int64), (arr % LIMB).astype(np.int64)
+
+
+def join_limbs(hi, lo):
+    """Exact Python int from summed limbs."""
+    return int(hi) * LIMB + int(lo)
+
+
+def sum_wei(values):
+    """Exact total of a wei column."""
+    hi, lo = wei_limbs(values)
+    return join_limbs(hi.sum(), lo.sum())
+
+
+def sum_wei_by(df, by, col):
+    """Exact per-group wei totals in one groupby pass (Series of Python ints)."""
+    hi, lo = wei_limbs(df[col])
+    limbs = pd.DataFrame({'_hi': hi, '_lo': lo}, index=df.index)
+    for key in ([by] if isinstance(by, str) else by):
+        limbs[key] = df[key]
+    sums = limbs.groupby(by, observed=True)[['_hi', '_lo']].sum()
+    return pd.Series([join_limbs(h, l) for h, l in zip(sums['_hi'], sums['_lo'])],
+                     index=sums.index, dtype=object, name=col)
+
+
+def format_eth_column(values):
+    """Exact ETH strings for a wei column, computed on the limbs."""
+    hi, lo = wei_limbs(values)
+    whole = hi // LIMB
+    frac = (hi % LIMB) * LIMB + lo
+    frac_str = pd.Series(frac).astype(str).str.zfill(18).str.rstrip('0')
+    out = pd.Series(whole).astype(str) + ('.' + frac_str).where(frac_str != '', '')
+    out.index = pd.Series(values).index
+    return out
+
+
+def assign_wei(df, mask, col, wei):
+    """Set `col` to `wei` where `mask`; widens a uint64 column to Python ints if needed."""
+    if wei > np.iinfo(np.uint64).max and df[col].dtype != object:
+        df[col] = df[col].astype(object).map(int)
+    df.loc[mask, col] = wei
+    return df
+
+
+def payroll_totals(staff_df, salary_df):
+    """
+    Per-hospital payroll summary over the whole staff table in one pass:
+    staff count, staff with a salary set, and the exact monthly total in wei.
+    """
+    keys = ['hospitalName', 'staffAddressKey']
+    # Inner join keeps salaryWei free of NaN, so it never falls back to float64
+    paid = salary_df[keys + ['salaryWei']].merge(staff_df[keys], on=keys, how='inner')
+    summary = pd.DataFrame({'staff': staff_df.groupby('hospitalName', observed=True).size()})
+    summary['withSalary'] = paid.groupby('hospitalName', observed=True).size()
+    summary['totalWei'] = sum_wei_by(paid, 'hospitalName', 'salaryWei')
+    summary['withSalary'] = summary['withSalary'].fillna(0).astype(np.int64)
+    summary['totalWei'] = summary['totalWei'].map(lambda v: 0 if pd.isna(v) else v).astype(object)
+    summary['totalEth'] = summary['totalWei'].map(format_eth)
+    return summary.rename_axis('hospitalName').reset_index()
@@ -0,0 +1,257 @@
+"""
+Parallel All-College Analytics
+==============================
+- Cross-college comparison of every institution in students.csv/grades.csv:
+  subject averages, department distributions, year progressions and summary
+  stats per college.
+- The parent encodes the tables once into compact numpy columns sorted by
+  college (category codes, uint8 marks/years, 20-byte wallet keys) and places
+  them in one shared-memory block; pool workers attach to it once and each
+  computes a contiguous range of colleges, so no table is pickled per task.
+- PORTAL_WORKERS sets the pool size (default: all cores; 1 runs in-process);
+  tables under PORTAL_PARALLEL_MIN_ROWS grade rows are computed in-process.
+
+    python parallel.py --workers 1,2,4      # time the report on the CSVs in the current directory
+"""
+
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from tracing import span, traced
+
+WORKERS = int(os.environ.get("PORTAL_WORKERS", "0")) or os.cpu_count() or 1
+START_METHOD = os.environ.get("PORTAL_MP_START", "spawn")  # never fork a threaded Streamlit server
+MIN_POOL_ROWS = int(os.environ.get("PORTAL_PARALLEL_MIN_ROWS", "1000000"))  # below this, spawning costs more than it saves
+TASKS_PER_WORKER = 4   # smaller tasks even out colleges of very different sizes
+MARK_BINS = 256        # marks are uint8 on chain
+
+_arrays = None         # worker-side views into the shared block
+_shm = None
+
+
+# === ENCODING (parent) ===
+def _codes(series, labels):
+    """Position of each value in `labels` (-1 if missing); categoricals remap their codes, no string work."""
+    import pandas as pd
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        remap = pd.Index(labels, dtype=object).get_indexer(series.cat.categories.astype(object)).astype(np.int32)
+        codes = series.cat.codes.to_numpy()
+        return np.where(codes >= 0, remap[codes], -1).astype(np.int32)
+    return pd.Categorical(series.astype(object), categories=labels).codes.astype(np.int32)
+
+
+def _labels(*columns):
+    return sorted({v for col in columns for v in col.dropna().unique()}, key=str)
+
+
+def encode(students, grades):
+    """Numpy columns of both tables sorted by college, plus the label lists behind every code."""
+    from wallets import key_array
+
+    colleges = _labels(students['collegeName'], grades['collegeName'])
+    labels = {'college': colleges,
+              'department': _labels(students['department']),
+              'subject': _labels(grades['subject'])}
+    grades = grades[grades['marks'].notna()]
+
+    s_college = _codes(students['collegeName'], colleges)
+    g_college = _codes(grades['collegeName'], colleges)
+    s_order = np.argsort(s_college, kind='stable')
+    g_order = np.argsort(g_college, kind='stable')
+    arrays = {
+        's_key': key_array(students['walletKey'])[s_order],
+        's_dept': _codes(students['department'], labels['department'])[s_order],
+        's_year': students['year'].fillna(0).to_numpy(dtype=np.uint8)[s_order],
+        'g_key': key_array(grades['walletKey'])[g_order],
+        'g_subject': _codes(grades['subject'], labels['subject'])[g_order],
+        'g_marks': grades['marks'].to_numpy(dtype=np.uint8)[g_order],
+        # row ranges of college i: [bounds[i], bounds[i + 1])
+        's_bounds': np.searchsorted(s_college[s_order], np.arange(len(colleges) + 1)).astype(np.int64),
+        'g_bounds': np.searchsorted(g_college[g_order], np.arange(len(colleges) + 1)).astype(np.int64),
+    }
+    return arrays, labels
+
+
+def to_shared(arrays):
+    """Copy `arrays` into one SharedMemory block; returns (block, layout) for attach()."""
+    layout, offset = {}, 0
+    for name, arr in arrays.items():
+        offset = (offset + 63) // 64 * 64
+        layout[name] = (arr.dtype.str, arr.shape, offset)
+        offset += arr.nbytes
+    shm = shared_memory.SharedMemory(create=True, size=max(offset, 1))
+    for name, arr in arrays.items():
+        dtype, shape, start = layout[name]
+        np.ndarray(shape, dtype=dtype, buffer=shm.buf, offset=start)[...] = arr
+    return shm, layout
+
+
+def attach(shm_name, layout):
+    """Worker initializer: map the parent's shared block as read-only arrays."""
+    global _arrays, _shm
+    _shm = shared_memory.SharedMemory(name=shm_name)
+    _arrays = {}
+    for name, (dtype, shape, start) in layout.items():
+        view = np.ndarray(shape, dtype=dtype, buffer=_shm.buf, offset=start)
+        view.flags.writeable = False
+        _arrays[name] = view
+
+
+# === PER-COLLEGE KERNEL (worker) ===
+def college_partials(arrays, i, n_subjects, n_departments):
+    """Sums and counts of college `i`; small arrays only, merged by the parent."""
+    s = slice(arrays['s_bounds'][i], arrays['s_bounds'][i + 1])
+    g = slice(arrays['g_bounds'][i], arrays['g_bounds'][i + 1])
+    s_key, s_dept, s_year = arrays['s_key'][s], arrays['s_dept'][s], arrays['s_year'][s]
+    g_key, subject = arrays['g_key'][g], arrays['g_subject'][g]
+    marks = arrays['g_marks'][g].astype(np.int64)
+
+    # Join grades to the college's students on wallet key (first matching student, like a merge on walletKey)
+    if len(s_key):
+        order = np.argsort(s_key, kind='stable')
+        sorted_keys = s_key[order]
+        pos = np.minimum(np.searchsorted(sorted_keys, g_key), len(order) - 1)
+        row = order[pos]
+        dept = np.where(sorted_keys[pos] == g_key, s_dept[row], -1)
+        year = s_year[row]
+    else:
+        dept = np.full(len(g_key), -1, dtype=np.int32)
+        year = np.zeros(len(g_key), dtype=np.uint8)
+    joined = dept >= 0
+    cell = year[joined].astype(np.int64) * n_departments + dept[joined]
+    cell_sum = np.bincount(cell, weights=marks[joined], minlength=MARK_BINS * n_departments)
+    cell_count = np.bincount(cell, minlength=MARK_BINS * n_departments)
+    cells = np.flatnonzero(cell_count)
+
+    known = subject >= 0
+    return {
+        'college': i,
+        'students': int(len(s_key)),
+        'departments': int(len(np.unique(s_dept[s_dept >= 0]))),
+        'department_counts': np.bincount(s_dept[s_dept >= 0], minlength=n_departments),
+        'subject_sum': np.bincount(subject[known], weights=marks[known], minlength=n_subjects),
+        'subject_count': np.bincount(subject[known], minlength=n_subjects),
+        'hist': np.bincount(marks, minlength=MARK_BINS),
+        'year_dept': (cells // n_departments, cells % n_departments, cell_sum[cells], cell_count[cells]),
+    }
+
+
+def run_range(task):
+    """Worker entry point: partials for colleges [start, end)."""
+    start, end, n_subjects, n_departments = task
+    return [college_partials(_arrays, i, n_subjects, n_departments) for i in range(start, end)]
+
+
+def plan_tasks(bounds, parts):
+    """Split colleges into about `parts` contiguous ranges of similar grade-row counts."""
+    n = len(bounds) - 1
+    if n <= 0:
+        return []
+    targets = np.linspace(0, bounds[-1], parts + 1)[1:-1]
+    cuts = sorted({int(c) for c in np.searchsorted(bounds[1:], targets) + 1 if 0 < c < n})
+    edges = [0] + cuts + [n]
+    return list(zip(edges[:-1], edges[1:]))
+
+
+# === MERGE (parent) ===
+def _median(hist):
+    n = int(hist.sum())
+    cumulative = np.cumsum(hist)
+    return (int(np.searchsorted(cumulative, (n - 1) // 2 + 1)) + int(np.searchsorted(cumulative, n // 2 + 1))) / 2
+
+
+def merge(partials, labels, faculty_counts):
+    """Comparison tables: summary stats, subject averages, department counts and year progression."""
+    import pandas as pd
+
+    colleges, departments, subjects = labels['college'], labels['department'], labels['subject']
+    partials = sorted(partials, key=lambda p: p['college'])
+    index = pd.Index([colleges[p['college']] for p in partials], name='college')
+
+    rows, progression = [], []
+    for p in partials:
+        graded = int(p['hist'].sum())
+        present = np.flatnonzero(p['hist'])
+        rows.append({
+            "total_students": p['students'],
+            "total_faculty": int(faculty_counts.get(colleges[p['college']], 0)),
+            "departments": p['departments'],
+            "subjects": int((p['subject_count'] > 0).sum()),
+            "grades": graded,
+            "average_mark": round(float(p['subject_sum'].sum()) / graded, 2) if graded else np.nan,
+            "median_mark": round(_median(p['hist']), 2) if graded else np.nan,
+            "max_mark": int(present[-1]) if graded else np.nan,
+            "min_mark": int(present[0]) if graded else np.nan,
+        })
+        years, depts, sums, counts = p['year_dept']
+        progression += [(colleges[p['college']], int(y), departments[d], s / c, int(c))
+                        for y, d, s, c in zip(years, depts, sums, counts)]
+
+    sums = np.array([p['subject_sum'] for p in partials]).reshape(len(partials), len(subjects))
+    counts = np.array([p['subject_count'] for p in partials]).reshape(len(partials), len(subjects))
+    with np.errstate(invalid='ignore', divide='ignore'):
+        averages = np.where(counts > 0, sums / counts, np.nan)
+    dept_counts = np.array([p['department_counts'] for p in partials]).reshape(len(partials), len(departments))
+    return {
+        'summary': pd.DataFrame(rows, index=index),
+        'subject_averages': pd.DataFrame(averages, index=index, columns=pd.Index(subjects, name='subject')),
+        'department_counts': pd.DataFrame(dept_counts, index=index, columns=pd.Index(departments, name='department')),
+        'year_progression': pd.DataFrame(progression, columns=['college', 'year', 'department', 'marks', 'grades']),
+    }
+
+
+@traced()
+def all_college_report(students, grades, faculty, workers=None):
+    """Per-college comparison over all colleges, computed by a process pool over shared memory.
+
+    `workers` overrides the pool size (and the small-table threshold); 1 computes in-process.
+    """
+    workers = workers or (WORKERS if len(grades) >= MIN_POOL_ROWS else 1)
+    with span("parallel.encode", rows=len(grades)):
+        arrays, labels = encode(students, grades)
+    n_colleges = len(labels['college'])
+    shape = (len(labels['subject']), len(labels['department']))
+    tasks = [(start, end) + shape for start, end in
+             plan_tasks(arrays['g_bounds'], max(1, workers * TASKS_PER_WORKER))]
+
+    if workers <= 1 or len(tasks) <= 1:
+        with span("parallel.compute", workers=1):
+            partials = [college_partials(arrays, i, *shape) for i in range(n_colleges)]
+    else:
+        shm, layout = to_shared(arrays)
+        try:
+            ctx = multiprocessing.get_context(START_METHOD)
+            with span("parallel.compute", workers=workers), \
+                    ProcessPoolExecutor(workers, mp_context=ctx, initializer=attach,
+                                        initargs=(shm.name, layout)) as pool:
+                partials = [p for batch in pool.map(run_range, tasks) for p in batch]
+        finally:
+            shm.close()
+            shm.unlink()
+    faculty_counts = faculty['collegeName'].astype(object).value_counts().to_dict()
+    with span("parallel.merge"):
+        return merge(partials, labels, faculty_counts)
+
+
+if __name__ == "__main__":
+    import argparse
+    from schema import load_table
+
+    parser = argparse.ArgumentParser(description="Time the all-college report for several pool sizes")
+    parser.add_argument("--workers", default="1,2,4", help="comma-separated pool sizes")
+    args = parser.parse_args()
+
+    students, grades, faculty = load_table('students.csv'), load_table('grades.csv'), load_table('faculty.csv')
+    print(f"{len(students)} students, {len(grades)} grades, {os.cpu_count()} cores")
+    base = None
+    for n in [int(w) for w in args.workers.split(',')]:
+        start = time.perf_counter()
+        report = all_college_report(students, grades, faculty, workers=n)
+        seconds = time.perf_counter() - start
+        base = base or seconds
+        print(f"workers={n:<3} {seconds:8.3f} s  speedup {base / seconds:5.2f}x  colleges {len(report['summary'])}")
@@ -0,0 +1,292 @@
+"""
+Payroll Runs
+============
+- Pays a hospital's staff their monthly salary: the pay lines (active staff
+  with a salary) come from staff.csv + salary.csv in one merge, or from the
+  contract's staff list, and are paid through `paySalaries`, one multi-send
+  transaction per batch sized under the block gas limit.
+- Idempotent: a run is identified by (hospital, period), so starting the same
+  period again resumes the existing run instead of paying twice; the contract
+  also refuses a (run, batch) it has already paid.
+- Resumable: every run keeps a JSON log under payroll/ (batches, tx hashes,
+  gas used, timings) written after each batch; an interrupted run continues
+  at the first batch that is not confirmed.
+- In CSV mode no ETH moves: the run is planned and its batches are recorded
+  in the log, as a dry run of the on-chain payroll.
+
+    python payroll.py plan "City Hospital" 2026-10    # compute and log a CSV run
+    python payroll.py status "City Hospital" 2026-10 --mode chain
+    python payroll.py list
+"""
+
+import glob
+import hashlib
+import json
+import os
+import time
+from datetime import datetime
+
+import pandas as pd
+
+from batching import CallReverted, estimate_gas, send_call, plan_chunk_size, BASE_TX_GAS, PAY_GAS, MAX_CHUNK_SIZE
+from money import format_eth
+from points_ledger import file_lock
+from report_scheduler import slug
+from tracing import span, traced
+from wallets import checksum_addresses
+
+PAYROLL_DIR = os.environ.get("PORTAL_PAYROLL_DIR", "payroll")
+STAFF_CSV = "staff.csv"
+SALARY_CSV = "salary.csv"
+RECEIPT_TIMEOUT = 120   # seconds to wait for a batch to be mined
+STAFF_PAGE = 500        # staff records per getStaffRange call
+PAID, RECORDED = 'paid', 'recorded'
+
+
+# === PAY LINES ===
+def csv_lines(staff_df, salary_df, hospital_name):
+    """Pay lines of one hospital from the CSV tables: staff with a non-zero salary, in staff order."""
+    keys = ['hospitalName', 'staffAddressKey']
+    staff = staff_df[(staff_df['hospitalName'] == hospital_name) & staff_df['staffAddressKey'].notna()]
+    salary = salary_df.loc[salary_df['hospitalName'] == hospital_name, keys + ['salaryWei']]
+    lines = staff[keys + ['staffName', 'staffRole']].merge(salary, on=keys, how='inner')
+    lines = lines[lines['salaryWei'] > 0].drop_duplicates('staffAddressKey')
+    lines['staffAddress'] = checksum_addresses(lines['staffAddressKey'])
+    return lines[['staffAddress', 'staffName', 'staffRole', 'salaryWei']].reset_index(drop=True)
+
+
+@traced()
+def chain_lines(contract, hospital_name):
+    """Pay lines of one hospital from the contract: active staff with a non-zero salary."""
+    count = contract.functions.getStaffCount(hospital_name).call()
+    records = []
+    for offset in range(0, count, STAFF_PAGE):
+        records += contract.functions.getStaffRange(hospital_name, offset, STAFF_PAGE).call()
+    lines = pd.DataFrame(records, columns=['staffAddress', 'staffName', 'staffRole', 'salaryWei', 'active'])
+    lines['salaryWei'] = lines['salaryWei'].astype(object)
+    lines = lines[lines['active'].astype(bool) & (lines['salaryWei'] > 0).astype(bool)]
+    return lines[['staffAddress', 'staffName', 'staffRole', 'salaryWei']].reset_index(drop=True)
+
+
+def lines_digest(lines):
+    """Stable digest of (address, wei) pay lines, to tell a resumed run from a changed one."""
+    digest = hashlib.blake2b(digest_size=16)
+    for address, wei in zip(lines['staffAddress'], lines['salaryWei']):
+        digest.update(f"{str(address).lower()}:{int(wei)}\n".encode())
+    return digest.hexdigest()
+
+
+# === RUN LOG ===
+def run_id(hospital_name, period):
+    return f"{hospital_name}:{period}"
+
+
+def chain_run_id(run):
+    """bytes32 id of a run on chain."""
+    from eth_hash.auto import keccak
+    return keccak(run['runId'].encode('utf-8'))
+
+
+def run_path(hospital_name, period, mode):
+    """Log of one run; CSV dry runs are kept apart so they never block the on-chain run of a period."""
+    return os.path.join(PAYROLL_DIR, slug(hospital_name), f"{period}.{mode}.json")
+
+
+def load_run(hospital_name, period, mode):
+    try:
+        with open(run_path(hospital_name, period, mode), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def save_run(run):
+    path = run_path(run['hospitalName'], run['period'], run['mode'])
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(run, f, indent=1)
+    os.replace(path + ".tmp", path)
+
+
+def list_runs(hospital_name=None):
+    """Every run log (of one hospital), newest period first."""
+    pattern = os.path.join(PAYROLL_DIR, slug(hospital_name) if hospital_name else "*", "*.*.json")
+    runs = []
+    for path in glob.glob(pattern):
+        with open(path, encoding="utf-8") as f:
+            runs.append(json.load(f))
+    return sorted(runs, key=lambda r: (r['period'], r['hospitalName']), reverse=True)
+
+
+def plan(hospital_name, period, lines, batch_size, mode):
+    """The run of (hospital, period): the existing log if there is one, else a new one split into batches.
+
+    Raises ValueError if the period was already planned with different pay lines.
+    """
+    digest = lines_digest(lines)
+    path = os.path.abspath(run_path(hospital_name, period, mode))
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with file_lock(path):
+        run = load_run(hospital_name, period, mode)
+        if run is not None:
+            if run['linesDigest'] != digest:
+                raise ValueError(f"Payroll {run['runId']} was already planned with other salaries "
+                                 f"({run['payees']} payees, {format_eth(int(run['totalWei']))} ETH)")
+            return run
+        payees = [[str(a), int(w)] for a, w in zip(lines['staffAddress'], lines['salaryWei'])]
+        batches = []
+        for i, start in enumerate(range(0, len(payees), batch_size)):
+            chunk = payees[start:start + batch_size]
+            batches.append({'batch': i, 'payees': [[a, str(w)] for a, w in chunk],
+                            'totalWei': str(sum(w for _, w in chunk)), 'status': 'pending',
+                            'txHash': None, 'gasUsed': None, 'seconds': None})
+        run = {'runId': run_id(hospital_name, period), 'hospitalName': hospital_name, 'period': period,
+               'mode': mode, 'created': datetime.now().isoformat(timespec='seconds'), 'linesDigest': digest,
+               'payees': len(payees), 'totalWei': str(sum(w for _, w in payees)), 'batches': batches}
+        save_run(run)
+        return run
+
+
+def chain_batch_size(w3):
+    return plan_chunk_size(w3, PAY_GAS)[0]
+
+
+# === EXECUTION ===
+def _pay_call(w3, contract, run, batch):
+    addresses = [w3.to_checksum_address(a) for a, _ in batch['payees']]
+    amounts = [int(w) for _, w in batch['payees']]
+    return contract.functions.paySalaries(run['hospitalName'], chain_run_id(run), batch['batch'], addresses, amounts)
+
+
+def _fallback_gas(batch):
+    return BASE_TX_GAS + PAY_GAS * len(batch['payees'])
+
+
+def _preflight(run, w3, contract, account):
+    """Gas limit of every batch still to be sent; CallReverted (before anything is paid) if one would revert."""
+    rid = chain_run_id(run)
+    gas = {}
+    for batch in run['batches']:
+        if batch['status'] in (PAID, 'sent'):
+            continue
+        if contract.functions.isSalaryBatchPaid(run['hospitalName'], rid, batch['batch']).call():
+            continue
+        try:
+            gas[batch['batch']] = estimate_gas(_pay_call(w3, contract, run, batch),
+                                               {"from": account.address, "value": int(batch['totalWei'])},
+                                               _fallback_gas(batch))
+        except CallReverted as e:
+            raise CallReverted(f"Batch {batch['batch']}: {e}") from None
+    return gas
+
+
+def _receipt(w3, tx_hash, timeout=0):
+    try:
+        if timeout:
+            return w3.eth.wait_for_transaction_receipt(tx_hash, timeout=timeout)
+        return w3.eth.get_transaction_receipt(tx_hash)
+    except Exception:
+        return None
+
+
+@traced()
+def execute(run, w3, contract, priv_key, gas_price_gwei=2):
+    """Pay every batch of `run` not yet confirmed, saving the log after each step; returns summary(run).
+
+    A batch left 'sent' by an interrupted run is confirmed from its receipt, or
+    found paid on chain, before anything is resent. Every batch still to be
+    sent is gas-estimated first: if one would revert (payee not active staff,
+    wrong value, not hospital staff), CallReverted is raised and nothing is paid.
+    """
+    account = w3.eth.account.from_key(priv_key)
+    rid = chain_run_id(run)
+    gas = _preflight(run, w3, contract, account)
+    for batch in run['batches']:
+        if batch['status'] == PAID:
+            continue
+        start = time.perf_counter()
+        receipt = _receipt(w3, batch['txHash']) if batch['status'] == 'sent' else None
+        if receipt is None and contract.functions.isSalaryBatchPaid(run['hospitalName'], rid, batch['batch']).call():
+            batch.update(status=PAID, seconds=0.0)
+            save_run(run)
+            continue
+        if receipt is None:
+            nonce = w3.eth.get_transaction_count(account.address, 'pending')
+            with span("payroll.batch", payees=len(batch['payees'])):
+                batch['txHash'], _ = send_call(w3, priv_key, _pay_call(w3, contract, run, batch), _fallback_gas(batch),
+                                               nonce, int(batch['totalWei']), gas.get(batch['batch']), gas_price_gwei)
+                batch['status'] = 'sent'
+                save_run(run)   # a crash from here on resumes from the receipt
+                receipt = _receipt(w3, batch['txHash'], RECEIPT_TIMEOUT)
+        if receipt is None:
+            save_run(run)
+            raise TimeoutError(f"Batch {batch['batch']} not mined yet ({batch['txHash']}); resume the run later")
+        batch.update(status=PAID if receipt['status'] == 1 else 'failed', gasUsed=int(receipt['gasUsed']),
+                     seconds=round(time.perf_counter() - start, 3))
+        save_run(run)
+        if batch['status'] == 'failed':
+            raise RuntimeError(f"Batch {batch['batch']} reverted ({batch['txHash']})")
+    return summary(run)
+
+
+@traced()
+def record(run):
+    """CSV mode: mark every pending batch recorded (no ETH moves); returns summary(run)."""
+    for batch in run['batches']:
+        if batch['status'] != RECORDED:
+            batch['status'] = RECORDED
+    save_run(run)
+    return summary(run)
+
+
+def summary(run):
+    """Progress, throughput and gas per payee of a run."""
+    done = [b for b in run['batches'] if b['status'] in (PAID, RECORDED)]
+    measured = [b for b in done if b['gasUsed']]
+    paid_payees = sum(len(b['payees']) for b in done)
+    seconds = sum(b['seconds'] or 0 for b in done)
+    return {
+        'runId': run['runId'], 'mode': run['mode'],
+        'batches': len(run['batches']), 'batchesDone': len(done),
+        'payees': run['payees'], 'payeesDone': paid_payees,
+        'totalEth': format_eth(int(run['totalWei'])),
+        'paidEth': format_eth(sum(int(b['totalWei']) for b in done)),
+        'seconds': round(seconds, 3),
+        'payeesPerSecond': round(paid_payees / seconds, 1) if seconds else None,
+        'gasPerPayee': (round(sum(b['gasUsed'] for b in measured) / sum(len(b['payees']) for b in measured))
+                        if measured else None),
+        'complete': len(done) == len(run['batches']),
+    }
+
+
+def batches_frame(run):
+    """One display row per batch of a run."""
+    return pd.DataFrame([{"Batch": b['batch'], "Payees": len(b['payees']), "Amount (ETH)": format_eth(int(b['totalWei'])),
+                          "Status": b['status'], "Gas Used": b['gasUsed'], "Seconds": b['seconds'],
+                          "Tx Hash": b['txHash']} for b in run['batches']],
+                        columns=["Batch", "Payees", "Amount (ETH)", "Status", "Gas Used", "Seconds", "Tx Hash"])
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Plan and inspect hospital payroll runs")
+    sub = parser.add_subparsers(dest="command", required=True)
+    for name in ("plan", "status"):
+        cmd = sub.add_parser(name)
+        cmd.add_argument("hospital")
+        cmd.add_argument("period", nargs="?", default=datetime.now().strftime("%Y-%m"))
+        cmd.add_argument("--mode", choices=["csv", "chain"], default="csv")
+    sub.add_parser("list")
+    args = parser.parse_args()
+
+    if args.command == "plan":
+        from schema import load_table
+        lines = csv_lines(load_table(STAFF_CSV), load_table(SALARY_CSV), args.hospital)
+        print(summary(plan(args.hospital, args.period, lines, MAX_CHUNK_SIZE, 'csv')))
+    elif args.command == "status":
+        run = load_run(args.hospital, args.period, args.mode)
+        print(summary(run) if run else f"no payroll run for {args.hospital} {args.period}")
+    else:
+        for run in list_runs():
+            print(summary(run))
@@ -0,0 +1,379 @@
+"""
+Reward Points Ledger
+====================
+- Append-only journal of credits and debits (points_ledger.csv); every line
+  carries the running balance of its (college, wallet), so balances are never
+  recomputed from history.
+- Each process keeps a balance index and the journal offset it has read up
+  to; a lookup only parses lines appended since the last one.
+- Debits are compare-and-debit under an exclusive file lock: the balance is
+  re-read from the journal tail and checked before the line is appended, so
+  two concurrent redemptions cannot both spend the same points.
+- Every SNAPSHOT_EVERY entries the index is written to a snapshot, so a new
+  process loads balances without replaying the whole journal. The snapshot
+  holds balances only: startup cost follows the number of wallets, not the
+  length of the history.
+- Credits with a `ref` (e.g. one health report) are applied at most once.
+  Refs seen since the last snapshot are kept in memory; at each snapshot they
+  are appended to a refs index (points_ledger.refs, one per line), which is
+  only read on the first ref check of a process.
+- The first open seeds the journal with the balances in points.csv.
+
+    python points_ledger.py balance "TKM" 0x...       # current balance
+    python points_ledger.py history "TKM" 0x...       # journal entries of one student
+    python points_ledger.py snapshot                  # write a snapshot now
+"""
+
+import csv
+import io
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows: lock one byte of the lock file instead
+    fcntl = None
+    import msvcrt
+
+from wallets import wallet_key
+from tracing import span
+
+LEDGER_CSV = os.environ.get("PORTAL_POINTS_LEDGER", "points_ledger.csv")
+POINTS_CSV = "points.csv"   # legacy balances, imported once as opening entries
+SNAPSHOT_EVERY = 1000       # entries between snapshots
+COLUMNS = ['seq', 'collegeName', 'wallet', 'delta', 'balance', 'source', 'ref', 'timestamp']
+
+# Entry sources
+OPENING = 'opening'
+GRANT = 'grant'
+HEALTH_REPORT = 'health_report'
+REDEEM = 'redeem'
+
+_lock = threading.Lock()
+_states = {}                # abs journal path -> balance index, see _empty_state()
+
+
+def snapshot_path(path):
+    return os.path.splitext(path)[0] + ".snapshot.json"
+
+
+def refs_path(path):
+    return os.path.splitext(path)[0] + ".refs"
+
+
+def _empty_state():
+    # refs: refs of the index up to refs_size (None until first needed); new_refs: refs since the snapshot
+    return {'offset': 0, 'seq': 0, 'balances': {}, 'refs': set(), 'refs_size': 0, 'new_refs': set(),
+            'since_snapshot': 0}
+
+
+@contextmanager
+def file_lock(path):
+    """Exclusive lock shared by every process writing the journal at `path`."""
+    with open(path + ".lock", "a+b") as f:
+        if fcntl is not None:
+            fcntl.flock(f, fcntl.LOCK_EX)
+        else:
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_UN)
+            else:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def report_ref(hospital_name, cid, wallet):
+    """Idempotency ref of the credit for one health report."""
+    return f"report:{hospital_name}:{cid}:{_key('', wallet)[1].hex()}"
+
+
+def _key(college_name, wallet):
+    key = wallet_key(wallet) if isinstance(wallet, str) else wallet
+    if key is None:
+        raise ValueError(f"Invalid Ethereum address: {wallet}")
+    return college_name, key
+
+
+# === INDEX ===
+def _load_snapshot(path, size):
+    """Index from the snapshot, or an empty one if it is missing or ahead of the journal."""
+    try:
+        with open(snapshot_path(path), encoding="utf-8") as f:
+            snap = json.load(f)
+    except (OSError, ValueError):
+        return _empty_state()
+    if snap.get('offset', 0) > size:
+        return _empty_state()   # journal was replaced; replay it from the start
+    state = _empty_state()
+    state.update(offset=snap['offset'], seq=snap['seq'], refs=None, refs_size=snap.get('refs_size', 0),
+                 new_refs=set(snap.get('refs', ())),   # older snapshots carried every ref inline
+                 balances={(c, bytes.fromhex(w)): b for c, w, b in snap['balances']})
+    return state
+
+
+def _seen(path, state, ref):
+    """True if `ref` was already credited; reads the refs index on first use."""
+    if ref in state['new_refs']:
+        return True
+    if state['refs'] is None:
+        with span("ledger.load_refs"):
+            try:
+                with open(refs_path(path), 'rb') as f:
+                    data = f.read(state['refs_size'])
+            except FileNotFoundError:
+                data = b""
+            state['refs'] = set(data.decode('utf-8').splitlines())
+    return ref in state['refs']
+
+
+def _apply(state, row):
+    state['seq'] = int(row['seq'])
+    state['balances'][(row['collegeName'], wallet_key(row['wallet']))] = int(row['balance'])
+    if row['ref']:
+        state['new_refs'].add(row['ref'])
+
+
+def _read(path, offset):
+    """Complete journal rows after byte `offset`, and the offset just past them."""
+    size = os.path.getsize(path)
+    if size == offset:
+        return [], offset
+    with open(path, 'rb') as f:
+        f.seek(offset)
+        data = f.read(size - offset)
+    data = data[:data.rfind(b"\n") + 1]   # a line still being written waits for the next read
+    lines = data.decode('utf-8').splitlines()
+    if offset == 0:
+        lines = lines[1:]   # header
+    return list(csv.DictReader(lines, fieldnames=COLUMNS)), offset + len(data)
+
+
+def _sync(path, state):
+    """Apply the complete journal lines appended since the index was last synced."""
+    with span("ledger.sync"):
+        rows, state['offset'] = _read(path, state['offset'])
+        for row in rows:
+            _apply(state, row)
+        state['since_snapshot'] += len(rows)
+    return state
+
+
+def _state(path):
+    """Up-to-date index of the journal at `path` (created and seeded on first use)."""
+    path = os.path.abspath(path)
+    with _lock:
+        state = _states.get(path)
+        if state is None:
+            if not os.path.exists(path):
+                _create(path)
+            state = _states[path] = _load_snapshot(path, os.path.getsize(path))
+        elif os.path.getsize(path) < state['offset']:
+            state = _states[path] = _load_snapshot(path, os.path.getsize(path))
+        return _sync(path, state)
+
+
+def _create(path):
+    """New journal, opened with the balances of the legacy points.csv."""
+    with file_lock(path):
+        if os.path.exists(path):
+            return
+        opening = []
+        seed = os.path.join(os.path.dirname(path), POINTS_CSV)
+        if os.path.exists(seed):
+            with open(seed, newline='', encoding='utf-8') as f:
+                for row in csv.DictReader(f):
+                    key = wallet_key(row.get('wallet'))
+                    points = int(float(row.get('points') or 0))
+                    if key is not None and points > 0:
+                        opening.append((row['collegeName'], key, points))
+        buf = io.StringIO()
+        writer = csv.writer(buf, lineterminator="\n")
+        writer.writerow(COLUMNS)
+        now = int(time.time())
+        for seq, (college_name, key, points) in enumerate(opening, start=1):
+            writer.writerow([seq, college_name, '0x' + key.hex(), points, points, OPENING, '', now])
+        with open(path + ".tmp", 'w', newline='', encoding='utf-8') as f:
+            f.write(buf.getvalue())
+        os.replace(path + ".tmp", path)
+
+
+# === READS ===
+def balance(college_name, wallet, path=LEDGER_CSV):
+    """Current points of `wallet` in `college_name` (0 if it never received any)."""
+    return _state(path)['balances'].get(_key(college_name, wallet), 0)
+
+
+def has_ref(ref, path=LEDGER_CSV):
+    path = os.path.abspath(path)
+    state = _state(path)
+    with _lock:
+        return _seen(path, state, ref)
+
+
+def balances(path=LEDGER_CSV):
+    """(balances, offset): copy of the (college, key) -> balance index and the journal offset it covers."""
+    path = os.path.abspath(path)
+    state = _state(path)
+    with _lock:
+        return dict(state['balances']), state['offset']
+
+
+def entries_since(offset, path=LEDGER_CSV):
+    """(entries, new offset): journal entries appended after byte `offset` (0 = all).
+
+    Lets other indexes (e.g. leaderboard.py) follow balance changes without
+    re-reading the journal. An offset past the end means the journal was replaced.
+    """
+    path = os.path.abspath(path)
+    _state(path)
+    if offset > os.path.getsize(path):
+        raise ValueError("Ledger journal is shorter than the given offset")
+    return _read(path, offset)
+
+
+def history(college_name, wallet, path=LEDGER_CSV):
+    """Journal entries of one student, oldest first (scans the journal; for display only)."""
+    college_name, key = _key(college_name, wallet)
+    _state(path)
+    with open(path, newline='', encoding='utf-8') as f:
+        return [row for row in csv.DictReader(f)
+                if row['collegeName'] == college_name and wallet_key(row['wallet']) == key]
+
+
+# === WRITES ===
+def _append(path, state, entries):
+    """Append (college, key, delta, source, ref) entries with their running balances; lock held."""
+    buf = io.StringIO()
+    writer = csv.writer(buf, lineterminator="\n")
+    now = int(time.time())
+    rows = []
+    for college_name, key, delta, source, ref in entries:
+        new_balance = state['balances'].get((college_name, key), 0) + delta
+        row = {'seq': state['seq'] + 1, 'collegeName': college_name, 'wallet': '0x' + key.hex(),
+               'delta': delta, 'balance': new_balance, 'source': source, 'ref': ref or '', 'timestamp': now}
+        writer.writerow([row[c] for c in COLUMNS])
+        _apply(state, row)
+        rows.append(row)
+    data = buf.getvalue().encode('utf-8')
+    with span("ledger.append", entries=len(rows)):
+        with open(path, 'ab') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+    state['offset'] += len(data)
+    state['since_snapshot'] += len(rows)
+    if state['since_snapshot'] >= SNAPSHOT_EVERY:
+        _write_snapshot(path, state)
+    return rows
+
+
+def credit(college_name, wallet, points, source=GRANT, ref=None, path=LEDGER_CSV):
+    """Add `points`; returns the journal entry, or None if `ref` was already credited."""
+    return credit_many([(college_name, wallet, points, ref)], source, path)[0]
+
+
+def credit_many(credits, source, path=LEDGER_CSV):
+    """Apply (college, wallet, points, ref) credits in one locked append; already-seen refs give None."""
+    if any(int(points) <= 0 for _, _, points, _ in credits):
+        raise ValueError("Credited points must be positive.")
+    path = os.path.abspath(path)
+    state = _state(path)
+    with file_lock(path), _lock:
+        _sync(path, state)
+        fresh, seen, slots = [], set(), []
+        for college_name, wallet, points, ref in credits:
+            if ref and (ref in seen or _seen(path, state, ref)):
+                slots.append(None)
+                continue
+            seen.add(ref)
+            slots.append(len(fresh))
+            fresh.append(_key(college_name, wallet) + (int(points), source, ref))
+        rows = _append(path, state, fresh) if fresh else []
+    return [None if slot is None else rows[slot] for slot in slots]
+
+
+def redeem(college_name, wallet, points=None, expected=None, path=LEDGER_CSV):
+    """Compare-and-debit: spend `points` (default: the whole balance).
+
+    With `expected`, the debit only happens if the balance is still exactly
+    that value (what the student was shown). Returns (success, message).
+    """
+    path = os.path.abspath(path)
+    college_name, key = _key(college_name, wallet)
+    state = _state(path)
+    with file_lock(path), _lock:
+        _sync(path, state)
+        current = state['balances'].get((college_name, key), 0)
+        if expected is not None and current != expected:
+            return False, f"Your balance changed to {current} points; please review and try again."
+        amount = current if points is None else int(points)
+        if amount <= 0 or current <= 0:
+            return False, "No points available to redeem."
+        if amount > current:
+            return False, f"Only {current} points available."
+        _append(path, state, [(college_name, key, -amount, REDEEM, None)])
+    return True, f"Successfully redeemed {amount} points."
+
+
+# === SNAPSHOTS ===
+def _write_snapshot(path, state):
+    """Append the refs seen since the last snapshot to the refs index, then write the balances; lock held."""
+    if state['new_refs']:
+        data = "".join(ref + "\n" for ref in sorted(state['new_refs'])).encode('utf-8')
+        with open(refs_path(path), 'ab') as f:
+            f.truncate(state['refs_size'])   # drop lines of a snapshot that never got written
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        if state['refs'] is not None:
+            state['refs'] |= state['new_refs']
+        state['refs_size'] += len(data)
+        state['new_refs'] = set()
+    snap = {
+        'seq': state['seq'], 'offset': state['offset'], 'written_at': int(time.time()),
+        'refs_size': state['refs_size'],
+        'balances': [[c, k.hex(), b] for (c, k), b in state['balances'].items()],
+    }
+    target = snapshot_path(path)
+    with span("ledger.snapshot", balances=len(snap['balances'])):
+        with open(target + ".tmp", 'w', encoding='utf-8') as f:
+            json.dump(snap, f)
+        os.replace(target + ".tmp", target)
+    state['since_snapshot'] = 0
+
+
+def snapshot(path=LEDGER_CSV):
+    path = os.path.abspath(path)
+    state = _state(path)
+    with file_lock(path), _lock:
+        _write_snapshot(path, _sync(path, state))
+    return state['seq']
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Reward points ledger")
+    parser.add_argument("--ledger", default=LEDGER_CSV)
+    sub = parser.add_subparsers(dest="command", required=True)
+    for name in ("balance", "history"):
+        cmd = sub.add_parser(name)
+        cmd.add_argument("college")
+        cmd.add_argument("wallet")
+    sub.add_parser("snapshot")
+    args = parser.parse_args()
+
+    if args.command == "balance":
+        print(balance(args.college, args.wallet, args.ledger))
+    elif args.command == "history":
+        for row in history(args.college, args.wallet, args.ledger):
+            print(f"{row['seq']:>8} {row['source']:<14} {int(row['delta']):>+8} = {row['balance']:>8}  {row['ref']}")
+    else:
+        print(f"snapshot at entry {snapshot(args.ledger)}")
@@ -0,0 +1,216 @@
+"""
+Health Report Points Pipeline
+=============================
+- Folds the karma points of hospital health reports into the reward points
+  ledger (points_ledger.py), credited to the student's college.
+- Incremental: a checkpoint (points_pipeline.json) keeps the byte offset read
+  in reports.csv and the last block scanned for HealthReportSubmitted events,
+  so each run only reads what was added since the previous one.
+- Exactly-once: every report is credited with a ref (hospital, cid, student)
+  that the ledger applies at most once, and the checkpoint is advanced only
+  after the credits are written. A crash in between replays a few rows
+  without double-counting; a rewritten reports.csv is rescanned safely.
+- Reports for students not yet enrolled in any college are kept pending and
+  retried whenever students.csv changes.
+
+    python points_pipeline.py run               # fold new reports.csv rows
+    python points_pipeline.py run --events      # ...and new on-chain reports
+    python points_pipeline.py watch --every 30  # keep folding every 30 s
+"""
+
+import csv
+import io
+import json
+import os
+import time
+
+import points_ledger
+from wallets import wallet_key
+from tracing import span, traced
+
+REPORTS_CSV = "reports.csv"
+STUDENTS_CSV = "students.csv"
+CHECKPOINT = os.environ.get("PORTAL_POINTS_CHECKPOINT", "points_pipeline.json")
+BLOCK_BYTES = 8 << 20       # reports.csv bytes folded per ledger append / checkpoint
+TAIL_BYTES = 64             # bytes before the offset remembered to detect a rewritten file
+LOG_WINDOW = 2000           # blocks per eth_getLogs call
+NODE_URL = "http://127.0.0.1:8545"
+HEALTH_CONTRACT = "0xa513E6E4b8f2a923D98304ec87F64353C4D5C853"
+
+
+# === CHECKPOINT ===
+def load_checkpoint(path=CHECKPOINT):
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {'reports': {'offset': 0, 'tail': '', 'rows': 0}, 'events': {}, 'pending': []}
+
+
+def save_checkpoint(checkpoint, path=CHECKPOINT):
+    with open(path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(checkpoint, f, indent=1)
+    os.replace(path + ".tmp", path)
+
+
+# === CREDITS ===
+def student_colleges():
+    """Wallet key -> college of its first enrolment in students.csv."""
+    from schema import load_table
+    students = load_table(STUDENTS_CSV).drop_duplicates('walletKey')
+    return dict(zip(students['walletKey'], students['collegeName']))
+
+
+def fold(reports, colleges, pending):
+    """Credit (hospital, student, cid, points) reports; unenrolled students go to `pending`.
+
+    Returns the number of new ledger entries (already-credited refs are skipped).
+    """
+    credits = []
+    for hospital_name, student, cid, points in reports:
+        key = wallet_key(student) if isinstance(student, str) else student
+        if key is None or int(points) <= 0:
+            continue
+        if key not in colleges:
+            pending.append([hospital_name, key.hex(), cid, int(points)])
+            continue
+        credits.append((colleges[key], key, int(points), points_ledger.report_ref(hospital_name, cid, key)))
+    if not credits:
+        return 0
+    return sum(entry is not None for entry in points_ledger.credit_many(credits, points_ledger.HEALTH_REPORT))
+
+
+def _students_stamp():
+    stat = os.stat(STUDENTS_CSV) if os.path.exists(STUDENTS_CSV) else None
+    return [stat.st_mtime_ns, stat.st_size] if stat else None
+
+
+def _retry_pending(checkpoint, colleges=None):
+    """Credit pending reports whose students have enrolled since (only when students.csv changed)."""
+    stamp = _students_stamp()
+    if not checkpoint['pending'] or stamp == checkpoint.get('students'):
+        return 0
+    pending = {tuple(p) for p in checkpoint['pending']}
+    checkpoint['pending'], checkpoint['students'] = [], stamp
+    return fold([(h, bytes.fromhex(s), cid, p) for h, s, cid, p in sorted(pending)],
+                colleges or student_colleges(), checkpoint['pending'])
+
+
+# === reports.csv ===
+def _rewritten(f, cursor):
+    """True if the bytes before the checkpoint offset are not the ones we read last time."""
+    if cursor['offset'] == 0:
+        return False
+    start = max(cursor['offset'] - TAIL_BYTES, 0)
+    f.seek(start)
+    return f.read(cursor['offset'] - start).hex() != cursor['tail']
+
+
+def sync_reports(reports_csv=REPORTS_CSV, checkpoint_path=CHECKPOINT):
+    """Fold the reports.csv rows appended since the checkpoint; returns run stats."""
+    stats = {'rows': 0, 'credited': 0, 'pending': 0}
+    if not os.path.exists(reports_csv):
+        return stats
+    checkpoint = load_checkpoint(checkpoint_path)
+    stat = os.stat(reports_csv)
+    if ([stat.st_mtime_ns, stat.st_size] == [checkpoint['reports'].get('mtime_ns'), checkpoint['reports']['offset']]
+            and (not checkpoint['pending'] or _students_stamp() == checkpoint.get('students'))):
+        stats['pending'] = len(checkpoint['pending'])
+        return stats   # nothing new: no lock, no read
+    with points_ledger.file_lock(os.path.abspath(checkpoint_path)):
+        checkpoint = load_checkpoint(checkpoint_path)
+        cursor = checkpoint['reports']
+        size = os.path.getsize(reports_csv)
+        with open(reports_csv, 'rb') as f:
+            header = f.readline()
+            if size < cursor['offset'] or _rewritten(f, cursor):
+                cursor.update(offset=0, tail='', rows=0)   # refs keep the rescan exactly-once
+            offset = max(cursor['offset'], len(header))
+            colleges = None
+            while offset < size:
+                f.seek(offset)
+                block = f.read(min(BLOCK_BYTES, size - offset))
+                block = block[:block.rfind(b"\n") + 1]   # a half-written last line waits for the next run
+                if not block:
+                    break
+                if colleges is None:
+                    colleges = student_colleges()
+                with span("points.fold", bytes=len(block)):
+                    rows = list(csv.DictReader(io.StringIO((header + block).decode('utf-8'))))
+                    stats['credited'] += fold([(r['hospitalName'], r['studentAddress'], r['cid'], r['points'] or 0)
+                                               for r in rows], colleges, checkpoint['pending'])
+                offset += len(block)
+                stats['rows'] += len(rows)
+                start = max(offset - TAIL_BYTES, 0)
+                f.seek(start)
+                cursor.update(offset=offset, tail=f.read(offset - start).hex(), rows=cursor['rows'] + len(rows))
+                save_checkpoint(checkpoint, checkpoint_path)
+        if offset == size:
+            cursor['mtime_ns'] = os.stat(reports_csv).st_mtime_ns
+            save_checkpoint(checkpoint, checkpoint_path)
+        retried = _retry_pending(checkpoint, colleges)
+        if retried:
+            stats['credited'] += retried
+            save_checkpoint(checkpoint, checkpoint_path)
+        stats['pending'] = len(checkpoint['pending'])
+    return stats
+
+
+# === HealthReportSubmitted events ===
+@traced()
+def sync_events(w3, contract, checkpoint_path=CHECKPOINT, window=LOG_WINDOW):
+    """Fold HealthReportSubmitted events mined since the checkpoint block; returns run stats."""
+    stats = {'events': 0, 'credited': 0, 'pending': 0}
+    with points_ledger.file_lock(os.path.abspath(checkpoint_path)):
+        checkpoint = load_checkpoint(checkpoint_path)
+        cursors = checkpoint.setdefault('events', {})
+        latest = w3.eth.block_number
+        from_block = cursors.get(contract.address, -1) + 1
+        colleges = student_colleges()
+        while from_block <= latest:
+            to_block = min(latest, from_block + window - 1)
+            logs = contract.events.HealthReportSubmitted.get_logs(from_block=from_block, to_block=to_block)
+            stats['credited'] += fold([(e['args']['hospitalName'], e['args']['student'], e['args']['cid'],
+                                        e['args']['points']) for e in logs], colleges, checkpoint['pending'])
+            stats['events'] += len(logs)
+            cursors[contract.address] = to_block
+            save_checkpoint(checkpoint, checkpoint_path)
+            from_block = to_block + 1
+        retried = _retry_pending(checkpoint, colleges)
+        if retried:
+            stats['credited'] += retried
+            save_checkpoint(checkpoint, checkpoint_path)
+        stats['pending'] = len(checkpoint['pending'])
+    return stats
+
+
+def run(events=False):
+    stats = {'reports.csv': sync_reports()}
+    if events:
+        import contracts
+        w3, contract = contracts.connect(NODE_URL, "HealthPortal", HEALTH_CONTRACT)
+        if w3 is None:
+            print("blockchain node not reachable; events skipped")
+        else:
+            stats['events'] = sync_events(w3, contract)
+    return stats
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Fold health report points into the points ledger")
+    sub = parser.add_subparsers(dest="command", required=True)
+    run_cmd = sub.add_parser("run", help="fold everything new once")
+    watch_cmd = sub.add_parser("watch", help="fold on an interval until interrupted")
+    watch_cmd.add_argument("--every", type=float, default=30.0, help="seconds between runs")
+    for cmd in (run_cmd, watch_cmd):
+        cmd.add_argument("--events", action="store_true", help="also scan HealthReportSubmitted events")
+    args = parser.parse_args()
+
+    while True:
+        for source, result in run(args.events).items():
+            print(f"{source}: {result}")
+        if args.command == "run":
+            break
+        time.sleep(args.every)
@@ -0,0 +1,197 @@
+"""
+Sampling Profiler
+=================
+- Opt-in statistical profiler for Streamlit reruns: a daemon thread samples
+  the script thread's stack every few milliseconds (sys._current_frames),
+  so the page itself runs unmodified.
+- Enable per session with `?profile=1` on the home URL, or for every
+  session with PORTAL_PROFILE=1.
+- Stacks are saved in folded format (flamegraph.pl / speedscope ready) under
+  profiles/<page>/<data size>/<timestamp>.folded.
+
+    python profiler.py top profiles/hospital_admin/10MB/20250101-120000-1.folded
+    python profiler.py diff old.folded new.folded          # biggest shifts first
+    python profiler.py diff old.folded new.folded --folded # difffolded.pl output
+"""
+
+import math
+import os
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+PROFILE_DIR = os.environ.get("PORTAL_PROFILE_DIR", "profiles")
+INTERVAL = float(os.environ.get("PORTAL_PROFILE_INTERVAL", "0.005"))  # seconds between samples
+MAX_DEPTH = 128
+
+
+def enabled(query_params=None):
+    """Profiling requested by env flag or the `profile` query parameter."""
+    if os.environ.get("PORTAL_PROFILE") == "1":
+        return True
+    return query_params is not None and query_params.get("profile") == "1"
+
+
+def slug(label):
+    """'🏥 Hospital Admin' -> 'hospital_admin'."""
+    return re.sub(r"[^a-z0-9]+", "_", label.lower()).strip("_") or "page"
+
+
+def data_size_label(files):
+    """Order-of-magnitude size of the CSV tables, e.g. '10MB', so profiles group by data size."""
+    total = sum(os.path.getsize(f) for f in files if os.path.exists(f))
+    if total < 1024:
+        return "1KB"
+    exponent = int(math.log10(total))
+    for unit, scale in (("GB", 9), ("MB", 6), ("KB", 3)):
+        if exponent >= scale:
+            return f"{10 ** (exponent - scale)}{unit}"
+    return "1KB"
+
+
+def frame_label(code):
+    module = os.path.splitext(os.path.basename(code.co_filename))[0]
+    return f"{module}.{getattr(code, 'co_qualname', code.co_name)}"
+
+
+def fold(frame):
+    """Root-first 'a;b;c' stack of a frame."""
+    names = []
+    while frame is not None and len(names) < MAX_DEPTH:
+        names.append(frame_label(frame.f_code))
+        frame = frame.f_back
+    return ";".join(reversed(names))
+
+
+@contextmanager
+def sampling(thread_id=None, interval=INTERVAL):
+    """Sample `thread_id` (default: the calling thread) until the block exits; yields the Counter."""
+    target = thread_id or threading.get_ident()
+    stacks = Counter()
+    stop = threading.Event()
+
+    def sample():
+        while not stop.wait(interval):
+            frame = sys._current_frames().get(target)
+            if frame is not None:
+                stacks[fold(frame)] += 1
+
+    sampler = threading.Thread(target=sample, name="portal-profiler", daemon=True)
+    sampler.start()
+    try:
+        yield stacks
+    finally:
+        stop.set()
+        sampler.join()
+
+
+def trim_common_root(stacks):
+    """Drop the runner frames every sample shares, keeping the deepest shared frame as root."""
+    split = [stack.split(";") for stack in stacks]
+    shared = 0
+    while all(len(names) > shared + 1 for names in split) and len({names[shared] for names in split}) == 1:
+        shared += 1
+    if shared <= 1:
+        return stacks
+    return Counter({";".join(names[shared - 1:]): count for names, count in zip(split, stacks.values())})
+
+
+def save_folded(stacks, page, size_label, profile_dir=PROFILE_DIR):
+    stacks = trim_common_root(stacks)
+    folder = os.path.join(profile_dir, slug(page), size_label)
+    os.makedirs(folder, exist_ok=True)
+    path = os.path.join(folder, f"{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}.folded")
+    with open(path, "w", encoding="utf-8") as f:
+        for stack, count in stacks.most_common():
+            f.write(f"{stack} {count}\n")
+    return path
+
+
+@contextmanager
+def profile(page, size_label, profile_dir=PROFILE_DIR):
+    """Profile one rerun of `page`; yields a dict that gets 'path' and 'samples' on exit."""
+    result = {"path": None, "samples": 0}
+    stacks = None
+    try:
+        with sampling() as stacks:
+            yield result
+    finally:
+        # Saved even when the rerun ends in st.stop()/st.rerun() or an error
+        if stacks:
+            result["samples"] = sum(stacks.values())
+            result["path"] = save_folded(stacks, page, size_label, profile_dir)
+
+
+# === ANALYSIS ===
+def load_folded(path):
+    stacks = Counter()
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            stack, _, count = line.rstrip("\n").rpartition(" ")
+            if stack:
+                stacks[stack] += int(count)
+    return stacks
+
+
+def function_shares(stacks):
+    """Per function: share of samples where it is on the stack (inclusive) and on top (self)."""
+    total = sum(stacks.values()) or 1
+    inclusive, own = Counter(), Counter()
+    for stack, count in stacks.items():
+        names = stack.split(";")
+        for name in set(names):
+            inclusive[name] += count
+        own[names[-1]] += count
+    return ({k: v / total for k, v in inclusive.items()}, {k: v / total for k, v in own.items()})
+
+
+def top(stacks, n=25):
+    inclusive, own = function_shares(stacks)
+    print(f"{sum(stacks.values())} samples\n{'incl %':>8} {'self %':>8}  function")
+    for name in sorted(inclusive, key=inclusive.get, reverse=True)[:n]:
+        print(f"{inclusive[name] * 100:8.1f} {own.get(name, 0) * 100:8.1f}  {name}")
+
+
+def diff(old, new, n=25):
+    """Functions whose share of samples moved the most between two profiles."""
+    old_incl, old_self = function_shares(old)
+    new_incl, new_self = function_shares(new)
+    names = set(old_incl) | set(new_incl)
+    rows = sorted(names, key=lambda k: abs(new_incl.get(k, 0) - old_incl.get(k, 0)), reverse=True)[:n]
+    print(f"old {sum(old.values())} samples, new {sum(new.values())} samples")
+    print(f"{'old incl':>9} {'new incl':>9} {'delta':>7} {'new self':>9}  function")
+    for name in rows:
+        a, b = old_incl.get(name, 0), new_incl.get(name, 0)
+        print(f"{a * 100:8.1f}% {b * 100:8.1f}% {(b - a) * 100:+6.1f}% {new_self.get(name, 0) * 100:8.1f}%  {name}")
+
+
+def diff_folded(old, new):
+    """'stack old_count new_count' lines for differential flame graphs (difffolded.pl format)."""
+    for stack in sorted(set(old) | set(new)):
+        print(f"{stack} {old.get(stack, 0)} {new.get(stack, 0)}")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Inspect and compare folded rerun profiles")
+    sub = parser.add_subparsers(dest="command", required=True)
+    top_cmd = sub.add_parser("top", help="hottest functions of one profile")
+    top_cmd.add_argument("profile")
+    top_cmd.add_argument("-n", type=int, default=25)
+    diff_cmd = sub.add_parser("diff", help="compare two profiles")
+    diff_cmd.add_argument("old")
+    diff_cmd.add_argument("new")
+    diff_cmd.add_argument("-n", type=int, default=25)
+    diff_cmd.add_argument("--folded", action="store_true", help="emit difffolded.pl format instead")
+    args = parser.parse_args()
+
+    if args.command == "top":
+        top(load_folded(args.profile), args.n)
+    elif args.folded:
+        diff_folded(load_folded(args.old), load_folded(args.new))
+    else:
+        diff(load_folded(args.old), load_folded(args.new), args.n)
@@ -0,0 +1,141 @@
+"""
+Student Profiles
+================
+- One materialized record per (college, wallet) holding everything the
+  student portal shows: identity (students.csv), the grade vector
+  (grades.csv), the scholarship (scholarships.csv) and the reward points
+  balance (points_ledger.py). The profile, rewards and redeem pages read one
+  record instead of filtering three tables and the ledger.
+- Records follow their sources incrementally: appended CSV rows (datasets.epoch()
+  unchanged) and new ledger entries are folded into the records they touch;
+  a rewritten CSV only resets and refolds its own part of every record.
+"""
+
+import os
+import threading
+
+import datasets
+import points_ledger
+from wallets import wallet_key, drop_wallet_keys
+from tracing import span, traced
+
+STUDENTS_CSV = "students.csv"
+GRADES_CSV = "grades.csv"
+SCHOLARSHIPS_CSV = "scholarships.csv"
+
+_lock = threading.Lock()
+_index = {
+    'folded': {},   # table file -> (epoch, rows folded)
+    'ledger': (None, 0),  # (journal path, offset folded)
+    'records': {},  # (college, key) -> record ('student' is a row tuple of `columns`)
+    'columns': [],  # students.csv columns of the identity tuples
+    'scholarship_keys': set(),  # (college, key) whose scholarship row has been folded
+}
+
+
+def _record(college_name, key):
+    record = _index['records'].get((college_name, key))
+    if record is None:
+        record = _index['records'][(college_name, key)] = {
+            'student': None, 'subjects': [], 'marks': [], 'scholarship': 0, 'points': 0}
+    return record
+
+
+# === FOLDS ===
+def _fold_students(students):
+    """First row per (college, wallet) wins, as in a filtered lookup."""
+    students = students[students['walletKey'].notna()]
+    identity = drop_wallet_keys(students)
+    _index['columns'] = list(identity.columns)
+    rows = zip(*(identity[c].astype(object).tolist() for c in _index['columns']))
+    for college_name, key, row in zip(students['collegeName'].astype(object), students['walletKey'].tolist(), rows):
+        record = _record(college_name, key)
+        if record['student'] is None:
+            record['student'] = row
+
+
+def _fold_grades(grades):
+    """Append each student's grade rows, in file order."""
+    grades = grades[grades['marks'].notna() & grades['walletKey'].notna()]
+    for college_name, key, subject, mark in zip(grades['collegeName'].astype(object), grades['walletKey'].tolist(),
+                                                grades['subject'].astype(object), grades['marks'].tolist()):
+        record = _record(college_name, key)
+        record['subjects'].append(subject)
+        record['marks'].append(int(mark))
+
+
+def _fold_scholarships(scholarships):
+    """First row per (college, wallet) wins; later rows for a student already seen are ignored."""
+    scholarships = scholarships[scholarships['walletKey'].notna()]
+    seen = _index['scholarship_keys']
+    for college_name, key, amount in zip(scholarships['collegeName'].astype(object), scholarships['walletKey'].tolist(),
+                                         scholarships['amount'].tolist()):
+        if (college_name, key) not in seen:
+            seen.add((college_name, key))
+            _record(college_name, key)['scholarship'] = amount
+
+
+def _reset(table_file):
+    """Clear one source's part of every record before it is refolded."""
+    for record in _index['records'].values():
+        if table_file == STUDENTS_CSV:
+            record['student'] = None
+        elif table_file == GRADES_CSV:
+            record['subjects'], record['marks'] = [], []
+        else:
+            record['scholarship'] = 0
+    if table_file == SCHOLARSHIPS_CSV:
+        _index['scholarship_keys'].clear()
+
+
+FOLDS = {STUDENTS_CSV: _fold_students, GRADES_CSV: _fold_grades, SCHOLARSHIPS_CSV: _fold_scholarships}
+
+
+def _fold_ledger():
+    """Apply ledger entries appended since the last fold; the first fold copies the balance index."""
+    path = os.path.abspath(points_ledger.LEDGER_CSV)   # relative: another working directory is another journal
+    folded_path, offset = _index['ledger']
+    if offset and folded_path == path:
+        try:
+            entries, offset = points_ledger.entries_since(offset)
+        except ValueError:   # journal replaced: start over
+            pass
+        else:
+            _index['ledger'] = (path, offset)
+            for row in entries:
+                _record(row['collegeName'], wallet_key(row['wallet']))['points'] = int(row['balance'])
+            return
+    points, offset = points_ledger.balances()
+    _index['ledger'] = (path, offset)
+    for record in _index['records'].values():
+        record['points'] = 0
+    for (college_name, key), balance in points.items():
+        _record(college_name, key)['points'] = balance
+
+
+@traced()
+def refresh(students, grades, scholarships):
+    """Bring the records up to date with the loaded tables and the points ledger."""
+    with _lock:
+        for table_file, table in ((STUDENTS_CSV, students), (GRADES_CSV, grades), (SCHOLARSHIPS_CSV, scholarships)):
+            epoch, rows = datasets.epoch(table_file), len(table)
+            folded_epoch, folded_rows = _index['folded'].get(table_file, (None, 0))
+            if epoch != folded_epoch or rows < folded_rows:
+                with span("profiles.rebuild", table=table_file, rows=rows):
+                    _reset(table_file)
+                    FOLDS[table_file](table)
+            elif rows > folded_rows:
+                with span("profiles.fold", table=table_file, rows=rows - folded_rows):
+                    FOLDS[table_file](table.iloc[folded_rows:])
+            _index['folded'][table_file] = (epoch, rows)
+        _fold_ledger()
+
+
+def get(college_name, wallet):
+    """The student's record (a copy), or None if no source knows them."""
+    with _lock:
+        record = _index['records'].get((college_name, wallet_key(wallet)))
+        if record is None:
+            return None
+        student = dict(zip(_index['columns'], record['student'])) if record['student'] else None
+        return {**record, 'student': student, 'subjects': list(record['subjects']), 'marks': list(record['marks'])}
@@ -13,6 +13,7 @@ contract HealthPortal {
         bool active;
     }
 
+    // ABI view of a report (returned by the getters)
     struct HealthReport {
         address student;
         string cid;         // IPFS CID for medical report
@@ -21,22 +22,51 @@ contract HealthPortal {
         bytes32 summaryHash; // hash of AI summary for verification
     }
 
+    // Storage form of a report: student, timestamp and points share one slot
+    struct PackedReport {
+        address student;     // 20 bytes
+        uint64 timestamp;    // 8 bytes
+        uint32 points;       // 4 bytes
+        bytes32 summaryHash;
+        string cid;
+    }
+
+    // Grouped struct for batch report input (avoids stack too deep)
+    struct ReportInput {
+        address student;
+        string cid;
+        uint256 points;
+        bytes32 summaryHash;
+    }
+
+    // Merkle root committing a batch of off-chain health reports (root + one packed slot)
+    struct ReportBatch {
+        bytes32 root;
+        address submitter;   // 20 bytes
+        uint64 timestamp;    // 8 bytes
+        uint32 count;        // 4 bytes
+    }
+
     struct Hospital {
         string name;
         address admin;
         address[] staffAddresses;
         mapping(address => Staff) staff;
-        HealthReport[] reports;
+        PackedReport[] reports;
+        ReportBatch[] reportBatches;
     }
 
     mapping(string => Hospital) private hospitals; // hospitalName => Hospital struct
     mapping(address => Role) public roles;         // quick lookup of user role
+    mapping(bytes32 => bool) private paidSalaryBatches; // keccak256(hospitalName, runId, batch) => paid
 
     // EVENTS
     event HospitalRegistered(string hospitalName, address indexed admin);
     event StaffAdded(string hospitalName, address indexed staffAddr, string staffName, string role);
     event SalaryUpdated(string hospitalName, address indexed staffAddr, uint256 newSalary);
     event HealthReportSubmitted(string hospitalName, address indexed staff, address indexed student, string cid, uint256 points);
+    event ReportBatchAnchored(string hospitalName, uint256 indexed batchId, bytes32 root, uint256 count);
+    event SalaryBatchPaid(string hospitalName, bytes32 indexed runId, uint256 batch, uint256 payees, uint256 total);
 
     // Modifier for admin-only functions
     modifier onlyHospitalAdmin(string memory hospitalName) {
@@ -81,6 +111,35 @@ contract HealthPortal {
         onlyHospitalAdmin(hospitalName)
         hospitalExists(hospitalName)
     {
+        _addStaff(hospitalName, staffEth, staffName, staffRole);
+    }
+
+    // Add many staff members in one transaction by the hospital admin
+    function addStaffBatch(
+        string calldata hospitalName,
+        address[] calldata staffEths,
+        string[] calldata staffNames,
+        string[] calldata staffRoles
+    )
+        external
+        onlyHospitalAdmin(hospitalName)
+        hospitalExists(hospitalName)
+    {
+        require(
+            staffEths.length == staffNames.length && staffEths.length == staffRoles.length,
+            "Mismatched input"
+        );
+        for (uint256 i = 0; i < staffEths.length; i++) {
+            _addStaff(hospitalName, staffEths[i], staffNames[i], staffRoles[i]);
+        }
+    }
+
+    function _addStaff(
+        string calldata hospitalName,
+        address staffEth,
+        string calldata staffName,
+        string calldata staffRole
+    ) private {
         Hospital storage hosp = hospitals[hospitalName];
         require(staffEth != address(0), "Invalid staff address");
         require(hosp.staff[staffEth].eth == address(0), "Staff already exists");
@@ -116,6 +175,46 @@ contract HealthPortal {
         emit SalaryUpdated(hospitalName, staffEth, salaryInWei);
     }
 
+    // Pay one batch of a payroll run; msg.value must equal the sum of `amounts`.
+    // A (run, batch) pays at most once, so an interrupted run can resend it safely.
+    function paySalaries(
+        string calldata hospitalName,
+        bytes32 runId,
+        uint256 batch,
+        address[] calldata payees,
+        uint256[] calldata amounts
+    )
+        external
+        payable
+        onlyHospitalAdmin(hospitalName)
+        hospitalExists(hospitalName)
+    {
+        require(payees.length == amounts.length, "Mismatched input");
+        bytes32 batchKey = keccak256(abi.encode(hospitalName, runId, batch));
+        require(!paidSalaryBatches[batchKey], "Batch already paid");
+        paidSalaryBatches[batchKey] = true;
+
+        Hospital storage hosp = hospitals[hospitalName];
+        uint256 total = 0;
+        for (uint256 i = 0; i < payees.length; i++) {
+            require(hosp.staff[payees[i]].active, "Payee is not active staff");
+            total += amounts[i];
+        }
+        require(msg.value == total, "Value does not match batch total");
+
+        for (uint256 i = 0; i < payees.length; i++) {
+            (bool sent, ) = payable(payees[i]).call{value: amounts[i]}("");
+            require(sent, "Salary transfer failed");
+        }
+
+        emit SalaryBatchPaid(hospitalName, runId, batch, payees.length, total);
+    }
+
+    // Whether a batch of a payroll run has been paid
+    function isSalaryBatchPaid(string calldata hospitalName, bytes32 runId, uint256 batch) external view returns (bool) {
+        return paidSalaryBatches[keccak256(abi.encode(hospitalName, runId, batch))];
+    }
+
     // Submit a health report by hospital staff
     function submitHealthReport(
         string calldata hospitalName,
@@ -128,19 +227,114 @@ contract HealthPortal {
         onlyHospitalStaff(hospitalName)
         hospitalExists(hospitalName)
     {
+        _submitHealthReport(hospitalName, student, cid, points, summaryHash);
+    }
+
+    // Submit many health reports in one transaction by hospital staff
+    function submitHealthReports(
+        string calldata hospitalName,
+        ReportInput[] calldata reports
+    )
+        external
+        onlyHospitalStaff(hospitalName)
+        hospitalExists(hospitalName)
+    {
+        for (uint256 i = 0; i < reports.length; i++) {
+            ReportInput calldata r = reports[i];
+            _submitHealthReport(hospitalName, r.student, r.cid, r.points, r.summaryHash);
+        }
+    }
+
+    function _submitHealthReport(
+        string calldata hospitalName,
+        address student,
+        string calldata cid,
+        uint256 points,
+        bytes32 summaryHash
+    ) private {
         require(student != address(0), "Invalid student address");
+        require(points <= type(uint32).max, "Points out of range");
 
-        hospitals[hospitalName].reports.push(HealthReport({
+        hospitals[hospitalName].reports.push(PackedReport({
             student: student,
-            cid: cid,
-            timestamp: block.timestamp,
-            points: points,
-            summaryHash: summaryHash
+            timestamp: uint64(block.timestamp),
+            points: uint32(points),
+            summaryHash: summaryHash,
+            cid: cid
         }));
 
         emit HealthReportSubmitted(hospitalName, msg.sender, student, cid, points);
     }
 
+    // Anchor a batch of health reports kept off-chain: only the Merkle root of their leaves is stored
+    function anchorReportBatch(
+        string calldata hospitalName,
+        bytes32 root,
+        uint256 count
+    )
+        external
+        onlyHospitalStaff(hospitalName)
+        hospitalExists(hospitalName)
+        returns (uint256 batchId)
+    {
+        require(root != bytes32(0), "Empty root");
+        require(count > 0 && count <= type(uint32).max, "Count out of range");
+
+        ReportBatch[] storage batches = hospitals[hospitalName].reportBatches;
+        batchId = batches.length;
+        batches.push(ReportBatch({
+            root: root,
+            submitter: msg.sender,
+            timestamp: uint64(block.timestamp),
+            count: uint32(count)
+        }));
+
+        emit ReportBatchAnchored(hospitalName, batchId, root, count);
+    }
+
+    // Number of report batches anchored for a hospital
+    function getReportBatchCount(string calldata hospitalName) external view hospitalExists(hospitalName) returns (uint256) {
+        return hospitals[hospitalName].reportBatches.length;
+    }
+
+    // One anchored report batch
+    function getReportBatch(
+        string calldata hospitalName,
+        uint256 batchId
+    ) external view hospitalExists(hospitalName) returns (ReportBatch memory) {
+        require(batchId < hospitals[hospitalName].reportBatches.length, "Unknown batch");
+        return hospitals[hospitalName].reportBatches[batchId];
+    }
+
+    // Merkle leaf of one report (double-hashed, as OpenZeppelin's MerkleProof expects)
+    function reportLeaf(
+        address student,
+        string calldata cid,
+        uint256 points,
+        bytes32 summaryHash,
+        uint256 timestamp
+    ) public pure returns (bytes32) {
+        return keccak256(bytes.concat(keccak256(abi.encode(student, cid, points, summaryHash, timestamp))));
+    }
+
+    // Check a report leaf against an anchored batch root (pairs are hashed in sorted order)
+    function verifyReportProof(
+        string calldata hospitalName,
+        uint256 batchId,
+        bytes32 leaf,
+        bytes32[] calldata proof
+    ) external view hospitalExists(hospitalName) returns (bool) {
+        ReportBatch[] storage batches = hospitals[hospitalName].reportBatches;
+        require(batchId < batches.length, "Unknown batch");
+        bytes32 node = leaf;
+        for (uint256 i = 0; i < proof.length; i++) {
+            node = node < proof[i]
+                ? keccak256(abi.encodePacked(node, proof[i]))
+                : keccak256(abi.encodePacked(proof[i], node));
+        }
+        return node == batches[batchId].root;
+    }
+
     // Get list of staff for a hospital with details
     function getStaffList(string calldata hospitalName) external view hospitalExists(hospitalName) returns (
         address[] memory staffAddresses,
@@ -169,9 +363,68 @@ contract HealthPortal {
         }
     }
 
-    // Get all health reports submitted for a hospital
+    // Get all health reports submitted for a hospital (prefer getReportsRange for large histories)
     function getAllReports(string calldata hospitalName) external view hospitalExists(hospitalName) returns (HealthReport[] memory) {
-        return hospitals[hospitalName].reports;
+        return _reportsRange(hospitals[hospitalName], 0, hospitals[hospitalName].reports.length);
+    }
+
+    // Number of health reports submitted for a hospital
+    function getReportCount(string calldata hospitalName) external view hospitalExists(hospitalName) returns (uint256) {
+        return hospitals[hospitalName].reports.length;
+    }
+
+    // Get up to `limit` health reports starting at index `offset`
+    function getReportsRange(
+        string calldata hospitalName,
+        uint256 offset,
+        uint256 limit
+    ) external view hospitalExists(hospitalName) returns (HealthReport[] memory) {
+        return _reportsRange(hospitals[hospitalName], offset, limit);
+    }
+
+    // Number of staff members registered for a hospital
+    function getStaffCount(string calldata hospitalName) external view hospitalExists(hospitalName) returns (uint256) {
+        return hospitals[hospitalName].staffAddresses.length;
+    }
+
+    // Get up to `limit` staff records starting at index `offset`
+    function getStaffRange(
+        string calldata hospitalName,
+        uint256 offset,
+        uint256 limit
+    ) external view hospitalExists(hospitalName) returns (Staff[] memory page) {
+        Hospital storage hosp = hospitals[hospitalName];
+        uint256 end = _rangeEnd(offset, limit, hosp.staffAddresses.length);
+        page = new Staff[](end - offset);
+        for (uint256 i = offset; i < end; i++) {
+            page[i - offset] = hosp.staff[hosp.staffAddresses[i]];
+        }
+    }
+
+    function _reportsRange(
+        Hospital storage hosp,
+        uint256 offset,
+        uint256 limit
+    ) private view returns (HealthReport[] memory page) {
+        uint256 end = _rangeEnd(offset, limit, hosp.reports.length);
+        page = new HealthReport[](end - offset);
+        for (uint256 i = offset; i < end; i++) {
+            PackedReport storage r = hosp.reports[i];
+            page[i - offset] = HealthReport({
+                student: r.student,
+                cid: r.cid,
+                timestamp: r.timestamp,
+                points: r.points,
+                summaryHash: r.summaryHash
+            });
+        }
+    }
+
+    function _rangeEnd(uint256 offset, uint256 limit, uint256 length) private pure returns (uint256) {
+        if (offset >= length) {
+            return offset;
+        }
+        return length - offset < limit ? length : offset + limit;
     }
 
     // Get salary of a specific staff in a hospital
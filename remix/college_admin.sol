@@ -97,7 +97,27 @@ contract CollegeAdmin {
         StudentInput calldata _studentInput
     ) external onlyOwner {
         require(bytes(colleges[_collegeName].name).length > 0, "College does not exist");
+        _addStudent(_collegeName, _wallet, _studentInput);
+    }
 
+    // Add many students in one transaction (college checked once per batch)
+    function addStudents(
+        string calldata _collegeName,
+        address[] calldata _wallets,
+        StudentInput[] calldata _studentInputs
+    ) external onlyOwner {
+        require(bytes(colleges[_collegeName].name).length > 0, "College does not exist");
+        require(_wallets.length == _studentInputs.length, "Mismatched input");
+        for (uint256 i = 0; i < _wallets.length; i++) {
+            _addStudent(_collegeName, _wallets[i], _studentInputs[i]);
+        }
+    }
+
+    function _addStudent(
+        string calldata _collegeName,
+        address _wallet,
+        StudentInput calldata _studentInput
+    ) private {
         students[_collegeName][_wallet] = Student({
             name: _studentInput.name,
             rollNo: _studentInput.rollNo,
@@ -116,6 +136,31 @@ contract CollegeAdmin {
         string calldata _subject,
         uint8 _marks
     ) external onlyOwner {
+        _addMarks(_collegeName, _student, _subject, _marks);
+    }
+
+    // Add or update many marks in one transaction
+    function addMarksBatch(
+        string calldata _collegeName,
+        address[] calldata _students,
+        string[] calldata _subjects,
+        uint8[] calldata _marks
+    ) external onlyOwner {
+        require(
+            _students.length == _subjects.length && _students.length == _marks.length,
+            "Mismatched input"
+        );
+        for (uint256 i = 0; i < _students.length; i++) {
+            _addMarks(_collegeName, _students[i], _subjects[i], _marks[i]);
+        }
+    }
+
+    function _addMarks(
+        string calldata _collegeName,
+        address _student,
+        string calldata _subject,
+        uint8 _marks
+    ) private {
         require(_marks <= 100, "Marks out of range");
         require(bytes(students[_collegeName][_student].name).length > 0, "Student does not exist");
 
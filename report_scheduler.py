@@ -0,0 +1,289 @@
+"""
+Scheduled College Reports
+=========================
+- Pre-renders every college's analyst report offline: Plotly figure JSON,
+  summary stats and the Ollama narrative, stored as versioned artifacts under
+  reports/<college>/<data fingerprint>/ (the fingerprint is a blake2b digest
+  of the CSVs, see datasets.py).
+- The report page serves the latest artifact when it matches the current
+  data; "Refresh now" rebuilds only when the fingerprint has changed.
+- Run once from cron, or keep a process running with a cron expression:
+
+    python report_scheduler.py run                       # build all stale colleges now
+    python report_scheduler.py run --college "TKM" --no-ai
+    python report_scheduler.py serve --cron "0 2 * * *"  # every night at 02:00
+    python report_scheduler.py list
+    python -m doctest report_scheduler.py                # check the cron matching examples
+"""
+
+import json
+import os
+import re
+import shutil
+import time
+from datetime import datetime, timedelta
+
+from datasets import data_fingerprint
+from tracing import span
+
+REPORT_DIR = os.environ.get("PORTAL_REPORT_DIR", "reports")
+DEFAULT_CRON = os.environ.get("PORTAL_REPORT_CRON", "0 2 * * *")
+KEEP_VERSIONS = 3       # artifacts kept per college; older fingerprints are pruned
+MODEL = "llama3"
+
+STUDENTS_CSV = "students.csv"
+FACULTY_CSV = "faculty.csv"
+GRADES_CSV = "grades.csv"
+DEPARTMENTS_CSV = "departments.csv"
+CSV_FILES = [STUDENTS_CSV, FACULTY_CSV, GRADES_CSV, DEPARTMENTS_CSV]
+
+
+def slug(college_name):
+    return re.sub(r"[^a-z0-9]+", "_", college_name.lower()).strip("_") or "college"
+
+
+def current_fingerprint():
+    return data_fingerprint(CSV_FILES)
+
+
+# === ARTIFACTS ===
+def latest(college_name, report_dir=REPORT_DIR):
+    """Meta of the newest artifact for `college_name` (with its 'path'), or None."""
+    pointer = os.path.join(report_dir, slug(college_name), "latest.json")
+    try:
+        with open(pointer, encoding="utf-8") as f:
+            version_dir = os.path.join(report_dir, slug(college_name), json.load(f)["fingerprint"])
+        with open(os.path.join(version_dir, "meta.json"), encoding="utf-8") as f:
+            return {**json.load(f), "path": version_dir}
+    except (OSError, ValueError, KeyError):
+        return None
+
+
+def chart_json(artifact, name):
+    with open(os.path.join(artifact["path"], "charts", name + ".json"), encoding="utf-8") as f:
+        return f.read()
+
+
+def summary_text(artifact):
+    try:
+        with open(os.path.join(artifact["path"], "summary.md"), encoding="utf-8") as f:
+            return f.read()
+    except OSError:
+        return None
+
+
+def _publish(college_name, fingerprint, build_dir, report_dir):
+    """Move a finished build into place, then flip latest.json (readers never see half a report)."""
+    college_dir = os.path.join(report_dir, slug(college_name))
+    final = os.path.join(college_dir, fingerprint)
+    if os.path.isdir(final):
+        shutil.rmtree(final)
+    os.replace(build_dir, final)
+    pointer = os.path.join(college_dir, "latest.json")
+    with open(pointer + ".tmp", "w", encoding="utf-8") as f:
+        json.dump({"fingerprint": fingerprint, "built_at": time.time()}, f)
+    os.replace(pointer + ".tmp", pointer)
+
+    versions = sorted((d for d in os.listdir(college_dir) if os.path.isdir(os.path.join(college_dir, d))
+                       and not d.startswith(".")),
+                      key=lambda d: os.path.getmtime(os.path.join(college_dir, d)), reverse=True)
+    for old in versions[KEEP_VERSIONS:]:
+        if old != fingerprint:
+            shutil.rmtree(os.path.join(college_dir, old), ignore_errors=True)
+    return final
+
+
+# === BUILD ===
+def _college_report(college_name):
+    """The live page's numbers, streamed when the CSVs are too big to load."""
+    import streaming
+    if streaming.auto(CSV_FILES):
+        return streaming.college_report(college_name, STUDENTS_CSV, GRADES_CSV, FACULTY_CSV)
+    from analytics import college_report
+    from schema import load_table
+    return college_report(load_table(STUDENTS_CSV), load_table(GRADES_CSV), load_table(FACULTY_CSV), college_name)
+
+
+def _narrative(messages):
+    try:
+        import ollama
+        with span("ollama.chat", model=MODEL):
+            return ollama.chat(model=MODEL, messages=messages)['message']['content'], None
+    except Exception as e:
+        return None, str(e)
+
+
+def build(college_name, fingerprint=None, with_ai=True, report_dir=REPORT_DIR):
+    """Compute, render and publish one college's report; returns its meta (None if no data)."""
+    import plotly.express as px
+    from analytics import college_charts, report_prompt
+
+    fingerprint = fingerprint or current_fingerprint()
+    started = time.perf_counter()
+    with span("report.build", college=college_name):
+        report = _college_report(college_name)
+        if report is None:
+            return None
+        build_dir = os.path.join(report_dir, slug(college_name), f".build-{os.getpid()}-{fingerprint}")
+        os.makedirs(os.path.join(build_dir, "charts"), exist_ok=True)
+        charts = college_charts(report, college_name)
+        for name, make in charts.items():
+            with span(f"chart.{name}.build"):
+                fig_json = make(px).to_json()
+            with open(os.path.join(build_dir, "charts", name + ".json"), "w", encoding="utf-8") as f:
+                f.write(fig_json)
+
+        messages = report_prompt(college_name, report)
+        summary, error = _narrative(messages) if with_ai else (None, "skipped (--no-ai)")
+        if summary is not None:
+            with open(os.path.join(build_dir, "summary.md"), "w", encoding="utf-8") as f:
+                f.write(summary)
+        meta = {
+            "college": college_name,
+            "fingerprint": fingerprint,
+            "built_at": datetime.now().isoformat(timespec="seconds"),
+            "build_seconds": round(time.perf_counter() - started, 3),
+            "charts": list(charts),
+            "stats": {k: (v.item() if hasattr(v, "item") else v) for k, v in report["stats"].items()},
+            "sampled": bool(report["sampled"]),
+            "years": int(report["years"]),
+            "messages": messages,
+            "summary_error": error,
+        }
+        with open(os.path.join(build_dir, "meta.json"), "w", encoding="utf-8") as f:
+            json.dump(meta, f, indent=1)
+        path = _publish(college_name, fingerprint, build_dir, report_dir)
+    return {**meta, "path": path}
+
+
+def ensure(college_name, with_ai=True, force=False, report_dir=REPORT_DIR):
+    """(artifact, rebuilt): rebuild only if the data changed since the latest artifact."""
+    fingerprint = current_fingerprint()
+    artifact = latest(college_name, report_dir)
+    if not force and artifact is not None and artifact["fingerprint"] == fingerprint:
+        return artifact, False
+    return build(college_name, fingerprint, with_ai, report_dir), True
+
+
+def all_colleges():
+    import streaming
+    if streaming.auto([STUDENTS_CSV]):
+        return sorted(streaming.group_counts(STUDENTS_CSV, "collegeName"))
+    from schema import load_table
+    return sorted(load_table(STUDENTS_CSV)["collegeName"].dropna().unique().tolist())
+
+
+def run(colleges=None, with_ai=True, force=False, report_dir=REPORT_DIR):
+    """Build every stale college report; prints one line per college."""
+    for college_name in colleges or all_colleges():
+        artifact, rebuilt = ensure(college_name, with_ai, force, report_dir)
+        if artifact is None:
+            print(f"{college_name}: no data")
+        elif rebuilt:
+            note = f", AI: {artifact['summary_error']}" if artifact["summary_error"] else ""
+            print(f"{college_name}: built {artifact['fingerprint'][:12]} in {artifact['build_seconds']:.2f} s{note}")
+        else:
+            print(f"{college_name}: up to date ({artifact['fingerprint'][:12]})")
+
+
+# === CRON ===
+CRON_RANGES = [(0, 59), (0, 23), (1, 31), (1, 12), (0, 7)]  # minute hour day-of-month month day-of-week
+
+
+def cron_field(field, low, high):
+    """Values allowed by one cron field: *, a-b, a,b and */n or a-b/n steps."""
+    values = set()
+    for part in field.split(","):
+        spec, _, step = part.partition("/")
+        if spec == "*":
+            start, end = low, high
+        elif "-" in spec:
+            start, end = (int(x) for x in spec.split("-"))
+        else:
+            start = end = int(spec)
+        if not low <= start <= end <= high:
+            raise ValueError(f"cron field {field!r} is outside {low}-{high}")
+        values.update(range(start, end + 1, int(step) if step else 1))
+    return values
+
+
+def next_run(expr, after):
+    """First whole minute after `after` matching the 5-field cron expression (Sunday = 0 or 7).
+
+    As in cron, when both day-of-month and day-of-week are restricted (neither
+    starts with *), a day matches if either of them does:
+
+    >>> str(next_run("0 2 1 * 1", datetime(2026, 10, 1, 3, 0)))    # Thu 1st: next Monday
+    '2026-10-05 02:00:00'
+    >>> str(next_run("0 2 1 * 1", datetime(2026, 10, 26, 3, 0)))   # Mon 26th: Sun 1 Nov
+    '2026-11-01 02:00:00'
+    >>> str(next_run("0 2 * * 1", datetime(2026, 10, 1, 3, 0)))    # day-of-week only
+    '2026-10-05 02:00:00'
+    >>> str(next_run("0 0 * * 7", datetime(2026, 10, 1, 3, 0)))    # 7 is Sunday too
+    '2026-10-04 00:00:00'
+    >>> str(next_run("30 6 * * 5-7", datetime(2026, 10, 3, 7, 0)))  # Fri-Sun, from Saturday
+    '2026-10-04 06:30:00'
+    >>> str(next_run("0 0 29 2 *", datetime(2026, 10, 1)))
+    '2028-02-29 00:00:00'
+    """
+    fields = expr.split()
+    if len(fields) != 5:
+        raise ValueError(f"cron expression needs 5 fields: {expr!r}")
+    minute, hour, day, month, weekday = (cron_field(f, *r) for f, r in zip(fields, CRON_RANGES))
+    if 7 in weekday:
+        weekday.add(0)
+    either_day = not fields[2].startswith("*") and not fields[4].startswith("*")
+    t = after.replace(second=0, microsecond=0) + timedelta(minutes=1)
+    end = t + timedelta(days=4 * 366)   # long enough to reach a 29 February
+    while t < end:
+        day_ok, weekday_ok = t.day in day, (t.weekday() + 1) % 7 in weekday
+        if t.month not in month or not ((day_ok or weekday_ok) if either_day else (day_ok and weekday_ok)):
+            t = (t + timedelta(days=1)).replace(hour=0, minute=0)
+            continue
+        if t.hour in hour and t.minute in minute:
+            return t
+        t += timedelta(minutes=1)
+    raise ValueError(f"cron expression never matches: {expr!r}")
+
+
+def serve(expr, with_ai=True, report_dir=REPORT_DIR):
+    """Run the build on the cron schedule until interrupted."""
+    while True:
+        due = next_run(expr, datetime.now())
+        print(f"next report run at {due:%Y-%m-%d %H:%M}")
+        time.sleep(max(0.0, (due - datetime.now()).total_seconds()))
+        try:
+            run(with_ai=with_ai, report_dir=report_dir)
+        except Exception as e:  # keep the schedule alive; the next run retries
+            print(f"report run failed: {e}")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Pre-render college analyst reports")
+    sub = parser.add_subparsers(dest="command", required=True)
+    run_cmd = sub.add_parser("run", help="build stale reports now")
+    run_cmd.add_argument("--college", action="append", help="only this college (repeatable)")
+    run_cmd.add_argument("--force", action="store_true", help="rebuild even if the data did not change")
+    serve_cmd = sub.add_parser("serve", help="build on a cron schedule")
+    serve_cmd.add_argument("--cron", default=DEFAULT_CRON, help="5-field cron expression (default %(default)r)")
+    for cmd in (run_cmd, serve_cmd):
+        cmd.add_argument("--no-ai", action="store_true", help="skip the Ollama narrative")
+        cmd.add_argument("--report-dir", default=REPORT_DIR)
+    list_cmd = sub.add_parser("list", help="show the latest artifact per college")
+    list_cmd.add_argument("--report-dir", default=REPORT_DIR)
+    args = parser.parse_args()
+
+    if args.command == "run":
+        run(args.college, not args.no_ai, args.force, args.report_dir)
+    elif args.command == "serve":
+        serve(args.cron, not args.no_ai, args.report_dir)
+    else:
+        fingerprint = current_fingerprint()
+        for college_name in all_colleges():
+            artifact = latest(college_name, args.report_dir)
+            state = "missing" if artifact is None else (
+                "current" if artifact["fingerprint"] == fingerprint else "stale")
+            built = artifact["built_at"] if artifact else "-"
+            print(f"{college_name:<30} {state:<8} {built}")
@@ -0,0 +1,148 @@
+"""
+CSV Table Schemas
+=================
+- One schema per CSV table: column order plus a compact in-memory type per column.
+- Low-cardinality text (college, hospital, department, subject, role) loads as
+  pandas categoricals; marks/year as uint8 to match the contracts' uint8.
+- Wei amounts are parsed exactly from text (never through float64).
+- Address columns get their fixed-width 20-byte key column (see wallets.py).
+- Loads go through datasets.py: unchanged files come from memory and appended
+  rows are parsed on their own.
+"""
+
+import os
+import numpy as np
+import pandas as pd
+import datasets
+from wallets import add_wallet_keys, drop_wallet_keys
+from tracing import span
+
+CATEGORY = 'category'
+TEXT = 'text'
+UINT8 = 'uint8'
+UINT32 = 'uint32'
+INT64 = 'int64'
+WEI = 'wei'
+
+NULLABLE = {UINT8: 'UInt8', UINT32: 'UInt32', INT64: 'Int64'}
+
+TABLES = {
+    'departments.csv': {
+        'collegeName': CATEGORY, 'deptName': CATEGORY, 'deptAdmin': TEXT,
+    },
+    'faculty.csv': {
+        'collegeName': CATEGORY, 'deptName': CATEGORY, 'wallet': TEXT, 'name': TEXT, 'role': CATEGORY,
+    },
+    'students.csv': {
+        'collegeName': CATEGORY, 'wallet': TEXT, 'name': TEXT, 'rollNo': TEXT, 'year': UINT8,
+        'department': CATEGORY, 'section': CATEGORY, 'email': TEXT,
+    },
+    'grades.csv': {
+        'collegeName': CATEGORY, 'wallet': TEXT, 'subject': CATEGORY, 'marks': UINT8,
+    },
+    'scholarships.csv': {
+        'collegeName': CATEGORY, 'wallet': TEXT, 'amount': WEI,
+    },
+    'points.csv': {
+        'collegeName': CATEGORY, 'wallet': TEXT, 'points': INT64,
+    },
+    'staff.csv': {
+        'hospitalName': CATEGORY, 'staffAddress': TEXT, 'staffName': TEXT, 'staffRole': CATEGORY,
+    },
+    'salary.csv': {
+        'hospitalName': CATEGORY, 'staffAddress': TEXT, 'salaryWei': WEI,
+    },
+    'reports.csv': {
+        'hospitalName': CATEGORY, 'studentAddress': TEXT, 'cid': TEXT, 'timestamp': INT64,
+        'points': UINT32, 'summaryHash': TEXT,
+    },
+}
+
+
+def table_schema(file_path):
+    return TABLES[os.path.basename(file_path)]
+
+
+def _compact_uint(series, dtype):
+    """Cast to `dtype` when every value fits; nullable variant if values are missing."""
+    values = pd.to_numeric(series, errors='coerce')
+    info = np.iinfo(dtype)
+    if len(values.dropna()) and (values.min() < info.min or values.max() > info.max):
+        return values
+    if values.isna().any():
+        return values.astype(NULLABLE[dtype])
+    return values.astype(dtype)
+
+
+def _exact_wei(series):
+    """Exact integer wei: uint64 when it fits, otherwise Python ints (object)."""
+    values = series.map(lambda v: int(v) if pd.notna(v) and str(v).strip() != '' else 0)
+    if len(values) == 0 or values.max() <= np.iinfo(np.uint64).max:
+        return values.astype(np.uint64)
+    return values.astype(object)
+
+
+def apply_schema(df, file_path):
+    """Convert `df` in place to the compact types of its table and add wallet keys."""
+    for col, kind in table_schema(file_path).items():
+        if col not in df.columns:
+            continue
+        if kind == CATEGORY:
+            df[col] = df[col].astype(CATEGORY)
+        elif kind in (UINT8, UINT32, INT64):
+            df[col] = _compact_uint(df[col], kind)
+        elif kind == WEI:
+            df[col] = _exact_wei(df[col])
+    return add_wallet_keys(df)
+
+
+def load_table(file_path):
+    """Read a CSV table with its schema (creates the file with headers if missing)."""
+    columns = table_schema(file_path)
+    with span("csv.load", table=os.path.basename(file_path)):
+        if not os.path.exists(file_path):
+            pd.DataFrame(columns=list(columns)).to_csv(file_path, index=False)
+        text_cols = {col: str for col, kind in columns.items() if kind in (TEXT, CATEGORY, WEI)}
+        return datasets.load(file_path,
+                             parse=lambda source: apply_schema(pd.read_csv(source, dtype=text_cols), file_path),
+                             extend=lambda df, rows: extend_table(df, rows, file_path))
+
+
+def save_table(df, file_path):
+    with span("csv.save", table=os.path.basename(file_path)):
+        drop_wallet_keys(df).to_csv(file_path, index=False)
+
+
+def extend_table(df, rows, file_path):
+    """Concatenate typed `rows` under `df`, re-unifying categorical columns."""
+    combined = pd.concat([df, rows[[c for c in df.columns if c in rows.columns]]], ignore_index=True)
+    for col, kind in table_schema(file_path).items():
+        if kind == CATEGORY and col in combined.columns:
+            combined[col] = combined[col].astype(CATEGORY)
+    return combined
+
+
+def append_rows(df, new_rows, file_path):
+    """Append rows to a loaded table, keeping its compact types."""
+    return extend_table(df, apply_schema(pd.DataFrame(new_rows), file_path), file_path)
+
+
+def append_csv(new_rows, file_path):
+    """Append rows to the CSV file itself, without loading or rewriting the table."""
+    rows = drop_wallet_keys(pd.DataFrame(new_rows)).reindex(columns=list(table_schema(file_path)))
+    with span("csv.append", table=os.path.basename(file_path)):
+        if not os.path.exists(file_path):
+            rows.to_csv(file_path, index=False)
+            return
+        with open(file_path, 'rb') as f:
+            f.seek(max(os.path.getsize(file_path) - 1, 0))
+            newline = f.read(1) in (b"", b"\n")
+        with open(file_path, 'a', newline='') as f:
+            if not newline:
+                f.write("\n")
+            rows.to_csv(f, index=False, header=False)
+
+
+def memory_bytes(*dfs):
+    """Deep memory footprint of the given tables."""
+    return int(sum(df.memory_usage(deep=True).sum() for df in dfs))
@@ -0,0 +1,143 @@
+// Compares single vs batch entry points on the local Hardhat network.
+//
+//   npx hardhat run scripts/bench-batch.js
+//   BENCH_RECORDS=500 BENCH_CHUNK=100 npx hardhat run scripts/bench-batch.js
+//
+// Reports wall time, records/s and gas per record for each pair of calls.
+// Talks to the network through Hardhat's own provider; calldata is encoded
+// with @ethersproject/abi (already part of Hardhat's dependency tree).
+
+const hre = require("hardhat");
+const { Interface } = require("@ethersproject/abi");
+
+const RECORDS = Number(process.env.BENCH_RECORDS || 200);
+const CHUNK = Number(process.env.BENCH_CHUNK || 50);
+
+const COLLEGE = "Bench College";
+const HOSPITAL = "Bench Hospital";
+const CID = "bafkreigh2akiscaildcqabsyg3dfr6chu3fgpregiymsck7e7aqa4s52zy";
+
+function wallet(i) {
+  return "0x" + (0x10000 + i).toString(16).padStart(40, "0");
+}
+
+function rpc(method, params = []) {
+  return hre.network.provider.request({ method, params });
+}
+
+// Deploys an artifact; returns { name: (...args) => tx hash } for its functions.
+async function deployContract(name, from) {
+  const artifact = await hre.artifacts.readArtifact(name);
+  const deployed = await rpc("eth_sendTransaction", [{ from, data: artifact.bytecode }]);
+  const { contractAddress } = await rpc("eth_getTransactionReceipt", [deployed]);
+  const iface = new Interface(artifact.abi);
+  const contract = {};
+  for (const fn of Object.values(iface.functions)) {
+    contract[fn.name] = (...args) => rpc("eth_sendTransaction", [{
+      from, to: contractAddress, data: iface.encodeFunctionData(fn.name, args),
+    }]);
+  }
+  return contract;
+}
+
+function chunks(items, size) {
+  const out = [];
+  for (let i = 0; i < items.length; i += size) out.push(items.slice(i, i + size));
+  return out;
+}
+
+async function measure(label, records, sendAll) {
+  const start = process.hrtime.bigint();
+  const txs = await sendAll();
+  let gas = 0n;
+  for (const tx of txs) {
+    const receipt = await rpc("eth_getTransactionReceipt", [tx]);
+    gas += BigInt(receipt.gasUsed);
+  }
+  const seconds = Number(process.hrtime.bigint() - start) / 1e9;
+  return {
+    mode: label,
+    records,
+    txs: txs.length,
+    seconds: Number(seconds.toFixed(3)),
+    recordsPerSec: Math.round(records / seconds),
+    gasPerRecord: Number(gas / BigInt(records)),
+  };
+}
+
+async function main() {
+  const [admin] = await rpc("eth_accounts");
+  const rows = [];
+
+  const college = await deployContract("remix/stu.sol:CollegeAdmin", admin);
+  await college.registerCollege(COLLEGE);
+  const student = (i) => ({
+    name: `Student ${i}`, rollNo: `R${i}`, year: 1 + (i % 4),
+    department: "CSE", section: "A", email: `s${i}@tkm.edu`,
+  });
+
+  rows.push(await measure("addStudent", RECORDS, async () => {
+    const txs = [];
+    for (let i = 0; i < RECORDS; i++) txs.push(await college.addStudent(COLLEGE, wallet(i), student(i)));
+    return txs;
+  }));
+  rows.push(await measure("addStudents", RECORDS, async () => {
+    const txs = [];
+    for (const c of chunks([...Array(RECORDS).keys()].map((i) => i + RECORDS), CHUNK)) {
+      txs.push(await college.addStudents(COLLEGE, c.map(wallet), c.map(student)));
+    }
+    return txs;
+  }));
+  rows.push(await measure("addMarks", RECORDS, async () => {
+    const txs = [];
+    for (let i = 0; i < RECORDS; i++) txs.push(await college.addMarks(COLLEGE, wallet(i), "Maths", i % 101));
+    return txs;
+  }));
+  rows.push(await measure("addMarksBatch", RECORDS, async () => {
+    const txs = [];
+    for (const c of chunks([...Array(RECORDS).keys()], CHUNK)) {
+      txs.push(await college.addMarksBatch(COLLEGE, c.map(wallet), c.map(() => "Physics"), c.map((i) => i % 101)));
+    }
+    return txs;
+  }));
+
+  const health = await deployContract("HealthPortal", admin);
+  await health.registerHospital(HOSPITAL);
+  await health.addStaff(HOSPITAL, admin, "Bench Admin", "Admin");
+
+  rows.push(await measure("addStaff", RECORDS, async () => {
+    const txs = [];
+    for (let i = 0; i < RECORDS; i++) txs.push(await health.addStaff(HOSPITAL, wallet(i), `Staff ${i}`, "Nurse"));
+    return txs;
+  }));
+  rows.push(await measure("addStaffBatch", RECORDS, async () => {
+    const txs = [];
+    for (const c of chunks([...Array(RECORDS).keys()].map((i) => i + RECORDS), CHUNK)) {
+      txs.push(await health.addStaffBatch(HOSPITAL, c.map(wallet), c.map((i) => `Staff ${i}`), c.map(() => "Nurse")));
+    }
+    return txs;
+  }));
+  const summary = (i) => "0x" + (i + 1).toString(16).padStart(64, "0");
+  rows.push(await measure("submitHealthReport", RECORDS, async () => {
+    const txs = [];
+    for (let i = 0; i < RECORDS; i++) txs.push(await health.submitHealthReport(HOSPITAL, wallet(i), CID, 10, summary(i)));
+    return txs;
+  }));
+  rows.push(await measure("submitHealthReports", RECORDS, async () => {
+    const txs = [];
+    for (const c of chunks([...Array(RECORDS).keys()], CHUNK)) {
+      txs.push(await health.submitHealthReports(HOSPITAL, c.map((i) => ({
+        student: wallet(i), cid: CID, points: 10, summaryHash: summary(i),
+      }))));
+    }
+    return txs;
+  }));
+
+  console.log(`records=${RECORDS} chunk=${CHUNK}`);
+  console.table(rows);
+}
+
+main().catch((err) => {
+  console.error(err);
+  process.exitCode = 1;
+});
@@ -0,0 +1,130 @@
+"""
+People Search
+=============
+- In-memory prefix index over the people tables: student name, roll number,
+  email and wallet; faculty name, role and wallet; staff name, role and
+  address.
+- Every field is split into lowercase alphanumeric words, and so is the
+  query (so "asha@" or "r-12" work too). Each college / hospital keeps its tokens in
+  one sorted array with a postings list of row positions each; a query
+  word's matches are the contiguous bisect range of tokens starting with it,
+  so typeahead never scans the table.
+- Built on first use and extended from appended rows (datasets.epoch()
+  unchanged); a rewritten CSV rebuilds its index.
+"""
+
+import heapq
+import re
+import threading
+from bisect import bisect_left, insort
+
+import datasets
+from tracing import span, traced
+
+# table file -> (scope column, searchable columns); every search runs within one scope
+FIELDS = {
+    'students.csv': ('collegeName', ['name', 'rollNo', 'email', 'wallet']),
+    'faculty.csv': ('collegeName', ['name', 'role', 'wallet']),
+    'staff.csv': ('hospitalName', ['staffName', 'staffRole', 'staffAddress']),
+}
+MAX_RESULTS = 50
+RESORT_TOKENS = 64          # more new tokens than this in one fold: re-sort instead of insort
+_SPLIT = re.compile(r"[^0-9a-z]+")
+
+_lock = threading.Lock()
+_indexes = {}   # table file -> {'epoch', 'rows', 'scopes': {scope: {'tokens' (sorted), 'postings' {token: [row, ...]}}}}
+
+
+def tokens(value):
+    """Lowercase alphanumeric words of one cell (or query)."""
+    if value is None or value != value:   # missing / NaN
+        return set()
+    return {w for w in _SPLIT.split(str(value).lower()) if w}
+
+
+def _add(index, table, start):
+    """Index rows `start`.. of `table` (positions are row numbers in the full table)."""
+    scope_col, columns = FIELDS[index['file']]
+    scopes = table[scope_col].astype(object).tolist()
+    new_tokens = {}
+    for col in columns:
+        if col not in table.columns:
+            continue
+        for row, scope, value in zip(range(start, start + len(table)), scopes, table[col].tolist()):
+            postings = index['scopes'].setdefault(scope, {'tokens': [], 'postings': {}})['postings']
+            for token in tokens(value):
+                rows = postings.get(token)
+                if rows is None:
+                    postings[token] = [row]
+                    new_tokens.setdefault(scope, []).append(token)
+                elif rows[-1] != row:
+                    rows.append(row)
+    for scope, added in new_tokens.items():
+        part = index['scopes'][scope]
+        if len(added) > RESORT_TOKENS:
+            part['tokens'] = sorted(part['postings'])
+        else:
+            for token in added:
+                insort(part['tokens'], token)
+
+
+@traced()
+def refresh(table_file, table):
+    """Bring the index of `table_file` up to date with its loaded table."""
+    epoch, rows = datasets.epoch(table_file), len(table)
+    with _lock:
+        index = _indexes.get(table_file)
+        if index is None or index['epoch'] != epoch or rows < index['rows']:
+            with span("search.build", table=table_file, rows=rows):
+                index = _indexes[table_file] = {'file': table_file, 'epoch': epoch, 'rows': 0, 'scopes': {}}
+                _add(index, table, 0)
+        elif rows > index['rows']:
+            with span("search.extend", table=table_file, rows=rows - index['rows']):
+                _add(index, table.iloc[index['rows']:], index['rows'])
+        index['rows'] = rows
+
+
+def _term_postings(part, term):
+    """Postings of every token starting with `term` (one bisect range of the sorted tokens)."""
+    tokens_, postings = part['tokens'], part['postings']
+    found = []
+    for i in range(bisect_left(tokens_, term), len(tokens_)):
+        if not tokens_[i].startswith(term):
+            break
+        found.append(postings[tokens_[i]])
+    return found
+
+
+def _rows(postings):
+    """Rows of one word's postings lists (a single list is already unique and ascending)."""
+    return postings[0] if len(postings) == 1 else set().union(*postings)
+
+
+def search(table_file, scope, query, limit=MAX_RESULTS):
+    """Positions of the rows in `scope` matching every word of `query` as a prefix, in table order."""
+    words = tokens(query)
+    with _lock:
+        index = _indexes.get(table_file)
+        part = index['scopes'].get(scope) if index else None
+        if part is None or not words:
+            return []
+        with span("search.query", table=table_file, words=len(words)):
+            lists = sorted((_term_postings(part, word) for word in words),
+                           key=lambda postings: sum(map(len, postings)))   # most selective word first
+            if not lists[0]:
+                return []
+            if len(lists) == 1:
+                rows = _rows(lists[0])
+                return rows[:limit] if isinstance(rows, list) else heapq.nsmallest(limit, rows)
+            matches = set(_rows(lists[0]))
+            for postings in lists[1:]:
+                matches.intersection_update(_rows(postings))
+                if not matches:
+                    return []
+            return heapq.nsmallest(limit, matches)
+
+
+def search_table(table_file, table, scope, query, limit=MAX_RESULTS):
+    """Rows of `table` in `scope` matching `query`, refreshing the table's index first."""
+    refresh(table_file, table)
+    return table.iloc[search(table_file, scope, query, limit)]
@@ -0,0 +1,186 @@
+"""
+Streaming CSV Aggregates
+========================
+- Reads a table in fixed-size typed chunks (a generator pipeline), so
+  per-college and per-hospital views work on CSVs larger than memory: only
+  one chunk plus the running aggregates are held at a time.
+- College report numbers come from one pass over grades.csv: per-subject and
+  per-(year, department) sums, a marks histogram for the exact median and a
+  bounded uniform sample of rows for the scatter plots.
+- PORTAL_STREAMING=1/0 forces the mode on/off; otherwise it switches on when
+  the files exceed PORTAL_STREAM_BYTES. PORTAL_STREAM_CHUNK sets rows per chunk.
+"""
+
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+
+from schema import TEXT, CATEGORY, WEI, apply_schema, table_schema
+from tracing import span, traced
+
+CHUNK_ROWS = int(os.environ.get("PORTAL_STREAM_CHUNK", "100000"))
+STREAM_BYTES = int(os.environ.get("PORTAL_STREAM_BYTES", str(512 << 20)))
+SAMPLE_ROWS = 5000      # rows kept for scatter plots in streaming mode
+MARK_BINS = 256         # marks are uint8 on chain
+
+_lock = threading.Lock()
+_counts = {}            # (path, column, mtime_ns, size) -> {value: rows}
+
+
+def auto(paths):
+    """Whether pages should stream `paths` instead of loading them whole."""
+    forced = os.environ.get("PORTAL_STREAMING")
+    if forced in ("0", "1"):
+        return forced == "1"
+    return sum(os.path.getsize(p) for p in paths if os.path.exists(p)) > STREAM_BYTES
+
+
+# === PIPELINE ===
+def iter_chunks(file_path, chunk_rows=CHUNK_ROWS, columns=None):
+    """Typed chunks of a CSV table (schema types and wallet keys, like load_table)."""
+    if not os.path.exists(file_path):
+        return
+    schema = table_schema(file_path)
+    text_cols = {col: str for col, kind in schema.items() if kind in (TEXT, CATEGORY, WEI)}
+    with pd.read_csv(file_path, dtype=text_cols, chunksize=chunk_rows, usecols=columns) as reader:
+        for index, chunk in enumerate(reader):
+            with span("csv.chunk", table=os.path.basename(file_path), chunk=index):
+                yield apply_schema(chunk, file_path)
+
+
+def where(chunks, column, value):
+    """Only the rows of each chunk whose `column` equals `value` (empty chunks dropped)."""
+    for chunk in chunks:
+        chunk = chunk[chunk[column] == value]
+        if len(chunk):
+            yield chunk
+
+
+def collect(chunks, columns=None):
+    """Concatenate chunks, e.g. one college's filtered students (bounded by the filter)."""
+    parts = [chunk if columns is None else chunk[columns] for chunk in chunks]
+    return pd.concat(parts, ignore_index=True) if parts else pd.DataFrame(columns=columns)
+
+
+def head(file_path, rows=1000):
+    """First `rows` rows of a table without reading the rest."""
+    return next(iter_chunks(file_path, chunk_rows=rows), None)
+
+
+def _plain(series):
+    """Categorical -> object so partial results from different chunks line up."""
+    return series.astype(object) if isinstance(series.dtype, pd.CategoricalDtype) else series
+
+
+def _add(total, partial):
+    return partial if total is None else total.add(partial, fill_value=0)
+
+
+# === HOSPITAL REPORTS ===
+@traced()
+def group_counts(file_path, column, chunk_rows=CHUNK_ROWS):
+    """Rows per value of `column` in one pass, cached until the file changes."""
+    stat = os.stat(file_path)
+    key = (os.path.abspath(file_path), column, stat.st_mtime_ns, stat.st_size)
+    with _lock:
+        if key in _counts:
+            return _counts[key]
+    counts = None
+    for chunk in iter_chunks(file_path, chunk_rows, columns=[column]):
+        counts = _add(counts, _plain(chunk[column]).value_counts())
+    result = {} if counts is None else {k: int(v) for k, v in counts.items()}
+    with _lock:
+        for old in [k for k in _counts if k[:2] == key[:2]]:
+            del _counts[old]
+        _counts[key] = result
+    return result
+
+
+@traced()
+def rows_page(file_path, column, value, offset, limit, chunk_rows=CHUNK_ROWS):
+    """Rows [offset, offset + limit) of those matching `column == value`; stops reading once filled."""
+    parts, seen = [], 0
+    for chunk in where(iter_chunks(file_path, chunk_rows), column, value):
+        start = max(offset - seen, 0)
+        seen += len(chunk)
+        if start < len(chunk):
+            parts.append(chunk.iloc[start:start + limit - sum(len(p) for p in parts)])
+        if sum(len(p) for p in parts) >= limit:
+            break
+    return pd.concat(parts, ignore_index=True) if parts else collect([], list(table_schema(file_path)))
+
+
+# === COLLEGE REPORT ===
+def _bottom_k(sample, rows, k, rng):
+    """Uniform sample of at most k rows over all chunks seen (smallest random keys win)."""
+    rows = rows.assign(_key=rng.random(len(rows)))
+    merged = rows if sample is None else pd.concat([sample, rows], ignore_index=True)
+    return merged.nsmallest(k, '_key') if len(merged) > k else merged
+
+
+def _median(hist):
+    """Median of integer marks from their histogram (mean of the two middle values when even)."""
+    n = int(hist.sum())
+    cumulative = np.cumsum(hist)
+    low = int(np.searchsorted(cumulative, (n - 1) // 2 + 1))
+    high = int(np.searchsorted(cumulative, n // 2 + 1))
+    return (low + high) / 2
+
+
+@traced()
+def college_report(college_name, students_csv, grades_csv, faculty_csv,
+                   chunk_rows=CHUNK_ROWS, sample_rows=SAMPLE_ROWS, seed=0):
+    """analytics.college_report() computed in bounded memory; scatter data is a uniform sample."""
+    student_cols = ['walletKey', 'department', 'year']
+    students = collect(where(iter_chunks(students_csv, chunk_rows), 'collegeName', college_name))
+    if students.empty:
+        return None
+    lookup = students[student_cols].assign(department=_plain(students['department']))
+
+    rng = np.random.default_rng(seed)
+    hist = np.zeros(MARK_BINS, dtype=np.int64)
+    by_subject = by_year_dept = sample = None
+    for chunk in where(iter_chunks(grades_csv, chunk_rows), 'collegeName', college_name):
+        chunk = chunk.assign(subject=_plain(chunk['subject']))
+        hist += np.bincount(chunk['marks'].to_numpy(dtype=np.int64), minlength=MARK_BINS)[:MARK_BINS]
+        by_subject = _add(by_subject, chunk.groupby('subject').marks.agg(['sum', 'count']))
+        merged = chunk.merge(lookup, on='walletKey', how='left')
+        by_year_dept = _add(by_year_dept,
+                            merged.dropna(subset=['department']).groupby(['year', 'department']).marks.agg(['sum', 'count']))
+        sample = _bottom_k(sample, merged[['subject', 'year', 'marks', 'department', 'wallet']], sample_rows, rng)
+    if by_subject is None:
+        return None
+
+    marks = by_subject['sum'] / by_subject['count']
+    marks.index.name, marks.name = 'subject', 'marks'
+    progression = (by_year_dept['sum'] / by_year_dept['count']).rename('marks').sort_index().reset_index()
+    total = int(hist.sum())
+    present = np.flatnonzero(hist)
+    faculty = sum(len(c) for c in where(iter_chunks(faculty_csv, chunk_rows, columns=['collegeName']),
+                                        'collegeName', college_name))
+    scatter = sample.drop(columns='_key').reset_index(drop=True)
+    animated = scatter.dropna(subset=['department'])
+    counts = students['department'].value_counts()
+    return {
+        'students': students,
+        'sampled': total > len(scatter),
+        'subject_averages': marks.sort_values(ascending=False),
+        'department_counts': counts[counts > 0],
+        'scatter': scatter,
+        'animated': animated,
+        'years': int(progression['year'].nunique()),
+        'year_progression': progression,
+        'stats': {
+            "total_students": len(students),
+            "total_faculty": faculty,
+            "departments": students['department'].nunique(),
+            "subjects": len(by_subject),
+            "average_mark": round(float(by_subject['sum'].sum()) / total, 2),
+            "median_mark": round(_median(hist), 2),
+            "max_mark": int(present[-1]),
+            "min_mark": int(present[0]),
+        },
+        'subject_summary': marks.sort_index().round(2),
+    }
@@ -2,181 +2,38 @@
 
 import streamlit as st
 import pandas as pd
-import ollama
 import os
-import json
-from web3 import Web3
+from wallets import wallet_key, to_checksum
+from schema import load_table
+from tracing import traced, span, rerun
+from batching import raw_transaction
+import contracts
+import points_ledger
+import points_pipeline
+import leaderboard
+import grade_stats
+import profiles
 
 # === CONFIG ===
 NODE_URL = "http://127.0.0.1:8545"  # Change as needed
 CONTRACT_ADDRESS = "0x2279B7A0a67DB372996a5FaB50D91eAA73d2eBe6"  # Your deployed contract address
 
-CONTRACT_ABI_JSON = """
-[
-  {
-    "inputs": [{"internalType":"string","name":"_collegeName","type":"string"}],
-    "name": "registerCollege",
-    "outputs": [],
-    "stateMutability": "nonpayable",
-    "type": "function"
-  },
-  {
-    "inputs": [
-      {"internalType":"string","name":"_collegeName","type":"string"},
-      {"internalType":"string","name":"_deptName","type":"string"},
-      {"components": [
-        {"internalType":"string","name":"name","type":"string"},
-        {"internalType":"string","name":"role","type":"string"},
-        {"internalType":"address","name":"wallet","type":"address"}
-      ],"internalType":"struct CollegeAdmin.Faculty","name":"_faculty","type":"tuple"}
-    ],
-    "name": "addFaculty",
-    "outputs": [],
-    "stateMutability": "nonpayable",
-    "type": "function"
-  },
-  {
-    "inputs": [
-      {"internalType":"string","name":"_collegeName","type":"string"},
-      {"internalType":"address","name":"_student","type":"address"},
-      {"internalType":"string","name":"_subject","type":"string"},
-      {"internalType":"uint8","name":"_marks","type":"uint8"}
-    ],
-    "name": "addMarks",
-    "outputs": [],
-    "stateMutability": "nonpayable",
-    "type": "function"
-  },
-  {
-    "inputs": [
-      {"internalType":"string","name":"_collegeName","type":"string"},
-      {"internalType":"address","name":"_student","type":"address"},
-      {"internalType":"uint256","name":"_pts","type":"uint256"}
-    ],
-    "name": "addPoints",
-    "outputs": [],
-    "stateMutability": "nonpayable",
-    "type": "function"
-  },
-  {
-    "inputs": [
-      {"internalType":"string","name":"_collegeName","type":"string"},
-      {"internalType":"address","name":"_wallet","type":"address"},
-      {"components":[
-        {"internalType":"string","name":"name","type":"string"},
-        {"internalType":"string","name":"rollNo","type":"string"},
-        {"internalType":"uint8","name":"year","type":"uint8"},
-        {"internalType":"string","name":"department","type":"string"},
-        {"internalType":"string","name":"section","type":"string"},
-        {"internalType":"string","name":"email","type":"string"}
-      ],"internalType":"struct CollegeAdmin.StudentInput","name":"_studentInput","type":"tuple"}
-    ],
-    "name": "addStudent",
-    "outputs": [],
-    "stateMutability": "nonpayable",
-    "type": "function"
-  },
-  {
-    "inputs": [
-      {"internalType":"string","name":"_collegeName","type":"string"}
-    ],
-    "name": "redeemPoints",
-    "outputs": [],
-    "stateMutability": "nonpayable",
-    "type": "function"
-  },
-  {
-    "inputs": [
-      {"internalType":"string","name":"_collegeName","type":"string"},
-      {"internalType":"address","name":"_student","type":"address"}
-    ],
-    "name": "getMarks",
-    "outputs": [
-      {"internalType":"string[]","name":"","type":"string[]"},
-      {"internalType":"uint8[]","name":"","type":"uint8[]"}
-    ],
-    "stateMutability": "view",
-    "type": "function"
-  },
-  {
-    "inputs": [
-      {"internalType":"string","name":"_collegeName","type":"string"},
-      {"internalType":"address","name":"_student","type":"address"}
-    ],
-    "name": "getPoints",
-    "outputs": [{"internalType":"uint256","name":"","type":"uint256"}],
-    "stateMutability": "view",
-    "type": "function"
-  },
-  {
-    "inputs": [
-      {"internalType":"string","name":"_collegeName","type":"string"},
-      {"internalType":"address","name":"_student","type":"address"}
-    ],
-    "name": "getScholarship",
-    "outputs": [{"internalType":"uint256","name":"","type":"uint256"}],
-    "stateMutability": "view",
-    "type": "function"
-  },
-  {
-    "inputs": [
-      {"internalType":"string","name":"_collegeName","type":"string"},
-      {"internalType":"address","name":"_student","type":"address"}
-    ],
-    "name": "getStudent",
-    "outputs": [{
-      "components":[
-        {"internalType":"string","name":"name","type":"string"},
-        {"internalType":"string","name":"rollNo","type":"string"},
-        {"internalType":"uint8","name":"year","type":"uint8"},
-        {"internalType":"string","name":"department","type":"string"},
-        {"internalType":"string","name":"section","type":"string"},
-        {"internalType":"string","name":"email","type":"string"},
-        {"internalType":"address","name":"wallet","type":"address"}
-      ],
-      "internalType":"struct CollegeAdmin.Student",
-      "name":"",
-      "type":"tuple"
-    }],
-    "stateMutability": "view",
-    "type": "function"
-  }
-]
-"""
-
-CONTRACT_ABI = json.loads(CONTRACT_ABI_JSON)
-
 # CSV files paths
 STUDENTS_CSV = "students.csv"
 GRADES_CSV = "grades.csv"
 SCHOLARSHIPS_CSV = "scholarships.csv"
-POINTS_CSV = "points.csv"
-
-# --- Helper functions for CSV ---
-def load_csv(file_path, columns):
-    if not os.path.exists(file_path):
-        pd.DataFrame(columns=columns).to_csv(file_path, index=False)
-    return pd.read_csv(file_path)
-
-def save_csv(df, file_path):
-    df.to_csv(file_path, index=False)
-
 
-# Load CSV files on app start
-students_df = load_csv(STUDENTS_CSV, ['collegeName','wallet','name','rollNo','year','department','section','email'])
-grades_df = load_csv(GRADES_CSV, ['collegeName','wallet','subject','marks'])
-scholarships_df = load_csv(SCHOLARSHIPS_CSV, ['collegeName','wallet','amount'])
-points_df = load_csv(POINTS_CSV, ['collegeName','wallet','points'])
+# Load CSV files on app start (compact typed tables, see schema.py)
+students_df = load_table(STUDENTS_CSV)
+grades_df = load_table(GRADES_CSV)
+scholarships_df = load_table(SCHOLARSHIPS_CSV)
 
 
 # --- Web3 helper ---
 def connect_blockchain():
-    w3 = Web3(Web3.HTTPProvider(NODE_URL))
-    if not w3.is_connected():
-        return None, None
-    contract = w3.eth.contract(address=CONTRACT_ADDRESS, abi=CONTRACT_ABI)
-    return w3, contract
+    return contracts.connect(NODE_URL, "CollegeAdmin", CONTRACT_ADDRESS)
 
+@traced()
 def get_student_web3(contract, college, wallet):
     try:
         s = contract.functions.getStudent(college, wallet).call()
@@ -186,6 +43,7 @@ def get_student_web3(contract, college, wallet):
     except Exception:
         return None
 
+@traced()
 def get_grades_web3(contract, college, wallet):
     try:
         subjects, marks = contract.functions.getMarks(college, wallet).call()
@@ -193,18 +51,21 @@ def get_grades_web3(contract, college, wallet):
     except Exception:
         return [], []
 
+@traced()
 def get_scholarship_web3(contract, college, wallet):
     try:
         return contract.functions.getScholarship(college, wallet).call()
     except Exception:
         return 0
 
+@traced()
 def get_points_web3(contract, college, wallet):
     try:
         return contract.functions.getPoints(college, wallet).call()
     except Exception:
         return 0
 
+@traced()
 def build_sign_send_tx(w3, priv_key, tx_function, gas=300000, gas_price_gwei=2):
     account = w3.eth.account.from_key(priv_key)
     nonce = w3.eth.get_transaction_count(account.address)
@@ -215,9 +76,10 @@ def build_sign_send_tx(w3, priv_key, tx_function, gas=300000, gas_price_gwei=2):
         "gasPrice": w3.to_wei(gas_price_gwei, 'gwei'),
     })
     signed_tx = w3.eth.account.sign_transaction(tx, priv_key)
-    tx_hash = w3.eth.send_raw_transaction(signed_tx.rawTransaction)
+    tx_hash = w3.eth.send_raw_transaction(raw_transaction(signed_tx))
     return tx_hash.hex()
 
+@traced()
 def redeem_points_web3(w3, contract, private_key, college_name):
     account = w3.eth.account.from_key(private_key)
     nonce = w3.eth.get_transaction_count(account.address)
@@ -228,51 +90,42 @@ def redeem_points_web3(w3, contract, private_key, college_name):
         'gasPrice': w3.to_wei('2', 'gwei')
     })
     signed_tx = w3.eth.account.sign_transaction(tx, private_key)
-    tx_hash = w3.eth.send_raw_transaction(signed_tx.rawTransaction)
+    tx_hash = w3.eth.send_raw_transaction(raw_transaction(signed_tx))
     return tx_hash.hex()
 
 
 # --- CSV fallback functions ---
+@traced()
+def get_profile_csv(college, wallet):
+    # Fold health reports added since the last checkpoint, then read the materialized profile record
+    points_pipeline.sync_reports()
+    profiles.refresh(students_df, grades_df, scholarships_df)
+    return profiles.get(college, wallet)
+
+@traced()
 def get_student_csv(college, wallet):
-    wallet = wallet.lower()
-    df = students_df[(students_df['collegeName'] == college) & (students_df['wallet'].str.lower() == wallet)]
-    if df.empty:
-        return None
-    return df.iloc[0].to_dict()
+    profile = get_profile_csv(college, wallet)
+    return profile['student'] if profile else None
 
+@traced()
 def get_grades_csv(college, wallet):
-    wallet = wallet.lower()
-    df = grades_df[(grades_df['collegeName'] == college) & (grades_df['wallet'].str.lower() == wallet)]
-    if df.empty:
-        return [], []
-    return df['subject'].tolist(), df['marks'].astype(int).tolist()
+    profile = get_profile_csv(college, wallet)
+    return (profile['subjects'], profile['marks']) if profile else ([], [])
 
+@traced()
 def get_scholarship_csv(college, wallet):
-    wallet = wallet.lower()
-    df = scholarships_df[(scholarships_df['collegeName'] == college) & (scholarships_df['wallet'].str.lower() == wallet)]
-    if df.empty:
-        return 0
-    return df.iloc[0]['amount']
+    profile = get_profile_csv(college, wallet)
+    return profile['scholarship'] if profile else 0
 
+@traced()
 def get_points_csv(college, wallet):
-    wallet = wallet.lower()
-    df = points_df[(points_df['collegeName'] == college) & (points_df['wallet'].str.lower() == wallet)]
-    if df.empty:
-        return 0
-    return df.iloc[0]['points']
-
-def redeem_points_csv(college, wallet):
-    wallet = wallet.lower()
-    global points_df
-    idx = points_df[(points_df['collegeName'] == college) & (points_df['wallet'].str.lower() == wallet)].index
-    if len(idx) == 0:
-        return False, "No points available to redeem."
-    current_points = points_df.at[idx[0], 'points']
-    if current_points <= 0:
-        return False, "No points available to redeem."
-    points_df.at[idx[0], 'points'] = 0
-    save_csv(points_df, POINTS_CSV)
-    return True, f"Successfully redeemed {current_points} points."
+    profile = get_profile_csv(college, wallet)
+    return profile['points'] if profile else 0
+
+@traced()
+def redeem_points_csv(college, wallet, shown_points):
+    # Compare-and-debit: fails if the balance moved since it was shown to the student
+    return points_ledger.redeem(college, wallet, expected=shown_points)
 
 
 # --- Streamlit app ---
@@ -288,7 +141,12 @@ def main():
         st.warning("Please enter both College Name and Wallet Address in the sidebar.")
         return
 
-    wallet_address = wallet_address.lower()
+    # Canonical checksummed form: works for Web3 calls and matches CSV keys
+    wallet = wallet_key(wallet_address)
+    if wallet is None:
+        st.error("Invalid Ethereum wallet address.")
+        return
+    wallet_address = to_checksum(wallet)
 
     if web3mode:
         w3, contract = connect_blockchain()
@@ -305,6 +163,7 @@ def main():
         "👤 Student Profile & Grades",
         "🎓 Scholarship & Rewards",
         "🛒 Redeem Points",
+        "🏆 Leaderboard",
         "🤖 AI Campus Assistant",
         "⚙️ Account Settings",
         "ℹ️ About / Help"
@@ -320,8 +179,8 @@ def main():
         st.header("📘 Your Academic Profile & Grades")
 
         if use_csv:
-            student = get_student_csv(college_name, wallet_address)
-            subjects, marks = get_grades_csv(college_name, wallet_address)
+            profile = get_profile_csv(college_name, wallet_address) or {}
+            student, subjects, marks = profile.get('student'), profile.get('subjects'), profile.get('marks')
         else:
             student = get_student_web3(contract, college_name, wallet_address)
             subjects, marks = get_grades_web3(contract, college_name, wallet_address)
@@ -341,10 +200,19 @@ def main():
         - **Wallet:** {student.get('wallet')}
         """)
 
-        if subjects:
-            df_grades = pd.DataFrame({"Subject": subjects, "Marks": marks})
+        if subjects and use_csv:
+            # Percentile, rank and mean within the college's cohort per subject (CSV grade histograms)
+            grade_stats.refresh(grades_df)
+            df_grades = grade_stats.profile_table(college_name, subjects, marks)
             st.subheader("Your Grades")
             st.table(df_grades)
+            st.caption("Percentile counts tied marks as half; rank and mean are over your college's "
+                       "students in each subject.")
+        elif subjects:
+            # The cohort histograms only see grades.csv; the contract emits no marks events to fold in
+            st.subheader("Your Grades")
+            st.table(pd.DataFrame({"Subject": subjects, "Marks": marks}))
+            st.caption("Percentile and class rank are only available in CSV mode.")
         else:
             st.info("No grades found yet.")
 
@@ -352,8 +220,8 @@ def main():
         st.header("🏅 Scholarship & Reward Points Overview")
 
         if use_csv:
-            scholarship = get_scholarship_csv(college_name, wallet_address)
-            points = get_points_csv(college_name, wallet_address)
+            profile = get_profile_csv(college_name, wallet_address) or {}
+            scholarship, points = profile.get('scholarship', 0), profile.get('points', 0)
         else:
             scholarship = get_scholarship_web3(contract, college_name, wallet_address)
             points = get_points_web3(contract, college_name, wallet_address)
@@ -361,6 +229,15 @@ def main():
         st.metric(label="Scholarship Amount", value=str(scholarship))
         st.metric(label="Reward Points", value=str(points))
 
+        if use_csv:
+            entries = points_ledger.history(college_name, wallet_address)
+            if entries:
+                with st.expander("Points history"):
+                    history = pd.DataFrame(entries)
+                    history['timestamp'] = pd.to_datetime(history['timestamp'].astype(int), unit='s')
+                    st.table(history[['source', 'delta', 'balance', 'timestamp']].rename(
+                        columns={'source': 'Source', 'delta': 'Change', 'balance': 'Balance', 'timestamp': 'Time'}))
+
     elif menu == "🛒 Redeem Points":
         st.header("🎁 Redeem Your Reward Points")
 
@@ -377,7 +254,7 @@ def main():
 
         if st.button("Redeem Points"):
             if use_csv:
-                success, msg = redeem_points_csv(college_name, wallet_address)
+                success, msg = redeem_points_csv(college_name, wallet_address, points)
                 if success:
                     st.success(msg)
                 else:
@@ -393,6 +270,21 @@ def main():
                     except Exception as e:
                         st.error(f"Redeem transaction failed: {e}")
 
+    elif menu == "🏆 Leaderboard":
+        st.header("🏆 Leaderboard")
+        st.caption("Ranks use the CSV grades and the reward points ledger.")
+        points_pipeline.sync_reports()
+        leaderboard.refresh(students_df, grades_df)
+
+        metric = leaderboard.POINTS if st.radio("Rank by", ["Reward Points", "Average Marks"],
+                                                horizontal=True) == "Reward Points" else leaderboard.MARKS
+        department = leaderboard.department_of(college_name, wallet)
+        scopes = [(college_name, None)] + ([(department, department)] if department is not None else [])
+        for col, (label, scope) in zip(st.columns(len(scopes)), scopes):
+            mine = leaderboard.rank(metric, college_name, wallet, scope)
+            col.metric(f"Your rank in {label}", f"#{mine[0]} of {mine[1]}" if mine else "Unranked")
+            col.dataframe(leaderboard.top_frame(metric, college_name, 10, scope), hide_index=True)
+
     elif menu == "🤖 AI Campus Assistant":
         st.header("🤖 Campus AI Assistant powered by Ollama Models")
 
@@ -408,7 +300,9 @@ def main():
                     {"role": "system", "content": system_prompt},
                     {"role": "user", "content": user_question.strip()}
                 ]
-                response = ollama.chat(model="llama3", messages=messages)
+                import ollama
+                with span("ollama.chat", model="llama3"):
+                    response = ollama.chat(model="llama3", messages=messages)
                 st.text_area("AI Response", value=response['message']['content'], height=200)
             except Exception as e:
                 st.error(f"AI assistant error: {e}")
@@ -428,4 +322,5 @@ def main():
         """)
 
 if __name__ == "__main__":
-    main()
+    with rerun("stu"):
+        main()
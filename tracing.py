@@ -0,0 +1,203 @@
+"""
+Hot-Path Tracing
+================
+- `span(name)` context manager and `traced()` decorator record wall time of
+  CSV loads, fetchers, transactions, chart building and LLM calls.
+- Spans are grouped per Streamlit rerun (`rerun(page)` in home.py); the last
+  reruns are kept in memory for the hidden timing panel (`?panel=trace`).
+- Export: PORTAL_TRACE_JSONL=<file> appends one JSON line per rerun;
+  PORTAL_TRACE_PROM_PORT=<port> serves Prometheus text on /metrics.
+"""
+
+import functools
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+MAX_RERUNS = 200      # finished reruns kept for the panel
+MAX_LOOSE = 500       # spans recorded outside any rerun (pages run standalone)
+
+JSONL_PATH = os.environ.get("PORTAL_TRACE_JSONL")
+PROM_PORT = os.environ.get("PORTAL_TRACE_PROM_PORT")
+
+RERUNS = deque(maxlen=MAX_RERUNS)
+LOOSE = deque(maxlen=MAX_LOOSE)
+
+_lock = threading.Lock()
+_local = threading.local()   # Streamlit runs each session's script in its own thread
+_totals = {}                 # span name -> [count, seconds], cumulative for Prometheus
+_page_totals = {}            # page -> [count, seconds]
+
+
+def _record_total(table, name, seconds):
+    with _lock:
+        entry = table.setdefault(name, [0, 0.0])
+        entry[0] += 1
+        entry[1] += seconds
+
+
+@contextmanager
+def span(name, **attrs):
+    """Time the enclosed block as span `name` (nested spans keep their depth)."""
+    current = getattr(_local, "rerun", None)
+    depth = getattr(_local, "depth", 0)
+    _local.depth = depth + 1
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        seconds = time.perf_counter() - start
+        _local.depth = depth
+        _record_total(_totals, name, seconds)
+        record = {"name": name, "duration": seconds, "depth": depth, "attrs": attrs}
+        if current is not None:
+            record["start"] = start - current["t0"]
+            current["spans"].append(record)
+        else:
+            with _lock:
+                LOOSE.append({**record, "time": time.time()})
+
+
+def traced(name=None):
+    """Decorator: time every call as a span named `<file>.<function>` unless `name` is given."""
+    def decorate(fn):
+        label = name or f"{os.path.splitext(os.path.basename(fn.__code__.co_filename))[0]}.{fn.__name__}"
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(label):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+@contextmanager
+def rerun(page):
+    """Group all spans of one script rerun under `page`; nested use acts as a plain span."""
+    if getattr(_local, "rerun", None) is not None:
+        with span(f"page.{page}"):
+            yield
+        return
+    current = {"page": page, "time": time.time(), "t0": time.perf_counter(), "spans": []}
+    _local.rerun, _local.depth = current, 0
+    try:
+        yield
+    finally:
+        _local.rerun = None
+        duration = time.perf_counter() - current.pop("t0")
+        record = {**current, "duration": duration}
+        _record_total(_page_totals, page, duration)
+        with _lock:
+            RERUNS.append(record)
+        if JSONL_PATH:
+            _append_jsonl(record)
+
+
+def _append_jsonl(record):
+    try:
+        with _lock, open(JSONL_PATH, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record, default=str) + "\n")
+    except OSError:
+        pass  # tracing must never break a page
+
+
+# === QUERIES ===
+def recent_spans():
+    """Every span of the kept reruns (plus loose spans), newest rerun first."""
+    with _lock:
+        reruns = list(RERUNS)
+        loose = list(LOOSE)
+    rows = [{"page": r["page"], **s} for r in reversed(reruns) for s in r["spans"]]
+    return rows + [{"page": None, **s} for s in reversed(loose)]
+
+
+def slowest_spans(n=20):
+    return sorted(recent_spans(), key=lambda s: s["duration"], reverse=True)[:n]
+
+
+def span_summary():
+    """Per span name over the kept reruns: calls, total, mean, p95 and max seconds."""
+    by_name = {}
+    for s in recent_spans():
+        by_name.setdefault(s["name"], []).append(s["duration"])
+    rows = []
+    for name, durations in by_name.items():
+        durations.sort()
+        rows.append({
+            "span": name, "calls": len(durations), "total_s": sum(durations),
+            "mean_s": sum(durations) / len(durations),
+            "p95_s": durations[max(0, int(len(durations) * 0.95) - 1)], "max_s": durations[-1],
+        })
+    return sorted(rows, key=lambda r: r["total_s"], reverse=True)
+
+
+def last_rerun(page=None):
+    with _lock:
+        for record in reversed(RERUNS):
+            if page is None or record["page"] == page:
+                return record
+    return None
+
+
+# === EXPORT ===
+def _label(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"')
+
+
+def prometheus_text():
+    """Cumulative span and rerun timings in the Prometheus text exposition format."""
+    with _lock:
+        spans = dict(_totals)
+        pages = dict(_page_totals)
+    lines = ["# HELP portal_span_seconds Wall time spent in traced spans.",
+             "# TYPE portal_span_seconds summary"]
+    for name, (count, seconds) in sorted(spans.items()):
+        lines.append(f'portal_span_seconds_count{{span="{_label(name)}"}} {count}')
+        lines.append(f'portal_span_seconds_sum{{span="{_label(name)}"}} {seconds:.6f}')
+    lines += ["# HELP portal_rerun_seconds Wall time of Streamlit reruns per page.",
+              "# TYPE portal_rerun_seconds summary"]
+    for page, (count, seconds) in sorted(pages.items()):
+        lines.append(f'portal_rerun_seconds_count{{page="{_label(page)}"}} {count}')
+        lines.append(f'portal_rerun_seconds_sum{{page="{_label(page)}"}} {seconds:.6f}')
+    return "\n".join(lines) + "\n"
+
+
+def jsonl_dump():
+    """The kept reruns as JSONL text (for download from the panel)."""
+    with _lock:
+        reruns = list(RERUNS)
+    return "".join(json.dumps(r, default=str) + "\n" for r in reruns)
+
+
+def serve_prometheus(port):
+    """Serve prometheus_text() on http://127.0.0.1:<port>/metrics from a daemon thread."""
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.rstrip("/") != "/metrics":
+                self.send_error(404)
+                return
+            body = prometheus_text().encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", int(port)), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+if PROM_PORT:
+    try:
+        serve_prometheus(PROM_PORT)
+    except OSError:
+        pass  # already served by another import in this process
@@ -0,0 +1,308 @@
+"""
+Transaction Queue
+=================
+- Write-behind queue for the admin portals' single transactions: a button
+  signs its transaction locally and appends it to a durable queue
+  (tx_queue.json), then returns at once with the tx hash; a background
+  sender thread pushes the queue to the node. The thread is started by the
+  first enqueue of a process (or by a page that finds transactions still
+  waiting), so opening a page never loads web3.
+- Nonces are assigned at enqueue time, per sender, after the highest one
+  still in the queue (the node is only asked when the sender has nothing
+  queued), so a burst of clicks never waits on the node and never reuses
+  a nonce.
+- While the node is unreachable a transaction can still be queued, but only
+  with the remembered chain id and a nonce known locally: the account has
+  transactions waiting, or its last one went through this queue. Otherwise
+  enqueue raises NodeUnreachable. If the account spent that nonce outside
+  the queue meanwhile, the queued transaction ends up DROPPED once the node
+  is back. Reads still need the node.
+- The sender sends each account's transactions in nonce order, at most
+  MAX_IN_FLIGHT unmined per account; a failed send is retried with
+  exponential backoff and a sent one that disappears from the node is
+  re-broadcast. Enqueueing is refused past MAX_DEPTH waiting transactions
+  (backpressure) instead of growing without bound.
+- State changes are made under the file lock of points_ledger.py, but
+  network calls never happen while holding it.
+
+    python tx_queue.py status
+    python tx_queue.py drain --node http://127.0.0.1:8545          # until the queue is empty
+"""
+
+import json
+import os
+import threading
+import time
+
+from batching import raw_transaction
+from points_ledger import file_lock
+from tracing import span
+
+QUEUE_PATH = os.environ.get("PORTAL_TX_QUEUE", "tx_queue.json")
+MAX_DEPTH = 256             # waiting (queued + sent) transactions before enqueue is refused
+MAX_IN_FLIGHT = 16          # sent but unmined transactions per account
+MAX_ATTEMPTS = 8            # send attempts before a transaction is given up
+MAX_BACKOFF = 60            # seconds
+RESEND_AFTER = 30           # seconds a sent transaction may be unknown to the node before re-broadcast
+POLL_SECONDS = 0.5
+RATE_WINDOW = 60            # seconds of history behind the drain rate
+HISTORY = 500               # finished transactions kept in the queue file
+QUEUED, SENT, MINED, REVERTED, FAILED, DROPPED = 'queued', 'sent', 'mined', 'reverted', 'failed', 'dropped'
+WAITING = (QUEUED, SENT)
+
+
+class QueueFull(Exception):
+    """Raised by enqueue() while MAX_DEPTH transactions are waiting."""
+
+
+class NodeUnreachable(Exception):
+    """Raised by enqueue() when the node is needed for the chain id or nonce and cannot be reached."""
+
+
+# === STATE ===
+def load(path=QUEUE_PATH):
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {'chainId': None, 'nextId': 1, 'txs': [], 'nonces': {}}
+
+
+def _save(state, path):
+    finished = [t for t in state['txs'] if t['status'] not in WAITING]
+    if len(finished) > HISTORY:
+        drop = {t['id'] for t in finished[:len(finished) - HISTORY]}
+        state['txs'] = [t for t in state['txs'] if t['id'] not in drop]
+    with open(path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(state, f, indent=1)
+    os.replace(path + ".tmp", path)
+
+
+def _lock(path):
+    return file_lock(os.path.abspath(path))
+
+
+def _next_nonce(state, sender):
+    nonces = [t['nonce'] for t in state['txs'] if t['sender'] == sender and t['status'] in WAITING]
+    return max(nonces) + 1 if nonces else None
+
+
+# === ENQUEUE ===
+def enqueue(w3, priv_key, call, gas, gas_price_gwei=2, value=0, label="", path=QUEUE_PATH, node_url=None):
+    """Sign `call` with the next free nonce of the key's account and queue it; returns the queue entry.
+
+    Raises QueueFull under backpressure. The node is contacted only for an
+    account with nothing queued (its pending nonce) and for the first chain id;
+    if it is unreachable then, the nonce after the account's last queued
+    transaction is used, or NodeUnreachable is raised when there is none.
+    With `node_url`, this process's sender for that node is started if needed.
+    """
+    account = w3.eth.account.from_key(priv_key)
+    with _lock(path):
+        state = load(path)
+        nonce, chain_id = _next_nonce(state, account.address), state['chainId']
+        known = state.get('nonces', {}).get(account.address)
+    with span("tx_queue.enqueue"):
+        node_nonce = None
+        if nonce is None or chain_id is None:
+            try:
+                node_nonce = w3.eth.get_transaction_count(account.address, 'pending') if nonce is None else None
+                chain_id = chain_id or w3.eth.chain_id
+            except Exception:
+                if chain_id is None or (nonce is None and known is None):
+                    raise NodeUnreachable(f"The blockchain node is unreachable and no nonce of {account.address} "
+                                          "is known locally; try again once it is up") from None
+                node_nonce = known   # last nonce this queue assigned, + 1
+        with _lock(path):
+            state = load(path)
+            waiting = sum(t['status'] in WAITING for t in state['txs'])
+            if waiting >= MAX_DEPTH:
+                raise QueueFull(f"{waiting} transactions are waiting to be sent; try again shortly")
+            local = _next_nonce(state, account.address)
+            nonce = max(n for n in (local, node_nonce, nonce) if n is not None)
+            tx = call.build_transaction({
+                "from": account.address,
+                "nonce": nonce,
+                "gas": gas,
+                "gasPrice": w3.to_wei(gas_price_gwei, "gwei"),
+                "value": value,
+                "chainId": chain_id,
+            })
+            signed = w3.eth.account.sign_transaction(tx, priv_key)
+            entry = {'id': state['nextId'], 'sender': account.address, 'nonce': nonce, 'label': label,
+                     'raw': raw_transaction(signed).hex(), 'txHash': w3.to_hex(signed.hash), 'status': QUEUED,
+                     'attempts': 0, 'error': None, 'created': time.time(), 'nextTry': 0, 'sentAt': None,
+                     'minedAt': None, 'gasUsed': None}
+            state.update(chainId=chain_id, nextId=state['nextId'] + 1)
+            state.setdefault('nonces', {})[account.address] = nonce + 1
+            state['txs'].append(entry)
+            _save(state, path)
+    if node_url:
+        ensure_sender(node_url, path)
+    return dict(entry)
+
+
+# === SENDER ===
+def _plan_account(w3, txs, now):
+    """Updates {id: fields} for one account's waiting transactions (nonce order); network calls only."""
+    updates = {}
+    confirmed = w3.eth.get_transaction_count(txs[0]['sender'], 'latest')
+    in_flight = 0
+    blocked = None
+    for tx in txs:
+        if blocked is not None:
+            if tx['status'] == QUEUED:
+                updates[tx['id']] = {'status': FAILED, 'error': f"nonce {blocked} before it failed"}
+            continue
+        if tx['status'] == SENT:
+            try:
+                receipt = w3.eth.get_transaction_receipt(tx['txHash'])
+            except Exception:
+                receipt = None
+            if receipt is not None:
+                updates[tx['id']] = {'status': MINED if receipt['status'] == 1 else REVERTED,
+                                     'gasUsed': int(receipt['gasUsed']), 'minedAt': now}
+                continue
+            if tx['nonce'] < confirmed:
+                updates[tx['id']] = {'status': DROPPED, 'error': "nonce used by another transaction"}
+                continue
+            if now - tx['sentAt'] > RESEND_AFTER:
+                try:
+                    w3.eth.send_raw_transaction(bytes.fromhex(tx['raw']))
+                except Exception:
+                    pass   # already known / mined meanwhile: the receipt shows up next pass
+                updates[tx['id']] = {'sentAt': now}
+            in_flight += 1
+            continue
+        if in_flight >= MAX_IN_FLIGHT or now < tx['nextTry']:
+            break   # keep nonce order: nothing after this one is sent yet
+        if tx['nonce'] < confirmed:
+            updates[tx['id']] = {'status': DROPPED, 'error': "nonce used by another transaction"}
+            continue
+        try:
+            with span("tx_queue.send"):
+                w3.eth.send_raw_transaction(bytes.fromhex(tx['raw']))
+        except Exception as e:
+            error = str(e)
+            if "already known" in error.lower():
+                updates[tx['id']] = {'status': SENT, 'sentAt': now, 'attempts': tx['attempts'] + 1}
+                in_flight += 1
+                continue
+            attempts = tx['attempts'] + 1
+            if attempts >= MAX_ATTEMPTS:
+                updates[tx['id']] = {'status': FAILED, 'error': error, 'attempts': attempts}
+                blocked = tx['nonce']
+                continue
+            updates[tx['id']] = {'error': error, 'attempts': attempts,
+                                 'nextTry': now + min(2 ** attempts, MAX_BACKOFF)}
+            break
+        updates[tx['id']] = {'status': SENT, 'sentAt': now, 'attempts': tx['attempts'] + 1, 'error': None}
+        in_flight += 1
+    return updates
+
+
+def drain_once(w3, path=QUEUE_PATH):
+    """One sender pass over every account; returns the number of transactions whose state changed."""
+    with _lock(path):
+        waiting = [t for t in load(path)['txs'] if t['status'] in WAITING]
+    if not waiting or not w3.is_connected():
+        return 0
+    accounts = {}
+    for tx in sorted(waiting, key=lambda t: t['nonce']):
+        accounts.setdefault(tx['sender'], []).append(tx)
+    updates, now = {}, time.time()
+    for txs in accounts.values():
+        try:
+            updates.update(_plan_account(w3, txs, now))
+        except Exception:
+            continue   # node went away mid-pass: this account is retried next pass
+    if updates:
+        with _lock(path):
+            state = load(path)
+            for tx in state['txs']:
+                if tx['id'] in updates and tx['status'] in WAITING:
+                    tx.update(updates[tx['id']])
+                    if tx['status'] in (FAILED, DROPPED):
+                        state.get('nonces', {}).pop(tx['sender'], None)   # never trust it offline again
+            _save(state, path)
+    return len(updates)
+
+
+def drain(w3, path=QUEUE_PATH, timeout=None):
+    """Run sender passes until nothing is waiting (or `timeout` seconds); returns stats()."""
+    start = time.monotonic()
+    while stats(path)['depth'] and (timeout is None or time.monotonic() - start < timeout):
+        if not drain_once(w3, path):
+            time.sleep(POLL_SECONDS)
+    return stats(path)
+
+
+_senders = {}
+_senders_lock = threading.Lock()
+
+
+def ensure_sender(node_url, path=QUEUE_PATH):
+    """Start this process's background sender for `node_url` (once)."""
+    with _senders_lock:
+        thread = _senders.get((node_url, path))
+        if thread is not None and thread.is_alive():
+            return thread
+
+        def loop():
+            import contracts
+            w3 = contracts.web3_client(node_url)
+            while True:
+                try:
+                    changed = drain_once(w3, path)
+                except Exception:
+                    changed = 0
+                if not changed:
+                    time.sleep(POLL_SECONDS)
+
+        thread = _senders[(node_url, path)] = threading.Thread(target=loop, name="tx-queue-sender", daemon=True)
+        thread.start()
+        return thread
+
+
+# === STATS ===
+def stats(path=QUEUE_PATH):
+    """Queue depth, status counts and the drain rate (transactions mined per minute, last RATE_WINDOW s)."""
+    txs = load(path)['txs']
+    now = time.time()
+    counts = {s: 0 for s in (QUEUED, SENT, MINED, REVERTED, FAILED, DROPPED)}
+    for tx in txs:
+        counts[tx['status']] += 1
+    recent = sum(1 for t in txs if t['minedAt'] and now - t['minedAt'] <= RATE_WINDOW)
+    waiting = [t['created'] for t in txs if t['status'] in WAITING]
+    return {'depth': counts[QUEUED] + counts[SENT], **counts,
+            'drainPerMin': round(recent * 60 / RATE_WINDOW, 1),
+            'oldestSeconds': round(now - min(waiting), 1) if waiting else None}
+
+
+def frame(path=QUEUE_PATH, limit=50):
+    """Newest `limit` queue entries as a display table."""
+    import pandas as pd
+    rows = [{"Id": t['id'], "Action": t['label'], "Sender": t['sender'], "Nonce": t['nonce'], "Status": t['status'],
+             "Attempts": t['attempts'], "Tx Hash": t['txHash'], "Gas Used": t['gasUsed'], "Error": t['error']}
+            for t in reversed(load(path)['txs'][-limit:])]
+    return pd.DataFrame(rows, columns=["Id", "Action", "Sender", "Nonce", "Status", "Attempts", "Tx Hash",
+                                       "Gas Used", "Error"])
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Inspect and drain the admin transaction queue")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("status")
+    drain_cmd = sub.add_parser("drain", help="send queued transactions until the queue is empty")
+    drain_cmd.add_argument("--node", default="http://127.0.0.1:8545")
+    drain_cmd.add_argument("--timeout", type=float)
+    args = parser.parse_args()
+
+    if args.command == "status":
+        print(stats())
+        print(frame().drop(columns=["Tx Hash"]).to_string(index=False))
+    else:
+        import contracts
+        print(drain(contracts.web3_client(args.node), timeout=args.timeout))
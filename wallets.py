@@ -0,0 +1,111 @@
+"""
+Wallet Address Keys
+===================
+- Canonical 20-byte binary key for every address column, computed once per row
+  at load or insert time. Lookups and joins compare keys, never raw strings.
+- Batch EIP-55 checksumming: one keccak per distinct address.
+"""
+
+import numpy as np
+import pandas as pd
+from eth_hash.auto import keccak
+
+try:
+    import pyarrow as pa
+except ImportError:  # plain object column of bytes without pyarrow
+    pa = None
+
+# Address columns found across the CSV tables; each gets a "<col>Key" column
+ADDRESS_COLUMNS = ('wallet', 'deptAdmin', 'staffAddress', 'studentAddress')
+KEY_SUFFIX = 'Key'
+KEY_DTYPE = pd.ArrowDtype(pa.binary(20)) if pa is not None else object
+
+
+def key_column(col):
+    return col + KEY_SUFFIX
+
+
+def wallet_key(addr):
+    """20-byte key for one address string, or None if it is not a valid address."""
+    if not isinstance(addr, str):
+        return None
+    hex_part = addr.strip().lower()
+    if hex_part.startswith('0x'):
+        hex_part = hex_part[2:]
+    if len(hex_part) != 40:
+        return None
+    try:
+        return bytes.fromhex(hex_part)
+    except ValueError:
+        return None
+
+
+def wallet_keys(values):
+    """
+    Keys for a whole column, hex-decoded in a single bytes.fromhex call.
+    With pyarrow the result is a fixed-width binary(20) column built directly
+    on the decoded buffer; invalid or missing addresses are null.
+    """
+    s = pd.Series(values, dtype=object)
+    hex_part = s.astype(str).str.strip().str.lower().str.removeprefix('0x')
+    valid = (hex_part.str.fullmatch(r'[0-9a-f]{40}') & s.notna()).to_numpy(dtype=bool)
+    if pa is not None:
+        buf = bytes.fromhex(''.join(hex_part.where(valid, '0' * 40)))
+        validity = pa.array(valid).buffers()[1]
+        arr = pa.Array.from_buffers(pa.binary(20), len(s), [validity, pa.py_buffer(buf)])
+        return pd.Series(pd.arrays.ArrowExtensionArray(arr), index=s.index)
+    keys = pd.Series(None, index=s.index, dtype=object)
+    if valid.any():
+        buf = bytes.fromhex(''.join(hex_part[valid]))
+        keys[valid] = [buf[i:i + 20] for i in range(0, len(buf), 20)]
+    return keys
+
+
+def key_array(keys):
+    """Keys as a numpy 'S20' array (sortable, searchsorted-able); missing keys become zero bytes."""
+    if pa is not None and isinstance(keys.dtype, pd.ArrowDtype):
+        arr = pa.chunked_array(keys.array._pa_array).combine_chunks()
+        data = np.frombuffer(arr.buffers()[1], dtype='S20', count=arr.offset + len(arr))[arr.offset:]
+        return np.where(arr.is_null().to_numpy(zero_copy_only=False), b'', data).astype('S20')
+    return np.array([k if isinstance(k, bytes) else b'' for k in keys], dtype='S20')
+
+
+def to_checksum(key):
+    """EIP-55 checksummed string for a 20-byte key."""
+    hex_addr = key.hex()
+    digest = keccak(hex_addr.encode()).hex()
+    return '0x' + ''.join(c.upper() if int(d, 16) >= 8 else c for c, d in zip(hex_addr, digest))
+
+
+def checksum_addresses(keys):
+    """Checksummed strings for many keys, hashing each distinct key once."""
+    keys = pd.Series(keys)
+    distinct = {k: to_checksum(k) for k in keys.dropna().unique()}
+    return keys.astype(object).map(distinct)
+
+
+def normalize_address(addr):
+    """Checksummed form of `addr`, or None if invalid (replaces Web3.to_checksum_address)."""
+    key = wallet_key(addr)
+    return to_checksum(key) if key is not None else None
+
+
+def require_address(addr):
+    """Checksummed form of `addr`; raises ValueError if invalid."""
+    checksummed = normalize_address(addr)
+    if checksummed is None:
+        raise ValueError(f"Invalid Ethereum address: {addr}")
+    return checksummed
+
+
+def add_wallet_keys(df):
+    """Add a key column next to every address column present in `df`."""
+    for col in ADDRESS_COLUMNS:
+        if col in df.columns:
+            df[key_column(col)] = wallet_keys(df[col])
+    return df
+
+
+def drop_wallet_keys(df):
+    """`df` without derived key columns, for writing back to CSV."""
+    return df.drop(columns=[key_column(c) for c in ADDRESS_COLUMNS if key_column(c) in df.columns])